@@ -1,10 +1,189 @@
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
+import argparse
+import asyncio
+import bisect
+import copy
+import cProfile
+import csv
+import functools
+import heapq
+import itertools
+import json
+import mmap
+import multiprocessing
+import os
 import pickle
-from datetime import datetime
+import re
+import shutil
+import signal
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+import zlib
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from queue import Queue, Empty
+from urllib.parse import parse_qs, urlsplit
+from contextlib import ExitStack, contextmanager, nullcontext
+from datetime import datetime, timedelta
 
-class Employee:
+try:
+    import numpy
+except ImportError:  # Optional: analytics fall back to plain Python sums without it.
+    numpy = None
+
+COLLECTIONS = ('employees', 'events', 'clients', 'guests', 'suppliers', 'venues', 'caterers')
+
+
+class Metrics:
+    """Process-wide latency histograms and counters for the hot paths; off unless ``enabled``.
+
+    Histograms use fixed buckets in seconds, so recording a call is a binary search and
+    three additions. ``export`` writes everything as JSON, or in the Prometheus text
+    format when the path ends in ``.prom``, for a local scraper to pick up.
+    """
+    BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.histograms = {}  # name -> [per-bucket counts (last one is +Inf), count, sum]
+        self.counters = {}  # (name, label) -> total
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = [[0] * (len(self.BUCKETS) + 1), 0, 0.0]
+            histogram[0][bisect.bisect_left(self.BUCKETS, seconds)] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+
+    def count(self, name, amount=1, label=''):
+        if self.enabled:
+            with self._lock:
+                self.counters[(name, label)] = self.counters.get((name, label), 0) + amount
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'latency_seconds': {name: {'buckets': dict(zip([*map(str, self.BUCKETS), '+Inf'], buckets)),
+                                           'count': count, 'sum': round(total, 6)}
+                                    for name, (buckets, count, total) in sorted(self.histograms.items())},
+                'counters': [{'name': name, 'label': label, 'value': value}
+                             for (name, label), value in sorted(self.counters.items())],
+            }
+
+    def prometheus(self):
+        lines = ['# TYPE event_app_call_seconds histogram']
+        with self._lock:
+            for name, (buckets, count, total) in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, bucket in zip([*map(str, self.BUCKETS), '+Inf'], buckets):
+                    cumulative += bucket
+                    lines.append(f'event_app_call_seconds_bucket{{function="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'event_app_call_seconds_sum{{function="{name}"}} {total}')
+                lines.append(f'event_app_call_seconds_count{{function="{name}"}} {count}')
+            for (name, label), value in sorted(self.counters.items()):
+                lines.append(f'event_app_{name}_total{{collection="{label}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """Atomically replace ``path`` with the current metrics."""
+        text = self.prometheus() if path.endswith('.prom') else json.dumps(self.snapshot(), indent=2)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def start_exporting(self, path, interval=10.0):
+        """Enable recording and rewrite ``path`` every ``interval`` seconds from a daemon thread."""
+        self.enabled = True
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.export(path)
+        threading.Thread(target=run, name="metrics", daemon=True).start()
+
+
+METRICS = Metrics()
+
+
+def timed(func):
+    """Record each call of ``func`` in METRICS under its qualified name while metrics are enabled."""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not METRICS.enabled:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            METRICS.observe(name, time.perf_counter() - started)
+    return wrapper
+
+
+@contextmanager
+def profiling(path):
+    """Run the block under cProfile (calling thread only) and tracemalloc.
+
+    Writes the pstats profile to ``path`` and the top allocation sites to ``path.memory.txt``.
+    """
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(path + '.memory.txt', 'w', encoding='utf-8') as f:
+            f.write(f"current {current} bytes, peak {peak} bytes\n")
+            for stat in snapshot.statistics('lineno')[:50]:
+                f.write(f"{stat}\n")
+
+class Record:
+    """Base for the entity classes: attributes live in ``__slots__`` rather than a per-instance ``__dict__``."""
+    __slots__ = ()
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        # Also accepts the plain ``__dict__`` state of records pickled before the classes used slots.
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class Employee(Record):
     """Represents an employee with various personal and professional details."""
+    __slots__ = ('employeeID', 'name', 'department', 'jobTitle', 'basicSalary', 'managerID')
+
+    @timed
     def __init__(self, employeeID, name, department, jobTitle, basicSalary, managerID):
         self.employeeID = employeeID
         self.name = name
@@ -16,8 +195,73 @@ class Employee:
     def get_details(self):
         return f"{self.name}, {self.department}, {self.jobTitle}, Salary: ${self.basicSalary}, Manager ID: {self.managerID}"
 
-class Event:
+class GuestList(Sequence):
+    """Sorted, duplicate-free guest IDs of one event; immutable once built.
+
+    The IDs are either a packed in-memory array or a zero-copy view of an event's
+    memory-mapped guest file (see GuestListStore), so iterating streams straight from
+    the file and a membership check is a binary search rather than a scan.
+    """
+    def __init__(self, ids=None, path=None, mapping=None):
+        self._ids = array('I') if ids is None else ids
+        self.path = path  # Guest file the IDs are mapped from, if any
+        self._map = mapping
+
+    @classmethod
+    def from_ids(cls, ids):
+        return cls(array('I', sorted(set(ids))))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return GuestList(array('I', self._ids[index]))
+        return self._ids[index]
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __contains__(self, guest_id):
+        position = bisect.bisect_left(self._ids, guest_id)
+        return position < len(self._ids) and self._ids[position] == guest_id
+
+    def __eq__(self, other):
+        if not isinstance(other, GuestList):
+            return NotImplemented
+        return len(self) == len(other) and self.tobytes() == other.tobytes()
+
+    def __repr__(self):
+        return f"GuestList({len(self)} guests)"
+
+    def without(self, guest_id):
+        """A copy of the list with ``guest_id`` removed."""
+        return GuestList(array('I', (item for item in self._ids if item != guest_id)))
+
+    def tolist(self):
+        return self._ids.tolist()
+
+    def tobytes(self):
+        """The IDs as little-endian uint32s, the layout of a guest file."""
+        if sys.byteorder == 'little':
+            return bytes(self._ids)
+        ids = array('I', self._ids)
+        ids.byteswap()
+        return ids.tobytes()
+
+    def preview(self, limit=20):
+        text = ', '.join(map(str, self._ids[:limit]))
+        if len(self._ids) > limit:
+            text += f", ... ({len(self._ids)} in total)"
+        return text
+
+
+class Event(Record):
     """Represents an event managed by the company."""
+    __slots__ = ('eventID', 'type', 'theme', 'date', 'time', 'duration', 'venueAddress', 'clientID', 'guests',
+                 'caterer', 'cleaner', 'decorator', 'entertainer', 'furnitureSupplier', 'invoice')
+
+    @timed
     def __init__(self, eventID, type, theme, date, time, duration, venueAddress, clientID, guests,
                  caterer, cleaner, decorator, entertainer, furnitureSupplier, invoice):
         self.eventID = eventID
@@ -28,7 +272,7 @@ class Event:
         self.duration = duration
         self.venueAddress = venueAddress
         self.clientID = clientID
-        self.guests = guests  # List of guest IDs
+        self.guests = GuestList.from_ids(guests)
         self.caterer = caterer
         self.cleaner = cleaner
         self.decorator = decorator
@@ -36,146 +280,4340 @@ class Event:
         self.furnitureSupplier = furnitureSupplier
         self.invoice = invoice
 
-    def get_details(self):
-        guest_ids = ', '.join(map(str, self.guests))
-        details = (f"Type: {self.type}, Theme: {self.theme}, Date: {self.date.date()}, Time: {self.time}, "
-                   f"Duration: {self.duration} hours, Venue: {self.venueAddress}, Client ID: {self.clientID}, "
-                   f"Guests: {guest_ids}, Catering: {self.caterer}, Cleaning: {self.cleaner}, "
-                   f"Decorations: {self.decorator}, Entertainment: {self.entertainer}, "
-                   f"Furniture: {self.furnitureSupplier}, Invoice: {self.invoice}")
-        return details
+    def get_details(self, guest_summary=None):
+        guest_ids = self.guests.preview() if guest_summary is None else guest_summary
+        details = (f"Type: {self.type}, Theme: {self.theme}, Date: {self.date.date()}, Time: {self.time}, "
+                   f"Duration: {self.duration} hours, Venue: {self.venueAddress}, Client ID: {self.clientID}, "
+                   f"Guests: {guest_ids}, Catering: {self.caterer}, Cleaning: {self.cleaner}, "
+                   f"Decorations: {self.decorator}, Entertainment: {self.entertainer}, "
+                   f"Furniture: {self.furnitureSupplier}, Invoice: {self.invoice}")
+        return details
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if not isinstance(self.guests, GuestList):
+            self.guests = GuestList.from_ids(self.guests)
+
+
+class Client(Record):
+    """Represents a client who organizes events."""
+    __slots__ = ('clientID', 'name', 'address', 'contactDetails', 'budget')
+
+    @timed
+    def __init__(self, clientID, name, address, contactDetails, budget):
+        self.clientID = clientID
+        self.name = name
+        self.address = address
+        self.contactDetails = contactDetails
+        self.budget = budget
+
+    def get_details(self):
+        return f"Name: {self.name}, Address: {self.address}, Contact: {self.contactDetails}, Budget: ${self.budget}"
+class Guest(Record):
+    """Represents a guest attending an event."""
+    __slots__ = ('guestID', 'name', 'address', 'contactDetails')
+
+    @timed
+    def __init__(self, guestID, name, address, contactDetails):
+        self.guestID = guestID
+        self.name = name
+        self.address = address
+        self.contactDetails = contactDetails
+
+    def get_details(self):
+        return f"Name: {self.name}, Address: {self.address}, Contact: {self.contactDetails}"
+class Supplier(Record):
+    """Represents a supplier providing services for an event."""
+    __slots__ = ('supplierID', 'name', 'service', 'contactDetails')
+
+    @timed
+    def __init__(self, supplierID, name, service, contactDetails):
+        self.supplierID = supplierID
+        self.name = name
+        self.service = service
+        self.contactDetails = contactDetails
+
+    def get_details(self):
+        return f"Name: {self.name}, Service: {self.service}, Contact: {self.contactDetails}"
+class Venue(Record):
+    """Represents a venue where events are held."""
+    __slots__ = ('venueID', 'name', 'address', 'contact', 'minGuests', 'maxGuests')
+
+    @timed
+    def __init__(self, venueID, name, address, contact, minGuests, maxGuests):
+        self.venueID = venueID
+        self.name = name
+        self.address = address
+        self.contact = contact
+        self.minGuests = minGuests
+        self.maxGuests = maxGuests
+
+    def get_details(self):
+        return f"Name: {self.name}, Address: {self.address}, Contact: {self.contact}, Capacity: {self.minGuests}-{self.maxGuests} guests"
+class Caterer(Record):
+    """Specific supplier type for catering services at events."""
+    __slots__ = ('catererID', 'name', 'address', 'contactDetails', 'menu', 'minGuests', 'maxGuests')
+
+    @timed
+    def __init__(self, catererID, name, address, contactDetails, menu, minGuests, maxGuests):
+        self.catererID = catererID
+        self.name = name
+        self.address = address
+        self.contactDetails = contactDetails
+        self.menu = menu
+        self.minGuests = minGuests
+        self.maxGuests = maxGuests
+
+    def get_details(self):
+        return (f"Name: {self.name}, Address: {self.address}, Contact: {self.contactDetails}, "
+                f"Menu: {self.menu}, Min Guests: {self.minGuests}, Max Guests: {self.maxGuests}")
+
+# Form label -> record attribute for each collection's "Manage ..." window.
+FORM_FIELDS = {
+    'employees': {"Employee ID": 'employeeID', "Name": 'name', "Department": 'department',
+                  "Job Title": 'jobTitle', "Basic Salary": 'basicSalary', "Manager ID": 'managerID'},
+    'events': {"Event ID": 'eventID', "Type": 'type', "Theme": 'theme', "Date (YYYY-MM-DD)": 'date',
+               "Time (HH:MM)": 'time', "Duration (hours)": 'duration', "Venue Address": 'venueAddress',
+               "Client ID": 'clientID', "Guest IDs (comma-separated)": 'guests',
+               "Supplier IDs (comma-separated)": 'suppliers', "Invoice": 'invoice'},
+    'clients': {"Client ID": 'clientID', "Name": 'name', "Address": 'address',
+                "Contact Details": 'contactDetails', "Budget": 'budget'},
+    'guests': {"Guest ID": 'guestID', "Name": 'name', "Address": 'address', "Contact Details": 'contactDetails'},
+    'suppliers': {"Supplier ID": 'supplierID', "Name": 'name', "Service": 'service',
+                  "Contact Details": 'contactDetails'},
+    'venues': {"Venue ID": 'venueID', "Name": 'name', "Address": 'address', "Contact": 'contact',
+               "Min Guests": 'minGuests', "Max Guests": 'maxGuests'},
+    'caterers': {"Caterer ID": 'catererID', "Name": 'name', "Address": 'address', "Contact Details": 'contactDetails',
+                 "Menu": 'menu', "Min Guests": 'minGuests', "Max Guests": 'maxGuests'},
+}
+SUPPLIER_SLOTS = ('caterer', 'cleaner', 'decorator', 'entertainer', 'furnitureSupplier')
+# The caterer slot holds a Caterer ID; the other slots hold Supplier IDs.
+SLOT_COLLECTIONS = {'caterer': 'caterers', 'cleaner': 'suppliers', 'decorator': 'suppliers',
+                    'entertainer': 'suppliers', 'furnitureSupplier': 'suppliers'}
+# Word prefixes in a Supplier's free-text ``service`` that qualify it for each non-catering slot.
+SERVICE_KEYWORDS = {'cleaner': ('clean', 'janitor', 'housekeep'),
+                    'decorator': ('decor', 'floral', 'florist', 'flower'),
+                    'entertainer': ('entertain', 'music', 'band', 'dj', 'perform', 'magic'),
+                    'furnitureSupplier': ('furniture', 'rental', 'seating', 'table', 'chair', 'tent')}
+# (referring collection, attribute, referenced collection) for every foreign key between records.
+REFERENCES = (
+    ('events', 'clientID', 'clients'),
+    ('events', 'guests', 'guests'),
+    *(('events', slot, SLOT_COLLECTIONS[slot]) for slot in SUPPLIER_SLOTS),
+    ('employees', 'managerID', 'employees'),
+)
+# What deleting a referenced record does to the records that refer to it: 'restrict' refuses
+# the delete, 'nullify' clears the reference and 'cascade' deletes the referring records too.
+DELETE_POLICIES = {'clients': 'restrict', 'guests': 'nullify', 'suppliers': 'nullify',
+                   'caterers': 'nullify', 'employees': 'nullify'}
+POLICIES = ('restrict', 'nullify', 'cascade')
+
+
+def form_values(collection, entries):
+    """Read a "Manage ..." form into a row keyed by record attribute, as the build_* functions expect."""
+    return {attribute: entries[label].get() for label, attribute in FORM_FIELDS[collection].items()}
+
+
+def record_id(record):
+    return getattr(record, record.__slots__[0])
+
+
+def parse_ids(value):
+    """Integer IDs from a comma-separated string (non-numeric items are skipped) or a list."""
+    if isinstance(value, str):
+        return [int(item.strip()) for item in value.split(',') if item.strip().isdigit()]
+    return [int(item) for item in value]
+
+
+def optional_id(value):
+    """An ID field that may hold a null reference (None, or empty in a form or CSV file)."""
+    return None if value is None or str(value).strip() == '' else int(value)
+
+
+# The build_* functions hold the validation rules for new records; they raise ValueError
+# on bad input and are shared by the add_* form handlers and the bulk importer.
+@timed
+def build_employee(row):
+    return Employee(int(row['employeeID']), row['name'], row['department'], row['jobTitle'],
+                    float(row['basicSalary']), optional_id(row['managerID']))
+
+
+@timed
+def build_event(row):
+    if 'suppliers' in row:
+        # The form takes one list of supplier IDs, assigned to the slots in order.
+        suppliers = dict(zip(SUPPLIER_SLOTS, parse_ids(row['suppliers'])))
+    else:
+        suppliers = {slot: optional_id(row.get(slot)) for slot in SUPPLIER_SLOTS}
+    return Event(int(row['eventID']), row['type'], row['theme'], row['date'], row['time'], float(row['duration']),
+                 row['venueAddress'], optional_id(row['clientID']), parse_ids(row['guests']),
+                 *(suppliers.get(slot) for slot in SUPPLIER_SLOTS), row['invoice'])
+
+
+@timed
+def build_client(row):
+    return Client(int(row['clientID']), row['name'], row['address'], row['contactDetails'], float(row['budget']))
+
+
+@timed
+def build_guest(row):
+    return Guest(int(row['guestID']), row['name'], row['address'], row['contactDetails'])
+
+
+@timed
+def build_supplier(row):
+    return Supplier(int(row['supplierID']), row['name'], row['service'], row['contactDetails'])
+
+
+@timed
+def build_venue(row):
+    return Venue(int(row['venueID']), row['name'], row['address'], row['contact'],
+                 int(row['minGuests']), int(row['maxGuests']))
+
+
+@timed
+def build_caterer(row):
+    return Caterer(int(row['catererID']), row['name'], row['address'], row['contactDetails'], row['menu'],
+                   int(row['minGuests']), int(row['maxGuests']))
+
+
+RECORD_CLASSES = {'employees': Employee, 'events': Event, 'clients': Client, 'guests': Guest,
+                  'suppliers': Supplier, 'venues': Venue, 'caterers': Caterer}
+BUILDERS = {'employees': build_employee, 'events': build_event, 'clients': build_client, 'guests': build_guest,
+            'suppliers': build_supplier, 'venues': build_venue, 'caterers': build_caterer}
+
+
+class ColumnarRecords:
+    """Compact read-mostly container holding a whole collection as one column per attribute.
+
+    IDs and numeric attributes are packed into typed arrays and repeated strings are
+    shared, so a bulk collection costs a few machine words per record instead of a full
+    object each. Records are materialised on demand by ``get`` or iteration.
+    """
+    def __init__(self, cls):
+        self.cls = cls
+        self.fields = cls.__slots__
+        self.ids = array('q')
+        self.columns = {name: None for name in self.fields[1:]}
+        self._strings = {}
+        self._sorted = True
+        self._rows = None
+
+    @classmethod
+    def from_records(cls, record_class, records):
+        columns = cls(record_class)
+        columns.extend(records)
+        return columns
+
+    def _new_column(self, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return []
+        return array('q') if isinstance(value, int) else array('d')
+
+    def append(self, record):
+        key = getattr(record, self.fields[0])
+        if self.ids and key <= self.ids[-1]:
+            self._sorted = False
+        self.ids.append(key)
+        self._rows = None
+        for name in self.fields[1:]:
+            value = getattr(record, name)
+            column = self.columns[name]
+            if column is None:
+                column = self.columns[name] = self._new_column(value)
+            if isinstance(value, str):
+                value = self._strings.setdefault(value, value)
+            try:
+                column.append(value)
+            except TypeError:
+                # A value that does not fit the packed type demotes the column to a list.
+                column = self.columns[name] = list(column)
+                column.append(value)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return (self.row(index) for index in range(len(self.ids)))
+
+    def row(self, index):
+        record = self.cls.__new__(self.cls)
+        setattr(record, self.fields[0], self.ids[index])
+        for name, column in self.columns.items():
+            setattr(record, name, column[index])
+        return record
+
+    def index_of(self, key):
+        """Row of ``key``: a binary search while IDs were appended in order, else a lazily built dict."""
+        if self._sorted:
+            index = bisect.bisect_left(self.ids, key)
+            if index < len(self.ids) and self.ids[index] == key:
+                return index
+            raise KeyError(key)
+        if self._rows is None:
+            self._rows = {record_id: index for index, record_id in enumerate(self.ids)}
+        return self._rows[key]
+
+    def get(self, key):
+        return self.row(self.index_of(key))
+
+    def column(self, name):
+        return self.ids if name == self.fields[0] else self.columns[name]
+
+
+class GuestListStore:
+    """Directory of per-event guest files for events too large to keep their guests inline.
+
+    ``<event ID>.<version>.ids`` holds the event's sorted guest IDs as little-endian
+    uint32s and nothing else (``<event ID>.ids`` is version 0, from older releases). A
+    file is never changed once written: every update gets a new version, so a log entry
+    committed earlier keeps pointing at the guests it was written with, and a file that
+    is memory-mapped is never replaced. Files no longer referenced are removed by ``sweep``
+    when the log is compacted.
+    """
+    def __init__(self, directory='event_guests', spill_threshold=1024):
+        self.directory = directory
+        self.spill_threshold = spill_threshold
+        self._lock = threading.Lock()
+        self._next_version = None
+        self._in_use = weakref.WeakValueDictionary()  # id -> guest list of this process backed by a file
+
+    @staticmethod
+    def name(event_id, version):
+        return f'{event_id}.ids' if version == 0 else f'{event_id}.{version}.ids'
+
+    @staticmethod
+    def parse(name):
+        """``(event ID, version)`` of a guest file name, or None for any other name."""
+        parts = os.path.basename(name).split('.')
+        if len(parts) not in (2, 3) or parts[-1] != 'ids' or not all(part.isdigit() for part in parts[:-1]):
+            return None
+        return int(parts[0]), int(parts[1]) if len(parts) == 3 else 0
+
+    def path(self, event_id, version):
+        return os.path.join(self.directory, self.name(event_id, version))
+
+    def write(self, event_id, guests):
+        """Store ``guests`` as a file of ``event_id`` and return its version.
+
+        A list already mapped from, or written to, one of the event's files reuses it.
+        """
+        if guests.path is not None and os.path.dirname(guests.path) == self.directory:
+            current = self.parse(guests.path)
+            if current is not None and current[0] == event_id and os.path.exists(guests.path):
+                return current[1]
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            if self._next_version is None:
+                versions = (parsed[1] for parsed in map(self.parse, os.listdir(self.directory)) if parsed)
+                self._next_version = max(versions, default=0) + 1
+            while True:
+                version = self._next_version
+                self._next_version += 1
+                path = self.path(event_id, version)
+                try:
+                    f = open(path, 'xb')  # Another process (an import worker) may have taken the name
+                    break
+                except FileExistsError:
+                    continue
+        with f:
+            f.write(guests.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        fsync_directory(path)
+        guests.path = path
+        with self._lock:
+            self._in_use[id(guests)] = guests
+        return version
+
+    def open(self, event_id, version):
+        path = self.path(event_id, version)
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size % 4:
+                raise ValueError(f"{path} is not a whole number of guest IDs")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if sys.byteorder == 'little':
+            guests = GuestList(memoryview(mapping).cast('I'), path, mapping)
+        else:
+            ids = array('I', mapping)
+            ids.byteswap()
+            guests = GuestList(ids, path)
+        with self._lock:
+            self._in_use[id(guests)] = guests
+        return guests
+
+    def sweep(self, referenced, owns=lambda key: True):
+        """Delete the guest files not named in ``referenced`` among those of events ``owns`` accepts.
+
+        Files still backing a guest list in this process (a record waiting to be written,
+        or one kept for undo) are left for a later sweep, as are files Windows refuses to
+        delete while mapped.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            in_use = {os.path.basename(guests.path) for guests in self._in_use.values()}
+        for name in names:
+            parsed = self.parse(name)
+            if parsed is not None and owns(parsed[0]) and name not in referenced and name not in in_use:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class RecordCodec:
+    """Versioned binary layout of one entity type, used for record payloads on disk.
+
+    A payload is a fixed-layout part followed by a variable part::
+
+        u8   schema version
+        per attribute, in ``__slots__`` order:
+          'i' int64 (-2**63 stands for None)      'f' float64
+          'd' int32 proleptic ordinal of a date   's' u32 offset, u32 length of UTF-8 text
+          'a' u32 offset, u32 count of little-endian uint32 IDs
+          'g' a guest list: as 'a', or offset 0xFFFFFFFF followed by the version of the
+              record's file in ``guest_lists`` when the list is longer than its spill
+              threshold (before events version 3: the count, and an unversioned file)
+        variable part: the text and ID arrays referenced by those offsets
+
+    All integers are little-endian. Decoding never executes code. Records written with
+    one of the ``compatible`` older versions are still read; any other version is
+    rejected rather than guessed at.
+    """
+    NULL_INT = -2 ** 63
+    NULL_LENGTH = 0xFFFFFFFF
+    SPILLED = 0xFFFFFFFF
+    FORMATS = {'i': 'q', 'f': 'd', 'd': 'i', 's': 'II', 'a': 'II', 'g': 'II'}
+
+    def __init__(self, cls, kinds, version=1, compatible=(), guest_lists=None):
+        self.cls = cls
+        self.version = version
+        self.compatible = compatible
+        self.guest_lists = guest_lists
+        self.layout = tuple(zip(cls.__slots__, kinds))
+        self.fixed = struct.Struct('<B' + ''.join(self.FORMATS[kind] for kind in kinds))
+        # (slot descriptor setter, kind, position in the unpacked tuple) for each attribute.
+        self._plan = []
+        index = 1
+        for name, kind in self.layout:
+            self._plan.append((getattr(cls, name).__set__, kind, index))
+            index += len(self.FORMATS[kind])
+
+    def encode(self, record):
+        values = [self.version]
+        variable = []
+        size = 0
+        for name, kind in self.layout:
+            value = getattr(record, name)
+            if kind == 'g' and len(value) > self.guest_lists.spill_threshold:
+                values += (self.SPILLED, self.guest_lists.write(getattr(record, self.cls.__slots__[0]), value))
+            elif kind == 'i':
+                values.append(self.NULL_INT if value is None else value)
+            elif kind == 'f':
+                values.append(value)
+            elif kind == 'd':
+                values.append(value.toordinal())
+            elif value is None:
+                values += (0, self.NULL_LENGTH)
+            else:
+                if kind == 's':
+                    data = str(value).encode('utf-8')
+                    values += (size, len(data))
+                elif kind == 'g':
+                    data = value.tobytes()
+                    values += (size, len(value))
+                else:
+                    ids = array('I', value)
+                    if sys.byteorder == 'big':
+                        ids.byteswap()
+                    data = ids.tobytes()
+                    values += (size, len(ids))
+                variable.append(data)
+                size += len(data)
+        return self.fixed.pack(*values) + b''.join(variable)
+
+    def decode(self, buffer, offset=0):
+        values = self.fixed.unpack_from(buffer, offset)
+        if values[0] != self.version and values[0] not in self.compatible:
+            raise ValueError(f"Unsupported {self.cls.__name__} record version {values[0]}")
+        base = offset + self.fixed.size
+        record = self.cls.__new__(self.cls)
+        for set_value, kind, index in self._plan:
+            value = values[index]
+            if kind == 's':
+                length = values[index + 1]
+                value = None if length == self.NULL_LENGTH else \
+                    str(buffer[base + value:base + value + length], 'utf-8')
+            elif kind == 'i':
+                if value == self.NULL_INT:
+                    value = None
+            elif kind == 'd':
+                value = datetime.fromordinal(value)
+            elif kind == 'g' and value == self.SPILLED:
+                value = self.guest_lists.open(values[1], self._spill_version(values, index))
+            elif kind in 'ag':
+                count = values[index + 1]
+                if count == self.NULL_LENGTH:
+                    value = None
+                else:
+                    ids = array('I')
+                    ids.frombytes(buffer[base + value:base + value + 4 * count])
+                    if sys.byteorder == 'big':
+                        ids.byteswap()
+                    if kind == 'a':
+                        value = ids
+                    elif values[0] >= 2:
+                        value = GuestList(ids)
+                    else:
+                        value = GuestList.from_ids(ids)  # Older versions kept guests unsorted
+            set_value(record, value)
+        return record
+
+    @staticmethod
+    def _spill_version(values, index):
+        return values[index + 1] if values[0] >= 3 else 0
+
+    def guest_files(self, buffer, offset=0):
+        """Names of the guest files the record encoded at ``offset`` points at."""
+        values = self.fixed.unpack_from(buffer, offset)
+        return [self.guest_lists.name(values[1], self._spill_version(values, index))
+                for _, kind, index in self._plan if kind == 'g' and values[index] == self.SPILLED]
+
+
+GUEST_LISTS = GuestListStore()
+CODECS = {
+    'employees': RecordCodec(Employee, 'isssfi'),
+    'events': RecordCodec(Event, 'issdsfsigiiiiis', version=3, compatible=(1, 2), guest_lists=GUEST_LISTS),
+    'clients': RecordCodec(Client, 'isssf'),
+    'guests': RecordCodec(Guest, 'isss'),
+    'suppliers': RecordCodec(Supplier, 'isss'),
+    'venues': RecordCodec(Venue, 'isssii'),
+    'caterers': RecordCodec(Caterer, 'issssii'),
+}
+
+
+class RecordLog:
+    """Append-only log of record writes for one entity collection.
+
+    The file starts with a magic number and format version. Every entry is a small
+    header (operation, record ID, payload length) followed by the record encoded with
+    the collection's RecordCodec, so adding or deleting one record appends one entry
+    instead of rewriting the whole collection. Once superseded entries outnumber live
+    records the log is compacted into a fresh file holding one entry per live record,
+    and an index file of record offsets is written next to it so later startups need not
+    scan the log. Records are decoded straight from a read-only memory map of the file.
+    """
+    MAGIC = b'EMRL'
+    FORMAT_VERSION = 1
+    FILE_HEADER = struct.Struct('<4sHH')
+    HEADER = struct.Struct('<BqI')
+    INDEX_HEADER = struct.Struct('<4sIQ')
+    INDEX_ENTRY = struct.Struct('<qQI')
+    INDEX_MAGIC = b'RIDX'
+    PUT = 1
+    DELETE = 2
+
+    def __init__(self, name, compact_threshold=1024, shard=None, read_only=False):
+        # ``shard`` is ``(index, count)`` when this log holds only the records with ID % count == index.
+        # A ``read_only`` log (a shard worker's) never truncates, converts or creates files.
+        self.shard = shard
+        self.read_only = read_only
+        self.name = name if shard is None else f'{name}.{shard[0]}-of-{shard[1]}'
+        self.codec = CODECS[name]
+        self.path = self.name + '.log'
+        self.index_path = self.name + '.idx'
+        self.legacy_path = name + '.pkl' if shard is None else None
+        self.compact_threshold = compact_threshold
+        self.entries = 0
+        self._file = None
+        self._reader = None
+        self._map = None
+
+    def load_index(self):
+        """Return ``{record ID: (offset, length)}`` for every live record in the log.
+
+        Offsets come from the index file written at the last compaction; only entries
+        appended since then are scanned, and their payloads are skipped, not decoded.
+        Pickle-based ``.pkl`` snapshots and logs from before the binary format are
+        converted once, on first load.
+        """
+        if not os.path.exists(self.path):
+            return {} if self.read_only else self._migrate_legacy()
+        if not self._has_file_header():
+            if self.read_only:
+                raise ValueError(f"{self.path} must be converted by a writable open first")
+            return self._migrate_legacy_log()
+
+        self.entries = 0
+        offsets, start = self._read_index_file()
+        for op, key, offset, length in self._scan(max(start, self.FILE_HEADER.size)):
+            if op == self.PUT:
+                offsets[key] = (offset, length)
+            else:
+                offsets.pop(key, None)
+        return offsets
+
+    def repair(self):
+        """Truncate a partially written trailing entry without loading or converting anything."""
+        if os.path.exists(self.path):
+            start = self.FILE_HEADER.size if self._has_file_header() else 0
+            for _ in self._scan(start):
+                pass
+
+    def _has_file_header(self):
+        with open(self.path, 'rb') as f:
+            header = f.read(self.FILE_HEADER.size)
+        if len(header) < self.FILE_HEADER.size or header[:4] != self.MAGIC:
+            return False
+        version = self.FILE_HEADER.unpack(header)[1]
+        if version != self.FORMAT_VERSION:
+            raise ValueError(f"{self.path} uses unsupported format version {version}")
+        return True
+
+    def _read_index_file(self):
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}, 0
+        if len(data) < self.INDEX_HEADER.size:
+            return {}, 0
+        magic, count, log_size = self.INDEX_HEADER.unpack_from(data)
+        expected = self.INDEX_HEADER.size + count * self.INDEX_ENTRY.size
+        if magic != self.INDEX_MAGIC or len(data) != expected or log_size > os.path.getsize(self.path):
+            return {}, 0
+        offsets = {}
+        for key, offset, length in self.INDEX_ENTRY.iter_unpack(data[self.INDEX_HEADER.size:]):
+            offsets[key] = (offset, length)
+        self.entries = count
+        return offsets, log_size
+
+    def _scan(self, start):
+        valid_end = start
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            while True:
+                header = f.read(self.HEADER.size)
+                if len(header) < self.HEADER.size:
+                    break
+                op, key, length = self.HEADER.unpack(header)
+                offset = f.tell()
+                if offset + length > size:
+                    break
+                f.seek(length, os.SEEK_CUR)
+                self.entries += 1
+                valid_end = offset + length
+                yield op, key, offset, length
+        if valid_end < size and not self.read_only:
+            # Drop a partially written trailing entry left by an interrupted write.
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_end)
+
+    def _migrate_legacy(self):
+        # One-time conversion of a snapshot written by older versions with pickle.
+        records = None
+        if self.legacy_path is not None:
+            try:
+                with open(self.legacy_path, 'rb') as f:
+                    records = pickle.load(f)
+            except FileNotFoundError:
+                pass
+        offsets = self._rewrite((key, self.codec.encode(record)) for key, record in (records or {}).items())
+        if records is not None:
+            # Set aside once the log is durable, so a later missing log never brings the snapshot back.
+            os.replace(self.legacy_path, self.legacy_path + '.migrated')
+            fsync_directory(self.legacy_path)
+        return offsets
+
+    def _migrate_legacy_log(self):
+        # One-time conversion of a log whose payloads were pickled records.
+        records = {}
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for op, key, offset, length in self._scan(0):
+            if op == self.PUT:
+                records[key] = pickle.loads(data[offset:offset + length])
+            else:
+                records.pop(key, None)
+        return self._rewrite((key, self.codec.encode(record)) for key, record in records.items())
+
+    def _mapped(self, end):
+        if self._map is None or end > len(self._map):
+            if self._map is not None:
+                self._map.close()
+            if self._reader is None:
+                self._reader = open(self.path, 'rb')
+            self._map = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def read(self, offset, length):
+        return self.codec.decode(self._mapped(offset + length), offset)
+
+    def put_many(self, records):
+        """Append ``{record ID: record}`` in a single write; return the new payload offsets."""
+        return self.append_block(*self.encode(records))
+
+    @timed
+    def encode(self, changes):
+        """Serialise ``{record ID: record, or None for a deletion}`` into one block of entries.
+
+        Returns the block and ``{record ID: (offset within the block, length)}`` of the records put.
+        """
+        chunks = []
+        positions = {}
+        position = 0
+        for key, record in changes.items():
+            if record is None:
+                chunks.append(self.HEADER.pack(self.DELETE, key, 0))
+                position += self.HEADER.size
+                continue
+            payload = self.codec.encode(record)
+            chunks.append(self.HEADER.pack(self.PUT, key, len(payload)))
+            chunks.append(payload)
+            positions[key] = (position + self.HEADER.size, len(payload))
+            position += self.HEADER.size + len(payload)
+        return b''.join(chunks), positions, len(changes)
+
+    def _open_for_append(self):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            if self._file.tell() == 0:
+                self._file.write(self.FILE_HEADER.pack(self.MAGIC, self.FORMAT_VERSION, 0))
+        return self._file
+
+    def append_block(self, block, positions, count):
+        """Append a block built by ``encode``; return the absolute offsets of its records."""
+        f = self._open_for_append()
+        base = f.tell()
+        f.write(block)
+        f.flush()
+        self.entries += count
+        METRICS.count('log_bytes_written', len(block), self.name)
+        return {key: (base + offset, length) for key, (offset, length) in positions.items()}
+
+    def owns(self, key):
+        return self.shard is None or key % self.shard[1] == self.shard[0]
+
+    def frame(self, entries):
+        """Build a block like ``encode`` from already encoded ``[(record ID, payload), ...]``."""
+        chunks = []
+        positions = {}
+        position = 0
+        for key, payload in entries:
+            chunks.append(self.HEADER.pack(self.PUT, key, len(payload)))
+            chunks.append(payload)
+            positions[key] = (position + self.HEADER.size, len(payload))
+            position += self.HEADER.size + len(payload)
+        return b''.join(chunks), positions, len(entries)
+
+    def needs_compaction(self, live_count):
+        return self.entries >= max(self.compact_threshold, 2 * live_count)
+
+    @timed
+    def compact(self, offsets):
+        """Rewrite the log to hold one entry per record in ``offsets``; return the new offsets.
+
+        Payloads are copied as raw bytes, so compaction never decodes a record.
+        """
+        end = max((offset + length for offset, length in offsets.values()), default=0)
+        data = self._mapped(end) if end else b''
+        offsets = self._rewrite((key, data[offset:offset + length]) for key, (offset, length) in offsets.items())
+        if self.codec.guest_lists is not None:
+            # Guest files of deleted events and superseded versions, now that the new log is durable
+            end = max((offset + length for offset, length in offsets.values()), default=0)
+            data = self._mapped(end) if end else b''
+            referenced = {name for offset, _ in offsets.values() for name in self.codec.guest_files(data, offset)}
+            self.codec.guest_lists.sweep(referenced, self.owns)
+        return offsets
+
+    def _rewrite(self, payloads):
+        tmp_path = self.path + '.tmp'
+        offsets = {}
+        with open(tmp_path, 'wb') as f:
+            f.write(self.FILE_HEADER.pack(self.MAGIC, self.FORMAT_VERSION, 0))
+            for key, payload in payloads:
+                f.write(self.HEADER.pack(self.PUT, key, len(payload)))
+                offsets[key] = (f.tell(), len(payload))
+                f.write(payload)
+            log_size = f.tell()
+            f.flush()
+            os.fsync(f.fileno())
+        METRICS.count('compaction_bytes_written', log_size, self.name)
+        self.close()
+        os.replace(tmp_path, self.path)
+        self._write_index_file(offsets, log_size)
+        self.entries = len(offsets)
+        return offsets
+
+    def _write_index_file(self, offsets, log_size):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, len(offsets), log_size))
+            f.write(b''.join(self.INDEX_ENTRY.pack(key, offset, length)
+                             for key, (offset, length) in offsets.items()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+        fsync_directory(self.index_path)
+
+    def remove(self):
+        """Close the log and delete its files."""
+        self.close()
+        for path in (self.path, self.index_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def sync(self):
+        """Force appended entries to stable storage."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        for handle in (self._file, self._reader):
+            if handle is not None:
+                handle.close()
+        self._file = None
+        self._reader = None
+
+
+class LazyRecords(MutableMapping):
+    """Dict-like view of one collection whose records are read from its log on first access.
+
+    Nothing is read when the view is created. The first lookup loads the offset index,
+    and each record is decoded only when it is first requested, then kept in memory.
+    ``lock`` guards the offsets and the log so a PersistenceWorker can write concurrently.
+    """
+    def __init__(self, log):
+        self.log = log
+        self.lock = threading.RLock()
+        self._offsets = None
+        self._cache = {}
+        self.shards = (self,)
+
+    def partition(self, changes):
+        return [(self, changes)]
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            with self.lock:
+                if self._offsets is None:
+                    self._offsets = self.log.load_index()
+        return self._offsets
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        with self.lock, METRICS.timer('LazyRecords.read'):
+            offset, length = self.offsets[key]
+            record = self._cache[key] = self.log.read(offset, length)
+        return record
+
+    def __setitem__(self, key, record):
+        with self.lock:
+            self.offsets.setdefault(key, None)
+            self._cache[key] = record
+
+    def get_many(self, keys):
+        """``{key: record}`` for those of ``keys`` that exist, reading the uncached ones in file order.
+
+        Like ``stream``, records read here are not kept in memory.
+        """
+        found, positions = {}, []
+        with self.lock, METRICS.timer('LazyRecords.read'):
+            offsets = self.offsets
+            for key in keys:
+                if key in self._cache:
+                    found[key] = self._cache[key]
+                elif offsets.get(key) is not None:
+                    positions.append((offsets[key], key))
+            for position, key in sorted(positions):
+                found[key] = self.log.read(*position)
+        return found
+
+    def __delitem__(self, key):
+        with self.lock:
+            del self.offsets[key]
+            self._cache.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @timed
+    def save_many(self, records):
+        """Add and persist several records with one log write; they are read back lazily."""
+        with self.lock:
+            self.offsets.update(self.log.put_many(records))
+            self.log.sync()
+            for key in records:
+                self._cache.pop(key, None)
+            if self.log.needs_compaction(len(self.offsets)):
+                self.compact()
+
+    def save_encoded(self, entries):
+        """Add records already encoded as ``[(record ID, payload), ...]`` with one log write."""
+        with self.lock:
+            self.offsets.update(self.log.append_block(*self.log.frame(entries)))
+            for key, _ in entries:
+                self._cache.pop(key, None)
+
+    def save_changes(self, changes):
+        """Persist ``{record ID: record, or None if deleted}`` snapshots taken by a PersistenceWorker.
+
+        Records are encoded before taking the lock, so the GUI thread only waits for the append.
+        """
+        self.apply_block(self.log.encode(changes))
+
+    def apply_block(self, block):
+        """Append a block built by ``RecordLog.encode`` and point the index at its records."""
+        with self.lock:
+            offsets = self.offsets
+            for key, position in self.log.append_block(*block).items():
+                # A record deleted again since the snapshot must not be resurrected.
+                if key in offsets:
+                    offsets[key] = position
+            if self.log.needs_compaction(len(offsets)):
+                self.compact()
+
+    def stream(self):
+        """Iterate over all records without keeping the ones not already cached in memory."""
+        with self.lock:
+            positions = list(self.offsets.items())
+        for key, position in positions:
+            if key in self._cache:
+                yield self._cache[key]
+            elif position is not None:
+                with self.lock:
+                    record = self.log.read(*position)
+                yield record
+
+    def compact(self):
+        """Rewrite the log down to one entry per record it holds.
+
+        The log's own index is compacted, not this view: a record still waiting for the
+        writer, or deleted here but not yet in the log, may belong to a transaction that is
+        rolled back, so it only reaches the log through the write-ahead log.
+        """
+        with self.lock:
+            stored = self.log.compact(self.log.load_index())
+            self._offsets = {key: None if position is None else stored[key]
+                             for key, position in self.offsets.items()}
+
+
+class ColumnarLogRecords(LazyRecords):
+    """LazyRecords that holds the stored records in one ColumnarRecords (``--columnar``).
+
+    The first lookup reads the whole collection into packed columns, and records are
+    materialised from them on each lookup instead of being kept one object each. Records
+    changed since are kept in the cache as usual; the log, write-ahead log and compaction
+    work exactly as for LazyRecords.
+    """
+    def __init__(self, log):
+        super().__init__(log)
+        self._columns = None
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            with self.lock:
+                if self._columns is None:
+                    stored = sorted((key, position) for key, position in self.offsets.items() if position is not None)
+                    self._columns = ColumnarRecords.from_records(
+                        self.log.codec.cls, (self.log.read(*position) for _, position in stored))
+        return self._columns
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        with self.lock:
+            position = self.offsets[key]
+            try:
+                return self.columns.get(key)
+            except KeyError:  # Stored after the columns were read
+                return self.log.read(*position)
+
+    def get_many(self, keys):
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.offsets:
+                    found[key] = self[key]
+        return found
+
+    def stream(self):
+        for key in list(self.offsets):
+            try:
+                yield self[key]
+            except KeyError:
+                pass  # Deleted meanwhile
+
+    def save_many(self, records):
+        super().save_many(records)
+        self._columns = None  # A bulk load may reuse IDs deleted since the columns were read
+
+    def save_encoded(self, entries):
+        super().save_encoded(entries)
+        self._columns = None
+
+
+SHARDED_COLLECTIONS = ('guests', 'events')
+_shard_pool = None
+
+
+def shard_pool():
+    """Process pool shared by every sharded collection, started on first use.
+
+    Workers are spawned rather than forked so they never inherit a lock held by one of
+    this process's threads.
+    """
+    global _shard_pool
+    if _shard_pool is None:
+        _shard_pool = ProcessPoolExecutor(os.cpu_count(), mp_context=multiprocessing.get_context('spawn'))
+    return _shard_pool
+
+
+class ShardedRecords(MutableMapping):
+    """Dict-like view of a collection partitioned by ``ID % count`` across ``count`` shard logs.
+
+    Single-ID operations go straight to the owning shard's LazyRecords in this process.
+    Whole-collection work is handed to ``map_shards``, which runs one task per shard in
+    the worker processes of ``shard_pool``; each worker reads its shard's files directly.
+    """
+    def __init__(self, name, count):
+        self.name = name
+        self.count = count
+        self.shards = [LazyRecords(RecordLog(name, shard=(index, count))) for index in range(count)]
+
+    def shard_for(self, key):
+        return self.shards[key % self.count]
+
+    def partition(self, changes):
+        """Split ``{record ID: value}`` into ``[(shard, changes for that shard), ...]``."""
+        parts = {}
+        for key, value in changes.items():
+            parts.setdefault(key % self.count, {})[key] = value
+        return [(self.shards[index], part) for index, part in parts.items()]
+
+    def __getitem__(self, key):
+        return self.shard_for(key)[key]
+
+    def __setitem__(self, key, record):
+        self.shard_for(key)[key] = record
+
+    def __delitem__(self, key):
+        del self.shard_for(key)[key]
+
+    def __contains__(self, key):
+        return key in self.shard_for(key)
+
+    def get_many(self, keys):
+        found = {}
+        for shard, part in self.partition(dict.fromkeys(keys)):
+            found.update(shard.get_many(part))
+        return found
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.shards)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def save_many(self, records):
+        for shard, part in self.partition(records):
+            shard.save_many(part)
+
+    def save_changes(self, changes):
+        for shard, part in self.partition(changes):
+            shard.save_changes(part)
+
+    def stream(self):
+        for shard in self.shards:
+            yield from shard.stream()
+
+    def compact(self):
+        for shard in self.shards:
+            shard.compact()
+
+    def map_shards(self, task, *args):
+        """``[task(collection, shard index, shard count, *args) for every shard]``, run in parallel.
+
+        Each shard's index is loaded here first, so a torn tail is repaired (and an old
+        format converted) by this process; the workers only read.
+        """
+        for shard in self.shards:
+            with shard.lock:
+                shard.offsets
+        indexes = range(self.count)
+        return list(shard_pool().map(task, [self.name] * self.count, indexes, [self.count] * self.count,
+                                     *([arg] * self.count for arg in args)))
+
+
+def open_shard(collection, index, count):
+    """Read-only view of one shard, for a task running in a shard worker."""
+    return LazyRecords(RecordLog(collection, shard=(index, count), read_only=True))
+
+
+def shard_event_totals(collection, index, count):
+    records = open_shard(collection, index, count)
+    try:
+        return event_totals(records.stream())
+    finally:
+        records.log.close()
+
+
+def part_path(path, index):
+    """Path of shard ``index``'s part of an export to ``path``: ``out.jsonl`` -> ``out.part0.jsonl``."""
+    stem, extension = os.path.splitext(path)
+    return f'{stem}.part{index}{extension}'
+
+
+def shard_export(collection, index, count, path):
+    records = open_shard(collection, index, count)
+    try:
+        return export_records(records, part_path(path, index))
+    finally:
+        records.log.close()
+
+
+def read_shard_count(collection):
+    try:
+        with open(collection + '.shards', encoding='utf-8') as f:
+            return int(f.read())
+    except FileNotFoundError:
+        return 1
+
+
+def open_records(collection, count):
+    return LazyRecords(RecordLog(collection)) if count == 1 else ShardedRecords(collection, count)
+
+
+def reshard(records, collection, count, chunk_size=10000):
+    """Copy every record of ``records`` into a ``count``-shard layout and return the new mapping.
+
+    The old files are deleted only after the new layout is durable and recorded in
+    ``<collection>.shards``; an interrupted run simply starts over on the next open.
+    """
+    target = open_records(collection, count)
+    chunk = {}
+    for record in records.stream():
+        chunk[record_id(record)] = record
+        if len(chunk) >= chunk_size:
+            target.save_many(chunk)
+            chunk = {}
+    if chunk:
+        target.save_many(chunk)
+    tmp_path = collection + '.shards.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(str(count))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, collection + '.shards')
+    fsync_directory(collection + '.shards')
+    for shard in records.shards:
+        shard.log.remove()
+    return target
+
+
+class SQLiteRepository:
+    """Stores all seven collections in one SQLite file.
+
+    Foreign keys (``Event.clientID``, ``Employee.managerID``, event dates and the
+    event-guest membership held in the ``event_guests`` join table) are indexed, so
+    lookups such as "all events for client X" never scan a whole collection.
+    """
+    # Collection -> (entity class, ID column, stored columns). Event guests live in event_guests.
+    TABLES = {
+        'employees': (Employee, 'employeeID',
+                      ('employeeID', 'name', 'department', 'jobTitle', 'basicSalary', 'managerID')),
+        'events': (Event, 'eventID',
+                   ('eventID', 'type', 'theme', 'date', 'time', 'duration', 'venueAddress', 'clientID',
+                    'caterer', 'cleaner', 'decorator', 'entertainer', 'furnitureSupplier', 'invoice')),
+        'clients': (Client, 'clientID', ('clientID', 'name', 'address', 'contactDetails', 'budget')),
+        'guests': (Guest, 'guestID', ('guestID', 'name', 'address', 'contactDetails')),
+        'suppliers': (Supplier, 'supplierID', ('supplierID', 'name', 'service', 'contactDetails')),
+        'venues': (Venue, 'venueID', ('venueID', 'name', 'address', 'contact', 'minGuests', 'maxGuests')),
+        'caterers': (Caterer, 'catererID',
+                     ('catererID', 'name', 'address', 'contactDetails', 'menu', 'minGuests', 'maxGuests')),
+    }
+    INDEXES = (
+        'CREATE INDEX IF NOT EXISTS events_by_client ON events (clientID)',
+        'CREATE INDEX IF NOT EXISTS events_by_date ON events (date, time)',
+        'CREATE INDEX IF NOT EXISTS employees_by_manager ON employees (managerID)',
+        'CREATE INDEX IF NOT EXISTS event_guests_by_guest ON event_guests (guestID)',
+    )
+
+    def __init__(self, path='event_management.db'):
+        is_new = not os.path.exists(path)
+        # The connection is shared with the PersistenceWorker thread; ``lock`` serialises its use.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self._transaction_depth = 0
+        self._on_commit = []  # Callbacks to run once the outermost transaction commits
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            for name, (_, key, columns) in self.TABLES.items():
+                column_defs = ', '.join(f'{column} INTEGER PRIMARY KEY' if column == key else column
+                                        for column in columns)
+                self.connection.execute(f'CREATE TABLE IF NOT EXISTS {name} ({column_defs})')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS event_guests '
+                                    '(eventID INTEGER, guestID INTEGER, PRIMARY KEY (eventID, guestID))')
+            for statement in self.INDEXES:
+                self.connection.execute(statement)
+        if is_new:
+            self.import_logs()
+
+    def import_logs(self):
+        """Copy any records already held in the per-collection logs into the database."""
+        with self.transaction():
+            for name in COLLECTIONS:
+                records = LazyRecords(RecordLog(name))
+                for record in records.values():
+                    self.put(name, record)
+                records.log.close()
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one transaction that commits or rolls back as a unit.
+
+        Nested calls join the outermost transaction.
+        """
+        with self.lock:
+            self._transaction_depth += 1
+            try:
+                if self._transaction_depth > 1:
+                    yield self
+                else:
+                    try:
+                        with self.connection:
+                            yield self
+                        for callback in self._on_commit:
+                            callback()
+                    finally:
+                        self._on_commit.clear()
+            finally:
+                self._transaction_depth -= 1
+
+    def on_commit(self, callback):
+        """Call ``callback`` once the current transaction commits; it is dropped on a rollback."""
+        with self.lock:
+            self._on_commit.append(callback)
+
+    def _query(self, sql, parameters=()):
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def collection(self, name):
+        return SQLiteRecords(self, name)
+
+    def get(self, name, key):
+        cls, key_column, columns = self.TABLES[name]
+        rows = self._query(f'SELECT {", ".join(columns)} FROM {name} WHERE {key_column} = ?', (key,))
+        if not rows:
+            raise KeyError(key)
+        values = dict(zip(columns, rows[0]))
+        if name == 'events':
+            values['guests'] = self.guests_of_event(key)
+        return cls(**values)
+
+    def get_many(self, name, keys):
+        """``{key: record}`` for those of ``keys`` that exist, fetched a few hundred per query."""
+        cls, key_column, columns = self.TABLES[name]
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            for row in self._query(f'SELECT {", ".join(columns)} FROM {name} '
+                                   f'WHERE {key_column} IN ({", ".join("?" * len(batch))})', batch):
+                values = dict(zip(columns, row))
+                if name == 'events':
+                    values['guests'] = self.guests_of_event(values[key_column])
+                found[values[key_column]] = cls(**values)
+        return found
+
+    def put(self, name, record):
+        _, key_column, columns = self.TABLES[name]
+        values = [getattr(record, column) for column in columns]
+        if name == 'events':
+            values[columns.index('date')] = record.date.strftime('%Y-%m-%d')
+        with self.transaction():
+            self.connection.execute(f'INSERT OR REPLACE INTO {name} ({", ".join(columns)}) '
+                                    f'VALUES ({", ".join("?" * len(columns))})', values)
+            if name == 'events':
+                self.connection.execute('DELETE FROM event_guests WHERE eventID = ?', (record.eventID,))
+                self.connection.executemany('INSERT OR IGNORE INTO event_guests (eventID, guestID) VALUES (?, ?)',
+                                            ((record.eventID, guest_id) for guest_id in record.guests))
+
+    def delete(self, name, key):
+        _, key_column, _ = self.TABLES[name]
+        with self.transaction():
+            self.connection.execute(f'DELETE FROM {name} WHERE {key_column} = ?', (key,))
+            if name == 'events':
+                self.connection.execute('DELETE FROM event_guests WHERE eventID = ?', (key,))
+
+    def contains(self, name, key):
+        _, key_column, _ = self.TABLES[name]
+        return bool(self._query(f'SELECT 1 FROM {name} WHERE {key_column} = ?', (key,)))
+
+    def ids(self, name):
+        _, key_column, _ = self.TABLES[name]
+        return [row[0] for row in self._query(f'SELECT {key_column} FROM {name} ORDER BY {key_column}')]
+
+    def count(self, name):
+        return self._query(f'SELECT COUNT(*) FROM {name}')[0][0]
+
+    def existing(self, name, keys):
+        """The subset of ``keys`` stored in the table, checked a few hundred per query."""
+        _, key_column, _ = self.TABLES[name]
+        keys = list(keys)
+        found = set()
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            found.update(row[0] for row in self._query(
+                f'SELECT {key_column} FROM {name} WHERE {key_column} IN ({", ".join("?" * len(batch))})', batch))
+        return found
+
+    def guests_of_event(self, event_id):
+        return [row[0] for row in self._query(
+            'SELECT guestID FROM event_guests WHERE eventID = ? ORDER BY guestID', (event_id,))]
+
+    def events_for_guest(self, guest_id):
+        return [row[0] for row in self._query(
+            'SELECT eventID FROM event_guests WHERE guestID = ? ORDER BY eventID', (guest_id,))]
+
+    def events_for_client(self, client_id):
+        return [row[0] for row in self._query(
+            'SELECT eventID FROM events WHERE clientID = ? ORDER BY eventID', (client_id,))]
+
+    def events_between(self, start_date, end_date):
+        """Event IDs dated from ``start_date`` to ``end_date`` inclusive (``YYYY-MM-DD`` strings)."""
+        return [row[0] for row in self._query(
+            'SELECT eventID FROM events WHERE date BETWEEN ? AND ? ORDER BY date, time', (start_date, end_date))]
+
+    def reports_of(self, manager_id):
+        return [row[0] for row in self._query(
+            'SELECT employeeID FROM employees WHERE managerID = ? ORDER BY employeeID', (manager_id,))]
+
+    def all(self, name):
+        """Yield every record of a collection in ID order."""
+        cls, key_column, columns = self.TABLES[name]
+        last_key = None
+        while True:
+            # Page by ID so the lock is never held while the caller consumes records.
+            if last_key is None:
+                rows = self._query(f'SELECT {", ".join(columns)} FROM {name} ORDER BY {key_column} LIMIT 1000')
+            else:
+                rows = self._query(f'SELECT {", ".join(columns)} FROM {name} WHERE {key_column} > ? '
+                                   f'ORDER BY {key_column} LIMIT 1000', (last_key,))
+            if not rows:
+                return
+            for row in rows:
+                values = dict(zip(columns, row))
+                if name == 'events':
+                    values['guests'] = self.guests_of_event(values['eventID'])
+                yield cls(**values)
+            last_key = rows[-1][0]
+
+    def close(self):
+        self.connection.close()
+
+
+class SQLiteRecords(MutableMapping):
+    """Dict-like view of one SQLite table with the same ``save_changes``/``compact`` interface as LazyRecords."""
+    def __init__(self, repository, name):
+        self.repository = repository
+        self.name = name
+        self._cache = {}
+        self._deleted = set()
+        self._dirty = set()  # IDs changed in memory and not yet written to the table
+        self.lock = threading.Lock()  # Guards the sets against the PersistenceWorker clearing them
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        if key in self._deleted:
+            raise KeyError(key)
+        record = self._cache[key] = self.repository.get(self.name, key)
+        return record
+
+    def get_many(self, keys):
+        found, missing = {}, []
+        for key in keys:
+            if key in self._cache:
+                found[key] = self._cache[key]
+            elif key not in self._deleted:
+                missing.append(key)
+        found.update(self.repository.get_many(self.name, missing))
+        return found
+
+    def __setitem__(self, key, record):
+        with self.lock:
+            self._deleted.discard(key)
+            self._dirty.add(key)
+            self._cache[key] = record
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        with self.lock:
+            self._cache.pop(key, None)
+            self._deleted.add(key)
+            self._dirty.add(key)
+
+    def __contains__(self, key):
+        if key in self._cache:
+            return True
+        return key not in self._deleted and self.repository.contains(self.name, key)
+
+    def _pending(self):
+        """``(IDs deleted, IDs added)`` in memory that the table does not reflect yet.
+
+        The PersistenceWorker writes behind the in-memory changes, so the table alone
+        would still list deleted records and miss new ones.
+        """
+        with self.lock:
+            deleted = set(self._deleted)
+            changed = set(self._dirty) | deleted
+        if not changed:
+            return set(), set()
+        stored = self.repository.existing(self.name, changed)
+        return stored & deleted, changed - deleted - stored
+
+    def __iter__(self):
+        removed, added = self._pending()
+        ids = (key for key in self.repository.ids(self.name) if key not in removed)
+        return heapq.merge(ids, sorted(added))
+
+    def __len__(self):
+        removed, added = self._pending()
+        return self.repository.count(self.name) - len(removed) + len(added)
+
+    def save_many(self, records):
+        with self.repository.transaction():
+            for key, record in records.items():
+                self.repository.put(self.name, record)
+                self._cache.pop(key, None)
+                self._deleted.discard(key)
+
+    def save_changes(self, changes):
+        """Persist ``{record ID: record, or None if deleted}`` snapshots in one transaction.
+
+        Once it commits, a record is no longer pending unless it changed again meanwhile.
+        """
+        with self.repository.transaction():
+            for key, record in changes.items():
+                if record is None:
+                    self.repository.delete(self.name, key)
+                else:
+                    self.repository.put(self.name, record)
+            self.repository.on_commit(lambda: self._saved(changes))
+
+    def _saved(self, changes):
+        with self.lock:
+            for key, record in changes.items():
+                if record is None:
+                    if key in self._deleted:
+                        self._deleted.discard(key)
+                        self._dirty.discard(key)
+                elif self._cache.get(key) is record:
+                    self._dirty.discard(key)
+
+    def stream(self):
+        return self.repository.all(self.name)
+
+    def compact(self):
+        """Write out anything not yet saved; SQLite manages its own file layout."""
+        with self.lock:
+            changes = {key: None if key in self._deleted else self._cache[key]
+                       for key in self._dirty if key in self._deleted or key in self._cache}
+        self.save_changes(changes)
+
+
+class IntervalIndex:
+    """Stabbing-query index over closed integer ranges ``[low, high]``, e.g. guest capacities.
+
+    Ranges live in a centred interval tree answering "which ranges contain x" in
+    O(log n + k). Additions go to a small buffer and removals to a tombstone set, both
+    folded in by a rebuild once they grow past a fraction of the tree.
+    """
+    def __init__(self):
+        self.ranges = {}
+        self._root = None
+        self._buffer = {}
+        self._removed = set()
+
+    def add(self, key, low, high):
+        self.discard(key)
+        self.ranges[key] = (low, high)
+        self._buffer[key] = (low, high)
+
+    def discard(self, key):
+        if self.ranges.pop(key, None) is not None and self._buffer.pop(key, None) is None:
+            self._removed.add(key)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def stab(self, point):
+        """Keys of all ranges with ``low <= point <= high``."""
+        if len(self._buffer) + len(self._removed) > max(64, len(self.ranges) // 8):
+            self._rebuild()
+        found = []
+        node = self._root
+        while node is not None:
+            center, by_low, by_high, left, right = node
+            if point < center:
+                for low, high, key in by_low:
+                    if low > point:
+                        break
+                    found.append(key)
+                node = left
+            else:
+                for high, low, key in by_high:
+                    if high < point:
+                        break
+                    found.append(key)
+                node = right if point > center else None
+        if self._removed:
+            found = [key for key in found if key not in self._removed]
+        found.extend(key for key, (low, high) in self._buffer.items() if low <= point <= high)
+        return found
+
+    def _rebuild(self):
+        self._root = self._build([(low, high, key) for key, (low, high) in self.ranges.items()])
+        self._buffer = {}
+        self._removed = set()
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        endpoints = sorted(point for low, high, _ in intervals for point in (low, high))
+        center = endpoints[len(endpoints) // 2]
+        left, here, right = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        by_low = sorted(here, key=lambda interval: interval[0])
+        by_high = sorted(((high, low, key) for low, high, key in here), key=lambda interval: -interval[0])
+        return center, by_low, by_high, self._build(left), self._build(right)
+
+
+class MatchingEngine:
+    """Finds the venues and caterers that can serve an event of a given size on a given date.
+
+    Capacity ranges (``minGuests``-``maxGuests``) are held in interval indexes and bookings
+    in ``booked``, which counts per day the events using each resource (see event_resources)
+    on every day they run. The indexes are built on the first query and then kept current
+    through ``record_changed``; SupplierAllocator plans against the same ones.
+    """
+    def __init__(self, venues, caterers, events):
+        self.venues = venues
+        self.caterers = caterers
+        self.events = events
+        self.built = False
+
+    def build(self):
+        self.venue_capacity = IntervalIndex()
+        self.caterer_capacity = IntervalIndex()
+        self.venue_addresses = {}
+        self.booked = {}  # day -> {resource: number of events using it}
+        for venue in self.venues.values():
+            self._add_venue(venue)
+        for caterer in self.caterers.values():
+            self.caterer_capacity.add(caterer.catererID, caterer.minGuests, caterer.maxGuests)
+        for event in self.events.values():
+            self._book(event, 1)
+        self.built = True
+
+    @staticmethod
+    def address_key(address):
+        return ' '.join(str(address).lower().split())
+
+    def _add_venue(self, venue):
+        self.venue_capacity.add(venue.venueID, venue.minGuests, venue.maxGuests)
+        self.venue_addresses[venue.venueID] = self.address_key(venue.address)
+
+    def _book(self, event, delta):
+        resources = event_resources(event)
+        for day in event_days(event):
+            counts = self.booked.setdefault(day, {})
+            for resource in resources:
+                counts[resource] = counts.get(resource, 0) + delta
+                if counts[resource] <= 0:
+                    del counts[resource]
+
+    def record_changed(self, collection, key, old, new):
+        if not self.built:
+            return
+        if collection == 'venues':
+            self.venue_capacity.discard(key)
+            self.venue_addresses.pop(key, None)
+            if new is not None:
+                self._add_venue(new)
+        elif collection == 'caterers':
+            self.caterer_capacity.discard(key)
+            if new is not None:
+                self.caterer_capacity.add(key, new.minGuests, new.maxGuests)
+        elif collection == 'events':
+            if old is not None:
+                self._book(old, -1)
+            if new is not None:
+                self._book(new, 1)
+
+    def candidates(self, guest_count, day):
+        """Return ``(venue IDs, caterer IDs)`` whose capacity fits ``guest_count`` and that are free on ``day``."""
+        if not self.built:
+            self.build()
+        booked = self.booked.get(day, {})
+        venues = [venue_id for venue_id in self.venue_capacity.stab(guest_count)
+                  if ('Venue', self.venue_addresses[venue_id]) not in booked]
+        caterers = [caterer_id for caterer_id in self.caterer_capacity.stab(guest_count)
+                    if ('Caterer', caterer_id) not in booked]
+        return sorted(venues), sorted(caterers)
+
+
+def event_window(event):
+    """Return the ``(start, end)`` datetimes an event occupies; an unparsable time counts from midnight."""
+    try:
+        start_time = datetime.strptime(event.time.strip(), '%H:%M').time()
+    except (AttributeError, ValueError):
+        start_time = datetime.min.time()
+    start = datetime.combine(event.date.date(), start_time)
+    return start, start + timedelta(hours=event.duration)
+
+
+def event_days(event):
+    """The dates an event runs on: more than one for an event running past midnight."""
+    start, end = event_window(event)
+    day = start.date()
+    while True:
+        yield day
+        day += timedelta(days=1)
+        if datetime.combine(day, datetime.min.time()) >= end:
+            return
+
+
+def event_resources(event):
+    """The bookable resources an event uses: its venue, its caterer and every supplier in its slots."""
+    resources = {('Venue', MatchingEngine.address_key(event.venueAddress))}
+    resources.update((RECORD_CLASSES[SLOT_COLLECTIONS[slot]].__name__, getattr(event, slot))
+                     for slot in SUPPLIER_SLOTS if getattr(event, slot) is not None)
+    return resources
+
+
+class ScheduleIndex:
+    """Per-venue and per-supplier index of booked time windows for conflict detection.
+
+    Each resource keeps its bookings as a list sorted by start time, next to a list of
+    the latest end among the bookings up to each position. Checking a new event costs a
+    binary search per resource, plus a walk back over the bookings that the latest end
+    says can still reach its start, so earlier long bookings are found even when
+    imported data already overlaps. ``scan_conflicts`` reports every overlap in the data
+    set with a sweep line over each resource's bookings.
+    """
+    def __init__(self, events):
+        self.events = events
+        self.bookings = None
+        self.reach = None  # resource -> running maximum of the bookings' end times
+
+    def _bookings(self):
+        if self.bookings is None:
+            bookings = {}
+            for event in self.events.values():
+                start, end = event_window(event)
+                for resource in event_resources(event):
+                    bookings.setdefault(resource, []).append((start, end, event.eventID))
+            self.reach = {}
+            for resource, windows in bookings.items():
+                windows.sort()
+                self._extend_reach(resource, windows, 0)
+            self.bookings = bookings
+        return self.bookings
+
+    def _extend_reach(self, resource, windows, index):
+        """Recompute the running maximum end from ``index`` on."""
+        reach = self.reach.setdefault(resource, [])
+        del reach[index:]
+        latest = reach[-1] if reach else None
+        for _, end, _ in windows[index:]:
+            latest = end if latest is None or end > latest else latest
+            reach.append(latest)
+
+    def _insert(self, event):
+        start, end = event_window(event)
+        for resource in event_resources(event):
+            windows = self.bookings.setdefault(resource, [])
+            index = bisect.bisect_left(windows, (start, end, event.eventID))
+            windows.insert(index, (start, end, event.eventID))
+            self._extend_reach(resource, windows, index)
+
+    def _remove(self, event):
+        start, end = event_window(event)
+        for resource in event_resources(event):
+            windows = self.bookings.get(resource, [])
+            index = bisect.bisect_left(windows, (start, end, event.eventID))
+            if index < len(windows) and windows[index][2] == event.eventID:
+                del windows[index]
+                self._extend_reach(resource, windows, index)
+
+    def record_changed(self, collection, key, old, new):
+        if collection != 'events' or self.bookings is None:
+            return
+        if old is not None:
+            self._remove(old)
+        if new is not None:
+            self._insert(new)
+
+    def conflicts_for(self, event):
+        """``[(resource, other event ID), ...]`` for bookings that overlap ``event``'s time window."""
+        bookings = self._bookings()
+        start, end = event_window(event)
+        conflicts = []
+        for resource in sorted(event_resources(event), key=str):
+            windows = bookings.get(resource, [])
+            reach = self.reach.get(resource, [])
+            found = []
+            # Every booking before ``index`` starts before the event ends; walk back while
+            # one of them can still end after the event starts.
+            index = bisect.bisect_left(windows, (end,)) - 1
+            while index >= 0 and reach[index] > start:
+                other_start, other_end, other_id = windows[index]
+                if other_id != event.eventID and start < other_end:
+                    found.append((resource, other_id))
+                index -= 1
+            conflicts.extend(reversed(found))
+        return conflicts
+
+    def scan_conflicts(self):
+        """``[(resource, event ID, event ID), ...]`` for every pair of overlapping bookings."""
+        conflicts = []
+        for resource, windows in self._bookings().items():
+            active = []
+            for start, end, event_id in windows:
+                while active and active[0][0] <= start:
+                    heapq.heappop(active)
+                conflicts.extend((resource, other_id, event_id) for _, other_id in active)
+                heapq.heappush(active, (end, event_id))
+        return conflicts
+
+
+def service_slots(service):
+    """The supplier slots a free-text service description qualifies for, e.g. "DJ & Music" -> entertainer."""
+    words = re.findall(r'[a-z]+', str(service).lower())
+    return [slot for slot, keywords in SERVICE_KEYWORDS.items()
+            if any(word.startswith(keyword) for word in words for keyword in keywords)]
+
+
+def max_bipartite_matching(options):
+    """Hopcroft-Karp maximum matching; ``options[u]`` lists the right vertices left vertex ``u`` accepts.
+
+    Options are tried in the given order, so earlier ones are preferred where the maximum
+    cardinality allows. Returns a list with each left vertex's match, or None.
+    """
+    match = [None] * len(options)
+    owner = {}
+    for u, choices in enumerate(options):  # Greedy seed; the phases below only repair it
+        for v in choices:
+            if v not in owner:
+                match[u] = v
+                owner[v] = u
+                break
+    while True:
+        # Layer the left vertices by alternating-path distance from the free ones.
+        layer = [-1] * len(options)
+        queue = [u for u, v in enumerate(match) if v is None and options[u]]
+        for u in queue:
+            layer[u] = 0
+        reachable = False
+        for u in queue:
+            for v in options[u]:
+                w = owner.get(v)
+                if w is None:
+                    reachable = True
+                elif layer[w] < 0:
+                    layer[w] = layer[u] + 1
+                    queue.append(w)
+        if not reachable:
+            return match
+        # Augment along vertex-disjoint layered paths, with an explicit stack instead of recursion.
+        position = [0] * len(options)
+        for root in range(len(options)):
+            if match[root] is not None or layer[root] != 0:
+                continue
+            path, via = [root], []
+            while path:
+                u = path[-1]
+                if position[u] == len(options[u]):
+                    layer[u] = -1  # Dead end for the rest of this phase
+                    path.pop()
+                    if via:
+                        via.pop()
+                    continue
+                v = options[u][position[u]]
+                position[u] += 1
+                w = owner.get(v)
+                if w is None:
+                    for left, right in zip(path, via + [v]):
+                        match[left] = right
+                        owner[right] = left
+                    break
+                if layer[w] == layer[u] + 1:
+                    path.append(w)
+                    via.append(v)
+
+
+class SupplierAllocator:
+    """Fills the empty supplier slots of a batch of events with free, suitable suppliers.
+
+    Suppliers are indexed by the slots their ``service`` text qualifies them for; caterer
+    capacities and the resources booked each day come from the service's MatchingEngine,
+    which keeps them current. A supplier takes at most one event per day, so each
+    day is an independent bipartite matching between the (event, slot) pairs to fill and
+    the suppliers not already booked that day, solved to maximum cardinality with
+    Hopcroft-Karp. Options are ordered by the tightest caterer fit and then by the fewest
+    assignments so far in the plan, which spreads the work across the season.
+    """
+    def __init__(self, suppliers, matcher):
+        self.suppliers = suppliers
+        self.matcher = matcher
+        self.built = False
+
+    def build(self):
+        self.by_slot = {slot: set() for slot in SERVICE_KEYWORDS}
+        for supplier in self.suppliers.values():
+            self._add_supplier(supplier, 1)
+        self.built = True
+
+    def _add_supplier(self, supplier, delta):
+        for slot in service_slots(supplier.service):
+            if delta > 0:
+                self.by_slot[slot].add(supplier.supplierID)
+            else:
+                self.by_slot[slot].discard(supplier.supplierID)
+
+    def record_changed(self, collection, key, old, new):
+        if not self.built or collection != 'suppliers':
+            return
+        if old is not None:
+            self._add_supplier(old, -1)
+        if new is not None:
+            self._add_supplier(new, 1)
+
+    def plan(self, events):
+        """Return ``({event ID: {slot: supplier ID}}, [(event ID, slot), ...] left unfilled)`` for ``events``."""
+        if not self.built:
+            self.build()
+        matcher = self.matcher
+        if not matcher.built:
+            matcher.build()
+        by_day = {}
+        for event in events:
+            by_day.setdefault(event.date.date(), []).append(event)
+        load = {}
+        planned = {}  # day -> resources assigned so far by this plan
+        assigned, unfilled = {}, []
+        for day in sorted(by_day):
+            wanted, options = [], []
+            for event in sorted(by_day[day], key=lambda event: event.eventID):
+                days = list(event_days(event))
+                busy = set()
+                for other_day in days:
+                    busy.update(matcher.booked.get(other_day, ()))
+                    busy.update(planned.get(other_day, ()))
+                for slot in SUPPLIER_SLOTS:
+                    if getattr(event, slot) is not None:
+                        continue
+                    kind = RECORD_CLASSES[SLOT_COLLECTIONS[slot]].__name__
+                    if slot == 'caterer':
+                        guests = len(event.guests)
+                        fits = sorted((matcher.caterers[key].maxGuests - guests, key)
+                                      for key in matcher.caterer_capacity.stab(guests))
+                        keys = [key for _, key in fits]
+                    else:
+                        keys = sorted(self.by_slot[slot])
+                    choices = [(kind, key) for key in keys if (kind, key) not in busy]
+                    choices.sort(key=lambda resource: load.get(resource, 0))  # Stable: keeps the fit order
+                    wanted.append((event.eventID, slot, days))
+                    options.append(choices)
+            for (event_id, slot, days), resource in zip(wanted, max_bipartite_matching(options)):
+                if resource is None:
+                    unfilled.append((event_id, slot))
+                    continue
+                assigned.setdefault(event_id, {})[slot] = resource[1]
+                load[resource] = load.get(resource, 0) + 1
+                for other_day in days:
+                    planned.setdefault(other_day, set()).add(resource)
+        return assigned, unfilled
+
+
+class CalendarIndex:
+    """Events ordered by start time (``Event.date`` plus ``time``) for date-range queries.
+
+    One list of ``(start, event ID)`` is kept sorted with bisect, so a range or a page of
+    upcoming events costs two binary searches plus the events returned, and an add or a
+    delete is a single insertion or removal. Built on the first query, then kept current
+    through ``record_changed``.
+    """
+    def __init__(self, events):
+        self.events = events
+        self._starts = None
+
+    @property
+    def starts(self):
+        if self._starts is None:
+            self._starts = sorted((event_window(event)[0], event.eventID) for event in self.events.values())
+        return self._starts
+
+    def record_changed(self, collection, key, old, new):
+        if collection != 'events' or self._starts is None:
+            return
+        if old is not None:
+            entry = (event_window(old)[0], key)
+            index = bisect.bisect_left(self._starts, entry)
+            if index < len(self._starts) and self._starts[index] == entry:
+                del self._starts[index]
+        if new is not None:
+            bisect.insort(self._starts, (event_window(new)[0], key))
+
+    def between(self, start, end):
+        """IDs of the events starting at or after ``start`` and before ``end``, in start order."""
+        starts = self.starts
+        low = bisect.bisect_left(starts, (start,))
+        return [key for _, key in starts[low:bisect.bisect_left(starts, (end,), low)]]
+
+    def after(self, moment, limit, last_key=None):
+        """Up to ``limit`` ``(start, event ID)`` pairs from ``moment`` on, or past ``(moment, last_key)`` if given."""
+        starts = self.starts
+        if last_key is None:
+            index = bisect.bisect_left(starts, (moment,))
+        else:
+            index = bisect.bisect_right(starts, (moment, last_key))
+        return starts[index:index + limit]
+
+
+class SearchIndex:
+    """In-memory inverted index over the text fields of every collection.
+
+    Each collection maps a lower-cased word to the set of record IDs containing it, and
+    a sorted vocabulary serves prefix lookups with a binary search. Built on the first
+    search, then updated through ``record_changed``.
+    """
+    FIELDS = {
+        'employees': ('name', 'department', 'jobTitle'),
+        'events': ('type', 'theme', 'venueAddress'),
+        'clients': ('name', 'address', 'contactDetails'),
+        'guests': ('name', 'address', 'contactDetails'),
+        'suppliers': ('name', 'service', 'contactDetails'),
+        'venues': ('name', 'address', 'contact'),
+        'caterers': ('name', 'address', 'contactDetails', 'menu'),
+    }
+    WORD = re.compile(r'\w+')
+
+    def __init__(self, collections):
+        self.collections = collections
+        self.postings = None
+        self.vocabulary = None
+
+    @classmethod
+    def tokens(cls, text):
+        return cls.WORD.findall(str(text).lower())
+
+    def _record_tokens(self, collection, record):
+        return {token for field in self.FIELDS[collection] for token in self.tokens(getattr(record, field))}
+
+    def build(self):
+        self.postings = {name: {} for name in self.FIELDS}
+        self.vocabulary = {name: [] for name in self.FIELDS}
+        for name, records in self.collections.items():
+            postings = self.postings[name]
+            for key, record in records.items():
+                for token in self._record_tokens(name, record):
+                    postings.setdefault(token, set()).add(key)
+            self.vocabulary[name] = sorted(postings)
+
+    def _add(self, collection, key, record):
+        postings = self.postings[collection]
+        for token in self._record_tokens(collection, record):
+            if token not in postings:
+                postings[token] = set()
+                bisect.insort(self.vocabulary[collection], token)
+            postings[token].add(key)
+
+    def _remove(self, collection, key, record):
+        postings = self.postings[collection]
+        for token in self._record_tokens(collection, record):
+            keys = postings.get(token)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del postings[token]
+                vocabulary = self.vocabulary[collection]
+                del vocabulary[bisect.bisect_left(vocabulary, token)]
+
+    def record_changed(self, collection, key, old, new):
+        if self.postings is None or collection not in self.postings:
+            return
+        if old is not None:
+            self._remove(collection, key, old)
+        if new is not None:
+            self._add(collection, key, new)
+
+    def _prefix_matches(self, collection, prefix):
+        vocabulary = self.vocabulary[collection]
+        index = bisect.bisect_left(vocabulary, prefix)
+        while index < len(vocabulary) and vocabulary[index].startswith(prefix):
+            yield self.postings[collection][vocabulary[index]]
+            index += 1
+
+    def search(self, text, collections=None, limit=100):
+        """Return up to ``limit`` ``(collection, record ID)`` pairs matching every word of ``text``.
+
+        All words but the last must match whole words; the last also matches as a prefix,
+        so "al" finds "Alice" and "main st" finds "12 Main Street".
+        """
+        if self.postings is None:
+            self.build()
+        words = self.tokens(text)
+        if not words:
+            return []
+        prefix = words[-1]
+        results = []
+        seen = set()
+        for collection in collections or COLLECTIONS:
+            postings = self.postings[collection]
+            prefixed = list(self._prefix_matches(collection, prefix))
+            exact = sorted((postings.get(word, set()) for word in words[:-1]), key=len)
+            if not exact or sum(map(len, prefixed)) <= len(exact[0]):
+                matches = (key for keys in prefixed for key in keys if all(key in other for other in exact))
+            else:
+                # Walk the rarest word's records and check the prefix against each record directly.
+                records = self.collections[collection]
+                matches = (key for key in exact[0]
+                           if all(key in keys for keys in exact[1:])
+                           and any(token.startswith(prefix) for token in self._record_tokens(collection, records[key])))
+            for key in matches:
+                if (collection, key) not in seen:
+                    seen.add((collection, key))
+                    results.append((collection, key))
+                    if len(results) >= limit:
+                        return results
+        return results
+
+
+class ReferenceIndex:
+    """Reverse index of the foreign keys in REFERENCES: which records refer to a given record.
+
+    ``referrers[(collection, ID)]`` is the set of ``(referring collection, referring ID,
+    attribute)`` pointing at that record, so deleting it only touches its own referrers.
+    Built on first use, then kept current through ``record_changed``.
+    """
+    def __init__(self, collections):
+        self.collections = collections
+        self._referrers = None
+
+    @property
+    def referrers(self):
+        if self._referrers is None:
+            self._referrers = {}
+            sources = {source for source, _, _ in REFERENCES}
+            for source in sources:
+                for key, record in self.collections[source].items():
+                    self._update(source, key, record, self._add)
+        return self._referrers
+
+    @staticmethod
+    def references(source, record):
+        """Yield ``(attribute, referenced collection, referenced ID)`` for a record's foreign keys."""
+        for referring, attribute, target in REFERENCES:
+            if referring != source:
+                continue
+            value = getattr(record, attribute)
+            for target_id in (value if isinstance(value, GuestList) else (value,)):
+                if target_id is not None:
+                    yield attribute, target, target_id
+
+    def _add(self, target, source):
+        self._referrers.setdefault(target, set()).add(source)
+
+    def _discard(self, target, source):
+        sources = self._referrers.get(target)
+        if sources is not None:
+            sources.discard(source)
+            if not sources:
+                del self._referrers[target]
+
+    def _update(self, source, key, record, operation):
+        for attribute, target, target_id in self.references(source, record):
+            operation((target, target_id), (source, key, attribute))
+
+    def record_changed(self, collection, key, old, new):
+        if self._referrers is None:
+            return
+        if old is not None:
+            self._update(collection, key, old, self._discard)
+        if new is not None:
+            self._update(collection, key, new, self._add)
+
+    def referring(self, collection, key):
+        return sorted(self.referrers.get((collection, key), ()))
+
+
+class HierarchyIndex:
+    """Reporting tree defined by ``Employee.managerID``.
+
+    Every employee keeps jump pointers to its ancestors 2, 4, 8, ... levels up, so
+    "does X report (indirectly) to M" and "whose tree is X in" are O(log n), and each
+    manager's headcount and salary roll-up are kept current, so reading them is O(1).
+    An employee whose manager is missing, or is their own manager, is a root until that
+    manager is added. Cycles found in stored data are reported in ``cycles`` and broken
+    at their lowest ID; ``would_cycle`` lets callers refuse new ones. Built on first use,
+    then kept current through ``record_changed``.
+    """
+    def __init__(self, employees):
+        self.employees = employees
+        self._built = False
+        self.cycles = []
+
+    def build(self):
+        self.manager_of = {key: employee.managerID for key, employee in self.employees.items()}
+        self.salary = {key: employee.basicSalary for key, employee in self.employees.items()}
+        self.parent = {}
+        self.waiting = {}  # missing manager ID -> employees reporting to them
+        for key, manager_id in self.manager_of.items():
+            if manager_id in self.manager_of and manager_id != key:
+                self.parent[key] = manager_id
+            else:
+                self.parent[key] = None
+                if manager_id is not None and manager_id != key:
+                    self.waiting.setdefault(manager_id, set()).add(key)
+        self.cycles = []
+        on_path, done = set(), set()
+        for start in self.parent:
+            path = []
+            key = start
+            while key is not None and key not in done and key not in on_path:
+                on_path.add(key)
+                path.append(key)
+                key = self.parent[key]
+            if key in on_path:
+                cycle = path[path.index(key):]
+                self.cycles.append(sorted(cycle))
+                self.parent[min(cycle)] = None
+            on_path.clear()
+            done.update(path)
+        self.children = {key: set() for key in self.parent}
+        for key, parent in self.parent.items():
+            if parent is not None:
+                self.children[parent].add(key)
+        self.depth, self.jumps = {}, {}
+        order = []
+        for root in [key for key, parent in self.parent.items() if parent is None]:
+            order += self._link_subtree(root)
+        self.headcount = dict.fromkeys(self.parent, 1)
+        self.rollup = dict(self.salary)
+        for key in reversed(order):
+            parent = self.parent[key]
+            if parent is not None:
+                self.headcount[parent] += self.headcount[key]
+                self.rollup[parent] += self.rollup[key]
+        self._built = True
+
+    def _link_subtree(self, top):
+        """Recompute depth and jump pointers below ``top``; returns the subtree in BFS order."""
+        order = [top]
+        for key in order:
+            parent = self.parent[key]
+            if parent is None:
+                self.depth[key] = 0
+                self.jumps[key] = []
+            else:
+                self.depth[key] = self.depth[parent] + 1
+                jumps = [parent]
+                while len(jumps) - 1 < len(self.jumps[jumps[-1]]):
+                    jumps.append(self.jumps[jumps[-1]][len(jumps) - 1])
+                self.jumps[key] = jumps
+            order.extend(self.children[key])
+        return order
+
+    def _add_to_ancestors(self, key, headcount, salary):
+        parent = self.parent[key]
+        while parent is not None:
+            self.headcount[parent] += headcount
+            self.rollup[parent] += salary
+            parent = self.parent[parent]
+
+    def _attach(self, key, parent):
+        self.parent[key] = parent
+        self.children[parent].add(key)
+        self._link_subtree(key)
+        self._add_to_ancestors(key, self.headcount[key], self.rollup[key])
+
+    def _detach(self, key):
+        self._add_to_ancestors(key, -self.headcount[key], -self.rollup[key])
+        self.children[self.parent[key]].discard(key)
+        self.parent[key] = None
+        self._link_subtree(key)
+
+    def record_changed(self, collection, key, old, new):
+        if collection != 'employees' or not self._built:
+            return
+        if old is not None:
+            self._remove(key)
+        if new is not None:
+            self._insert(key, new)
+
+    def _insert(self, key, employee):
+        self.manager_of[key] = employee.managerID
+        self.salary[key] = self.rollup[key] = employee.basicSalary
+        self.headcount[key] = 1
+        self.parent[key] = None
+        self.children[key] = set()
+        self._link_subtree(key)
+        for report in self.waiting.pop(key, ()):
+            self._attach(report, key)
+        manager_id = employee.managerID
+        if manager_id in self.parent and manager_id != key:
+            if self.root_of(manager_id) == key:
+                self.cycles.append(self._cycle_through(key, manager_id))
+            else:
+                self._attach(key, manager_id)
+                return
+        if manager_id is not None and manager_id != key and manager_id not in self.parent:
+            self.waiting.setdefault(manager_id, set()).add(key)
+
+    def _cycle_through(self, key, manager_id):
+        cycle = [manager_id]
+        while cycle[-1] != key:
+            cycle.append(self.parent[cycle[-1]])
+        return sorted(cycle)
+
+    def _remove(self, key):
+        if self.parent[key] is not None:
+            self._detach(key)
+        for report in list(self.children[key]):
+            self._detach(report)
+            self.waiting.setdefault(key, set()).add(report)
+        waiting = self.waiting.get(self.manager_of[key])
+        if waiting is not None:
+            waiting.discard(key)
+            if not waiting:
+                del self.waiting[self.manager_of[key]]
+        for table in (self.manager_of, self.salary, self.parent, self.children, self.depth, self.jumps,
+                      self.headcount, self.rollup):
+            del table[key]
+        self.cycles = [cycle for cycle in self.cycles if key not in cycle]
+
+    def _ensure_built(self):
+        if not self._built:
+            self.build()
+
+    def ancestor(self, key, levels):
+        """The manager ``levels`` steps above ``key``, using O(log levels) jumps."""
+        bit = 0
+        while levels:
+            if levels & 1:
+                key = self.jumps[key][bit]
+            levels >>= 1
+            bit += 1
+        return key
+
+    def root_of(self, key):
+        self._ensure_built()
+        return self.ancestor(key, self.depth[key])
+
+    def reports_to(self, key, manager_id):
+        """Whether ``key`` is below ``manager_id`` in the tree, directly or indirectly."""
+        self._ensure_built()
+        if key not in self.depth or manager_id not in self.depth or self.depth[key] <= self.depth[manager_id]:
+            return False
+        return self.ancestor(key, self.depth[key] - self.depth[manager_id]) == manager_id
+
+    def would_cycle(self, key, manager_id):
+        """Whether giving employee ``key`` the manager ``manager_id`` would close a reporting loop."""
+        self._ensure_built()
+        if manager_id == key or manager_id not in self.parent:
+            return False
+        if key in self.parent:
+            return self.reports_to(manager_id, key)
+        return self.manager_of[self.root_of(manager_id)] == key
+
+    def chain_of_command(self, key):
+        """Managers above ``key``, nearest first."""
+        self._ensure_built()
+        chain = []
+        parent = self.parent[key]
+        while parent is not None:
+            chain.append(parent)
+            parent = self.parent[parent]
+        return chain
+
+    def team(self, manager_id):
+        """IDs of everyone below ``manager_id``, in ID order."""
+        self._ensure_built()
+        members = []
+        pending = list(self.children[manager_id])
+        while pending:
+            key = pending.pop()
+            members.append(key)
+            pending.extend(self.children[key])
+        return sorted(members)
+
+    def summary(self, key):
+        self._ensure_built()
+        return {'employeeID': key, 'depth': self.depth[key], 'chain': self.chain_of_command(key),
+                'reports': sorted(self.children[key]), 'headcount': self.headcount[key],
+                'salaryRollup': round(self.rollup[key], 2)}
+
+
+class RenderCache:
+    """LRU cache of the detail pages shown by the display views and ``/<collection>/<id>/details``.
+
+    Events list their guests by name ``PAGE_SIZE`` at a time, each page resolving its
+    guest IDs with one bulk read, so a page costs the same however large the event is.
+    ``record_changed`` drops a record's pages when it changes, and an event's pages when a
+    guest they name changes; the least recently viewed pages go once the cached text
+    exceeds ``max_chars``. Like the other indexes it is used under the service's index lock.
+    """
+    PAGE_SIZE = 50
+
+    def __init__(self, guests, max_chars=4_000_000):
+        self.guests = guests
+        self.max_chars = max_chars
+        self.size = 0
+        self.pages = OrderedDict()  # (collection, record ID, page) -> (text, guest IDs named), oldest first
+        self.cached_pages = {}  # (collection, record ID) -> page numbers in ``pages``
+        self.shown_in = {}  # guest ID -> IDs of the events with a cached page naming the guest
+
+    def page_count(self, collection, record):
+        if collection != 'events':
+            return 1
+        return max(1, -(-len(record.guests) // self.PAGE_SIZE))
+
+    def render(self, collection, record, page=0):
+        """Text of page ``page`` (from 0) of ``record``'s details."""
+        key = record_id(record)
+        pages = self.page_count(collection, record)
+        if not 0 <= page < pages:
+            raise ValueError(f"page must be from 0 to {pages - 1}")
+        cached = self.pages.get((collection, key, page))
+        if cached is not None:
+            self.pages.move_to_end((collection, key, page))
+            METRICS.count('render_cache_hits', 1, collection)
+            return cached[0]
+        METRICS.count('render_cache_misses', 1, collection)
+        guest_ids = ()
+        if collection == 'events':
+            guest_ids = record.guests[page * self.PAGE_SIZE:(page + 1) * self.PAGE_SIZE]
+            names = {guest_id: guest.name for guest_id, guest in self.guests.get_many(guest_ids).items()}
+            text = record.get_details(f"{len(record.guests)}, page {page + 1} of {pages}")
+            text += ''.join(f"\n  {guest_id}: {names.get(guest_id, '(unknown guest)')}" for guest_id in guest_ids)
+            for guest_id in guest_ids:
+                self.shown_in.setdefault(guest_id, set()).add(key)
+        else:
+            text = record.get_details()
+        self.pages[(collection, key, page)] = (text, guest_ids)
+        self.cached_pages.setdefault((collection, key), set()).add(page)
+        self.size += len(text)
+        while self.size > self.max_chars and len(self.pages) > 1:
+            self._drop(*next(iter(self.pages)))
+        return text
+
+    def _drop(self, collection, key, page):
+        text, guest_ids = self.pages.pop((collection, key, page))
+        self.size -= len(text)
+        pages = self.cached_pages[(collection, key)]
+        pages.discard(page)
+        if not pages:
+            del self.cached_pages[(collection, key)]
+        for guest_id in guest_ids:
+            events = self.shown_in.get(guest_id)
+            # Another cached page of the same event cannot name the same guest.
+            if events is not None:
+                events.discard(key)
+                if not events:
+                    del self.shown_in[guest_id]
+
+    def _drop_record(self, collection, key):
+        for page in list(self.cached_pages.get((collection, key), ())):
+            self._drop(collection, key, page)
+
+    def record_changed(self, collection, key, old, new):
+        self._drop_record(collection, key)
+        if collection == 'guests':
+            for event_id in list(self.shown_in.get(key, ())):
+                self._drop_record('events', event_id)
+
+
+INVOICE_ITEM = re.compile(r'(?P<description>[^:=]*?)\s*[:=]\s*\$?\s*(?P<amount>\d[\d,]*(?:\.\d+)?)')
+
+
+def parse_invoice(text):
+    """Line items ``[(description, amount), ...]`` of a free-text ``Event.invoice``.
+
+    Items are separated by semicolons or new lines and written ``description: amount``
+    (or with ``=``), optionally with ``$`` and thousands separators. Text without an
+    amount, such as a bare invoice number, yields no items.
+    """
+    items = []
+    for part in re.split(r'[;\n]', text or ''):
+        match = INVOICE_ITEM.fullmatch(part.strip())
+        if match:
+            items.append((match['description'] or "Item", float(match['amount'].replace(',', ''))))
+    return items
+
+
+def invoice_total(text):
+    return sum(amount for _, amount in parse_invoice(text))
+
+
+def group_sums(codes, weights, groups):
+    """Totals of ``weights`` (an ``array('d')``) per group code in ``codes`` (an ``array('q')``)."""
+    if numpy is not None:
+        return numpy.bincount(numpy.frombuffer(codes, dtype=numpy.int64),
+                              weights=numpy.frombuffer(weights, dtype=numpy.float64), minlength=groups).tolist()
+    totals = [0.0] * groups
+    for code, weight in zip(codes, weights):
+        totals[code] += weight
+    return totals
+
+
+def event_totals(events):
+    """``(spend per client, revenue per month, events per booked supplier, event count)`` of ``events``."""
+    clients, months, bookings = {}, {}, {}
+    client_codes, month_codes, amounts = array('q'), array('q'), array('d')
+    for event in events:
+        client_codes.append(clients.setdefault(event.clientID, len(clients)))
+        month_codes.append(months.setdefault(event.date.strftime('%Y-%m'), len(months)))
+        amounts.append(invoice_total(event.invoice))
+        for booking in AnalyticsEngine.booked(event):
+            bookings[booking] = bookings.get(booking, 0) + 1
+    return (dict(zip(clients, group_sums(client_codes, amounts, len(clients)))),
+            dict(zip(months, group_sums(month_codes, amounts, len(months)))), bookings, len(amounts))
+
+
+class AnalyticsEngine:
+    """Spend against budget, monthly revenue, supplier utilization and payroll aggregates.
+
+    The first query extracts the attributes involved into typed column arrays and sums
+    them per group in one pass, vectorized with NumPy when it is installed; the events
+    of a sharded collection are summed per shard in parallel and merged. After that
+    ``record_changed`` subtracts a record's old contribution and adds its new one, so a
+    dashboard refreshed after every edit never rescans the collections.
+    """
+    def __init__(self, collections):
+        self.collections = collections
+        self.built = False
+        self.spend = {}  # client ID -> invoiced total of the client's events
+        self.budgets = {}  # client ID -> budget
+        self.revenue = {}  # 'YYYY-MM' -> invoiced total of the events in that month
+        self.bookings = {}  # (collection, supplier ID) -> number of events booking it
+        self.event_count = 0
+        self.payroll = {}  # department -> [headcount, total basic salary]
+
+    @staticmethod
+    def booked(event):
+        return [(SLOT_COLLECTIONS[slot], getattr(event, slot)) for slot in SUPPLIER_SLOTS
+                if getattr(event, slot) is not None]
+
+    def build(self):
+        events = self.collections['events']
+        if isinstance(events, ShardedRecords):
+            parts = events.map_shards(shard_event_totals)
+        else:
+            parts = [event_totals(events.values())]
+        self.spend, self.revenue, self.bookings, self.event_count = {}, {}, {}, 0
+        for spend, revenue, bookings, count in parts:
+            for totals, part in ((self.spend, spend), (self.revenue, revenue), (self.bookings, bookings)):
+                for key, value in part.items():
+                    totals[key] = totals.get(key, 0) + value
+            self.event_count += count
+        self.budgets = {key: client.budget for key, client in self.collections['clients'].items()}
+
+        departments = {}
+        department_codes, salaries = array('q'), array('d')
+        for employee in self.collections['employees'].values():
+            department_codes.append(departments.setdefault(employee.department, len(departments)))
+            salaries.append(employee.basicSalary)
+        headcounts = group_sums(department_codes, array('d', [1.0]) * len(salaries), len(departments))
+        totals = group_sums(department_codes, salaries, len(departments))
+        self.payroll = {department: [int(headcount), total]
+                        for department, headcount, total in zip(departments, headcounts, totals)}
+        self.built = True
+
+    def record_changed(self, collection, key, old, new):
+        if not self.built:
+            return
+        if old is not None:
+            self._apply(collection, key, old, -1)
+        if new is not None:
+            self._apply(collection, key, new, 1)
+
+    def _apply(self, collection, key, record, sign):
+        if collection == 'events':
+            amount = sign * invoice_total(record.invoice)
+            self.spend[record.clientID] = self.spend.get(record.clientID, 0.0) + amount
+            month = record.date.strftime('%Y-%m')
+            self.revenue[month] = self.revenue.get(month, 0.0) + amount
+            for booking in self.booked(record):
+                count = self.bookings.get(booking, 0) + sign
+                if count:
+                    self.bookings[booking] = count
+                else:
+                    self.bookings.pop(booking, None)
+            self.event_count += sign
+        elif collection == 'clients':
+            if sign > 0:
+                self.budgets[key] = record.budget
+            else:
+                self.budgets.pop(key, None)
+        elif collection == 'employees':
+            totals = self.payroll.setdefault(record.department, [0, 0.0])
+            totals[0] += sign
+            totals[1] += sign * record.basicSalary
+            if not totals[0]:
+                del self.payroll[record.department]
+
+    def report(self):
+        """All aggregates as plain JSON-ready data, building them on first use."""
+        if not self.built:
+            self.build()
+        return {
+            'clients': [{'clientID': key, 'spend': round(self.spend.get(key, 0.0), 2), 'budget': budget,
+                         'remaining': round(budget - self.spend.get(key, 0.0), 2)}
+                        for key, budget in sorted(self.budgets.items())],
+            'revenue': [{'month': month, 'revenue': round(total, 2)}
+                        for month, total in sorted(self.revenue.items()) if round(total, 2)],
+            'suppliers': [{'collection': collection, 'id': key, 'events': count,
+                           'utilization': round(count / self.event_count, 4)}
+                          for (collection, key), count in sorted(self.bookings.items(),
+                                                                 key=lambda item: (-item[1], item[0]))],
+            'payroll': [{'department': department, 'headcount': headcount, 'total': round(total, 2)}
+                        for department, (headcount, total) in sorted(self.payroll.items())],
+        }
+
+
+def fsync_directory(path):
+    """Make a rename inside the directory holding ``path`` durable (a no-op where unsupported)."""
+    try:
+        descriptor = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class WriteAheadLog:
+    """Shared redo log that makes a batch of changes to several collections durable at once.
+
+    Each commit is one entry (payload length, CRC-32, payload) holding, per collection, a
+    block of RecordLog entries. It is fsynced before the blocks are appended to the
+    collection logs, so a batch is either replayed completely after a crash or not at all.
+    Changes reach the collection logs only this way (compaction copies what they already
+    hold), so a restart never sees a change that was not committed here. A checkpoint
+    fsyncs the collection logs and empties this file.
+    """
+    HEADER = struct.Struct('<II')
+    BLOCK_HEADER = struct.Struct('<BI')
+
+    def __init__(self, path='data.wal', checkpoint_bytes=4 * 1024 * 1024):
+        self.path = path
+        self.checkpoint_bytes = checkpoint_bytes
+        self._file = open(path, 'ab')
+        self.size = self._file.tell()
+
+    @timed
+    def commit(self, blocks):
+        """Durably append ``{collection name: block of log entries}`` as one entry."""
+        parts = []
+        for name, block in blocks.items():
+            encoded_name = name.encode()
+            parts.append(self.BLOCK_HEADER.pack(len(encoded_name), len(block)) + encoded_name)
+            parts.append(block)
+        payload = b''.join(parts)
+        self._file.write(self.HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.size += self.HEADER.size + len(payload)
+        METRICS.count('wal_bytes_written', self.HEADER.size + len(payload))
+
+    def reset(self):
+        """Empty the log once everything in it is durable in the collection logs."""
+        self._file.truncate(0)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.size = 0
+
+    def close(self):
+        self._file.close()
+
+    @classmethod
+    def entries(cls, path):
+        """Yield the ``{collection name: block}`` of every intact entry, stopping at a torn or corrupt one."""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        position = 0
+        while position + cls.HEADER.size <= len(data):
+            length, checksum = cls.HEADER.unpack_from(data, position)
+            payload = data[position + cls.HEADER.size:position + cls.HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            blocks = {}
+            offset = 0
+            while offset < len(payload):
+                name_length, block_length = cls.BLOCK_HEADER.unpack_from(payload, offset)
+                offset += cls.BLOCK_HEADER.size
+                name = payload[offset:offset + name_length].decode()
+                offset += name_length
+                blocks[name] = payload[offset:offset + block_length]
+                offset += block_length
+            yield blocks
+            position += cls.HEADER.size + length
+
+    @classmethod
+    def recover(cls, logs, path='data.wal'):
+        """Replay committed batches into the collection logs, then empty the write-ahead log.
+
+        Entries already applied before the crash are appended again; replaying the whole
+        log in order leaves every record in its last committed state.
+        """
+        repaired = set()
+        for blocks in cls.entries(path):
+            for name, block in blocks.items():
+                log = logs[name]
+                if name not in repaired:
+                    log.repair()
+                    repaired.add(name)
+                log.append_block(block, {}, 0)
+        for name in repaired:
+            logs[name].sync()
+            logs[name].close()
+        if os.path.exists(path):
+            with open(path, 'r+b') as f:
+                f.truncate(0)
+                os.fsync(f.fileno())
+
+
+class PersistenceWorker:
+    """Background thread that writes changed records so the Tk main loop never waits on disk.
+
+    ``mark_dirty`` only records a snapshot of the change. The thread waits ``delay``
+    seconds after the first change so bursts are coalesced, writes every collection's
+    pending changes in one batch, and posts ``(error or None, records written)`` to
+    ``results`` for the GUI to pick up with ``root.after``. With a ``wal`` each batch is
+    one group commit: a single fsync covers every change in it.
+    """
+    def __init__(self, collections, wal=None, delay=0.05):
+        self.collections = collections
+        self.wal = wal
+        self.delay = delay
+        self.results = Queue()
+        self._pending = {}
+        self._lock = threading.Condition()
+        self._writing = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, collection, key, record):
+        """Queue ``record`` (``None`` for a deletion) to be written; later changes to the same key win."""
+        with self._lock:
+            self._pending.setdefault(collection, {})[key] = record
+            self._lock.notify_all()
+
+    def mark_dirty_many(self, changes):
+        """``mark_dirty`` for each ``(collection, ID, record)``, queued together so they land in one batch."""
+        with self._lock:
+            for collection, key, record in changes:
+                self._pending.setdefault(collection, {})[key] = record
+            self._lock.notify_all()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._lock.wait()
+                if not self._pending:
+                    return
+            time.sleep(self.delay)
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._writing = True
+            error = None
+            try:
+                self._write(batch)
+            except Exception as e:
+                error = e
+            with self._lock:
+                self._writing = False
+                self._lock.notify_all()
+            self.results.put((error, sum(len(changes) for changes in batch.values())))
+
+    @timed
+    def _write(self, batch):
+        if self.wal is None:
+            repository = getattr(self.collections['events'], 'repository', None)
+            with repository.transaction() if repository is not None else nullcontext():
+                for collection, changes in batch.items():
+                    self.collections[collection].save_changes(changes)
+            return
+        blocks = [(shard, shard.log.encode(changes)) for collection, changes in batch.items()
+                  for shard, changes in self.collections[collection].partition(changes)]
+        self.wal.commit({shard.log.name: block[0] for shard, block in blocks})
+        for shard, block in blocks:
+            shard.apply_block(block)
+        if self.wal.size >= self.wal.checkpoint_bytes:
+            self.checkpoint()
+
+    @timed
+    def checkpoint(self):
+        """Make the collection logs durable and empty the write-ahead log."""
+        if self.wal is None:
+            return
+        for records in self.collections.values():
+            for shard in records.shards:
+                with shard.lock:
+                    shard.log.sync()
+        self.wal.reset()
+
+    def flush(self):
+        """Block until every change marked so far has been written."""
+        with self._lock:
+            while self._pending or self._writing:
+                self._lock.wait()
+
+    def close(self):
+        """Write any remaining changes and stop the thread."""
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._thread.join()
+        if self.wal is not None:
+            self.checkpoint()
+            self.wal.close()
+
+
+class DataDirectoryLocked(OSError):
+    """Another process already has the data files open."""
+
+
+_DIRECTORY_LOCKS = {}
+
+
+def lock_data_directory(path='data.lock'):
+    """Hold an exclusive lock on ``path`` for the rest of the process.
+
+    Two processes appending to the same logs and WAL would corrupt them, so a second
+    GUI or ``serve`` on the same directory fails here instead. Opening the collections
+    again in the same process reuses the lock; the OS releases it when the process exits.
+    """
+    path = os.path.abspath(path)
+    if path in _DIRECTORY_LOCKS:
+        return
+    f = open(path, 'a+b')
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        raise DataDirectoryLocked(f"{os.path.dirname(path)} is in use by another process.") from None
+    _DIRECTORY_LOCKS[path] = f
+
+
+def open_collections(backend='log', shards=1):
+    """Return ``{collection name: mapping}`` for the chosen storage backend, without loading any records.
+
+    ``backend`` is 'log', 'columnar' (the logs, read into ColumnarRecords) or 'sqlite'.
+    With ``shards`` > 1 the collections in SHARDED_COLLECTIONS are split across that many
+    shard logs; data stored with a different shard count is redistributed first. The data
+    directory is locked first so only one process at a time can open it.
+    """
+    lock_data_directory()
+    if backend == 'sqlite':
+        repository = SQLiteRepository()
+        return {name: repository.collection(name) for name in COLLECTIONS}
+    collections = {name: open_records(name, read_shard_count(name)) for name in COLLECTIONS}
+    WriteAheadLog.recover({shard.log.name: shard.log for records in collections.values() for shard in records.shards})
+    for name in SHARDED_COLLECTIONS:
+        if read_shard_count(name) != shards:
+            collections[name] = reshard(collections[name], name, shards)
+    if backend == 'columnar':
+        collections = {name: ColumnarLogRecords(records.log) for name, records in collections.items()}
+    return collections
+
+
+def read_rows(path):
+    """Yield ``(line number, row)`` from a ``.jsonl`` file or a ``.csv`` file with a header row."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_number, e
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if None in row or None in row.values():
+                    row = ValueError(f"expected {len(reader.fieldnames)} fields")
+                yield reader.line_num, row
+
+
+def validate_row(collection, row):
+    """``(record, None)`` for a valid row, else ``(None, error message)``."""
+    try:
+        if isinstance(row, Exception):
+            raise ValueError(row)
+        return BUILDERS[collection](row), None
+    except KeyError as e:
+        return None, f"Missing field: {e}"
+    except (TypeError, ValueError) as e:
+        return None, f"Invalid input: {e}"
+
+
+def import_rules(collection, records):
+    """``check(record)`` for the rules of ``check_new_record`` on an import into ``records``, or
+    None if the collection has none. A record that passes counts for the rows after it."""
+    if collection not in ('events', 'employees'):
+        return None
+    schedule = ScheduleIndex(records)
+    hierarchy = HierarchyIndex(records)
+
+    def check(record):
+        check_new_record(collection, record, schedule, hierarchy)
+        key = record_id(record)
+        schedule.record_changed(collection, key, None, record)
+        hierarchy.record_changed(collection, key, None, record)
+    return check
+
+
+def import_records(records, collection, path, chunk_size=10000):
+    """Stream rows from ``path`` into ``records``, committing once per chunk.
+
+    Rows are validated with the same build_* rules as the add_* forms and, like
+    ``EventService.add``, events overlapping a booking and managers that would close a
+    reporting loop are refused. Bad rows and duplicate IDs are skipped and reported
+    instead of aborting the import.
+    Returns ``(number imported, [(line number, error message), ...])``.
+    """
+    imported = 0
+    errors = []
+    chunk = {}
+    check = import_rules(collection, records)
+    for line_number, row in read_rows(path):
+        record, error = validate_row(collection, row)
+        if error is not None:
+            errors.append((line_number, error))
+            continue
+        key = record_id(record)
+        if key in chunk or key in records:
+            errors.append((line_number, f"Record with ID {key} already exists."))
+            continue
+        if check is not None:
+            try:
+                check(record)
+            except ServiceError as e:
+                errors.append((line_number, str(e)))
+                continue
+        chunk[key] = record
+        if len(chunk) >= chunk_size:
+            records.save_many(chunk)
+            imported += len(chunk)
+            chunk = {}
+    if chunk:
+        records.save_many(chunk)
+        imported += len(chunk)
+    return imported, errors
+
+
+def encode_rows(collection, path, start, end):
+    """Validate and encode the ``.jsonl`` lines in bytes ``start:end`` of ``path``; runs in a shard worker.
+
+    Returns ``(number of lines, [(line offset, record ID, payload)], [(line offset, error)])``
+    with line offsets counted from the first line of the range.
+    """
+    codec = CODECS[collection]
+    encoded, errors = [], []
+    with open(path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).decode('utf-8').split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    for offset, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            row = e
+        record, error = validate_row(collection, row)
+        if error is not None:
+            errors.append((offset, error))
+        else:
+            encoded.append((offset, record_id(record), codec.encode(record)))
+    return len(lines), encoded, errors
+
+
+def import_records_parallel(records, collection, path, chunk_size=10000):
+    """``import_records`` for a ``.jsonl`` file into a ShardedRecords, with the parsing,
+    validation and encoding spread over the shard worker processes.
+
+    Byte ranges of the file are handled in parallel; their results are applied in file
+    order, so duplicates and error line numbers come out as with ``import_records``.
+    """
+    size = os.path.getsize(path)
+    step = max(size // (4 * (os.cpu_count() or 1)), 1 << 20)
+    ranges = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            f.seek(start + step)
+            f.readline()  # Ranges end on a line boundary
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    imported = 0
+    errors = []
+    pending = {}
+    first_line = 1
+    seen = set()
+    check = import_rules(collection, records)
+    results = shard_pool().map(encode_rows, itertools.repeat(collection), itertools.repeat(path),
+                               [start for start, _ in ranges], [end for _, end in ranges])
+    for line_count, encoded, range_errors in results:
+        problems = [(first_line + offset, error) for offset, error in range_errors]
+        for offset, key, payload in encoded:
+            if key in seen or key in records:
+                problems.append((first_line + offset, f"Record with ID {key} already exists."))
+                continue
+            if check is not None:
+                try:
+                    check(CODECS[collection].decode(payload))
+                except ServiceError as e:
+                    problems.append((first_line + offset, str(e)))
+                    continue
+            seen.add(key)
+            pending.setdefault(key % records.count, []).append((key, payload))
+        errors.extend(sorted(problems))
+        first_line += line_count
+        if sum(map(len, pending.values())) >= chunk_size:
+            imported += _save_encoded(records, pending)
+            pending = {}
+    imported += _save_encoded(records, pending)
+    return imported, errors
+
+
+def _save_encoded(records, pending):
+    for index, entries in pending.items():
+        shard = records.shards[index]
+        shard.save_encoded(entries)
+        shard.log.sync()
+    return sum(map(len, pending.values()))
+
+
+def export_row(record):
+    row = record.__getstate__()
+    if isinstance(record, Event):
+        row['date'] = record.date.strftime('%Y-%m-%d')
+        row['guests'] = record.guests.tolist()
+    return row
+
+
+def export_records(records, path):
+    """Stream every record to a ``.jsonl`` or ``.csv`` file; returns the number written.
+
+    The shards of a ShardedRecords are exported in parallel to part files that are then
+    joined, keeping a single CSV header.
+    """
+    if isinstance(records, ShardedRecords):
+        part_paths = [part_path(path, index) for index in range(records.count)]
+        counts = records.map_shards(shard_export, path)
+        header_written = False
+        with open(path, 'wb') as out:
+            for part_file in part_paths:
+                with open(part_file, 'rb') as part:
+                    if not path.endswith('.jsonl'):
+                        header = part.readline()
+                        if header and not header_written:
+                            out.write(header)
+                            header_written = True
+                    shutil.copyfileobj(part, out)
+                os.remove(part_file)
+        return sum(counts)
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = None
+        for record in records.stream():
+            row = export_row(record)
+            if path.endswith('.jsonl'):
+                f.write(json.dumps(row) + '\n')
+            else:
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    writer.writeheader()
+                if isinstance(record, Event):
+                    row['guests'] = ','.join(map(str, row['guests']))
+                writer.writerow(row)
+            count += 1
+    return count
+
+
+class _TrieNode:
+    __slots__ = ('bitmap', 'slots')  # Each slot is a (key, value) entry, a _TrieNode or a _Collision
+
+    def __init__(self, bitmap, slots):
+        self.bitmap = bitmap
+        self.slots = slots
+
+
+class _Collision:
+    __slots__ = ('entries',)  # (key, value) entries whose 64-bit hashes are equal
+
+    def __init__(self, entries):
+        self.entries = entries
+
+
+_MISSING = object()
+
+
+class PersistentMap(Mapping):
+    """Immutable hash map whose updated copies share all untouched structure with the original.
+
+    A hash array mapped trie: ``set`` and ``remove`` return a new map after copying only
+    the O(log32 n) nodes on the path to the entry, so every earlier version stays valid
+    and keeping one as a snapshot costs O(1).
+    """
+    __slots__ = ('_root', '_size')
+
+    def __init__(self, root=None, size=0):
+        self._root = root
+        self._size = size
+
+    @staticmethod
+    def _hash(key):
+        return hash(key) & 0xFFFFFFFFFFFFFFFF
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (key for key, _ in self.items())
+
+    def get(self, key, default=None):
+        hashed, node, shift = self._hash(key), self._root, 0
+        while node is not None:
+            if isinstance(node, _Collision):
+                return next((value for entry_key, value in node.entries if entry_key == key), default)
+            bit = 1 << ((hashed >> shift) & 31)
+            if not node.bitmap & bit:
+                return default
+            slot = node.slots[(node.bitmap & (bit - 1)).bit_count()]
+            if isinstance(slot, tuple):
+                return slot[1] if slot[0] == key else default
+            node, shift = slot, shift + 5
+        return default
+
+    def items(self):
+        nodes = [] if self._root is None else [self._root]
+        while nodes:
+            node = nodes.pop()
+            for slot in node.entries if isinstance(node, _Collision) else node.slots:
+                if isinstance(slot, tuple):
+                    yield slot
+                else:
+                    nodes.append(slot)
+
+    def set(self, key, value):
+        root, added = self._set(self._root or _TrieNode(0, ()), key, value, self._hash(key), 0)
+        return PersistentMap(root, self._size + added)
+
+    @classmethod
+    def _set(cls, node, key, value, hashed, shift):
+        """``(copy of node with key set, 1 if the key is new else 0)``."""
+        if isinstance(node, _Collision):
+            entries = tuple(entry for entry in node.entries if entry[0] != key)
+            return _Collision(entries + ((key, value),)), int(len(entries) == len(node.entries))
+        bit = 1 << ((hashed >> shift) & 31)
+        index = (node.bitmap & (bit - 1)).bit_count()
+        slots = node.slots
+        if not node.bitmap & bit:
+            return _TrieNode(node.bitmap | bit, slots[:index] + ((key, value),) + slots[index:]), 1
+        slot = slots[index]
+        if not isinstance(slot, tuple):
+            child, added = cls._set(slot, key, value, hashed, shift + 5)
+        elif slot[0] == key:
+            child, added = (key, value), 0
+        else:
+            child, added = cls._pair(slot, cls._hash(slot[0]), (key, value), hashed, shift + 5), 1
+        return _TrieNode(node.bitmap, slots[:index] + (child,) + slots[index + 1:]), added
+
+    @classmethod
+    def _pair(cls, first, first_hash, second, second_hash, shift):
+        """A subtree holding two entries whose hashes agree below ``shift``."""
+        if shift >= 64:
+            return _Collision((first, second))
+        first_bit = 1 << ((first_hash >> shift) & 31)
+        second_bit = 1 << ((second_hash >> shift) & 31)
+        if first_bit == second_bit:
+            return _TrieNode(first_bit, (cls._pair(first, first_hash, second, second_hash, shift + 5),))
+        return _TrieNode(first_bit | second_bit, (first, second) if first_bit < second_bit else (second, first))
+
+    def remove(self, key):
+        if self._root is None:
+            return self
+        root, removed = self._remove(self._root, key, self._hash(key), 0)
+        return PersistentMap(root, self._size - 1) if removed else self
+
+    @classmethod
+    def _remove(cls, node, key, hashed, shift):
+        """``(copy of node without key, whether it was there)``.
+
+        Below the root, a subtree left with a single entry is returned as that bare entry
+        so the parent stores it inline, keeping paths as short as a fresh insert would.
+        """
+        if isinstance(node, _Collision):
+            entries = tuple(entry for entry in node.entries if entry[0] != key)
+            if len(entries) == len(node.entries):
+                return node, False
+            return (entries[0] if len(entries) == 1 else _Collision(entries)), True
+        bit = 1 << ((hashed >> shift) & 31)
+        if not node.bitmap & bit:
+            return node, False
+        index = (node.bitmap & (bit - 1)).bit_count()
+        slot = node.slots[index]
+        if isinstance(slot, tuple):
+            if slot[0] != key:
+                return node, False
+            slots, bitmap = node.slots[:index] + node.slots[index + 1:], node.bitmap & ~bit
+        else:
+            child, removed = cls._remove(slot, key, hashed, shift + 5)
+            if not removed:
+                return node, False
+            slots, bitmap = node.slots[:index] + (child,) + node.slots[index + 1:], node.bitmap
+        if not slots:
+            return None, True
+        if shift > 0 and len(slots) == 1 and isinstance(slots[0], tuple):
+            return slots[0], True
+        return _TrieNode(bitmap, slots), True
+
+
+class Transaction:
+    """Edits grouped by ``EventService.transaction`` into one atomic, undoable change.
+
+    ``changes`` maps ``(collection, ID)`` to ``(record before, record now)``, with None
+    for a missing record. It is a PersistentMap, so a savepoint is just the map at that
+    moment and taking one costs O(1).
+    """
+    def __init__(self):
+        self.changes = PersistentMap()
+
+    def record(self, collection, key, old, new):
+        first = self.changes.get((collection, key))
+        self.changes = self.changes.set((collection, key), (old if first is None else first[0], new))
+
+    def savepoint(self):
+        return self.changes
+
+
+class ChangeEvent:
+    """One committed change to a record, as published on a ChangeFeed."""
+    __slots__ = ('sequence', 'transaction', 'committed', 'collection', 'key', 'before', 'after')
+
+    def __init__(self, sequence, transaction, committed, collection, key, before, after):
+        self.sequence = sequence
+        self.transaction = transaction  # Shared by the changes committed together
+        self.committed = committed
+        self.collection = collection
+        self.key = key
+        self.before = before  # None for an insert
+        self.after = after  # None for a delete
+
+    @property
+    def operation(self):
+        if self.before is None:
+            return 'insert'
+        return 'delete' if self.after is None else 'update'
 
+    def to_json(self):
+        return {'seq': self.sequence, 'tx': self.transaction, 'time': self.committed.isoformat(timespec='milliseconds'),
+                'collection': self.collection, 'id': self.key, 'op': self.operation,
+                'record': None if self.after is None else export_row(self.after)}
 
-class Client:
-    """Represents a client who organizes events."""
-    def __init__(self, clientID, name, address, contactDetails, budget):
-        self.clientID = clientID
-        self.name = name
-        self.address = address
-        self.contactDetails = contactDetails
-        self.budget = budget
 
-    def get_details(self):
-        return f"Name: {self.name}, Address: {self.address}, Contact: {self.contactDetails}, Budget: ${self.budget}"
-class Guest:
-    """Represents a guest attending an event."""
-    def __init__(self, guestID, name, address, contactDetails):
-        self.guestID = guestID
-        self.name = name
-        self.address = address
-        self.contactDetails = contactDetails
+class ChangeFeed:
+    """In-process stream of committed changes, mirrored to a tailable JSON-lines file.
 
-    def get_details(self):
-        return f"Name: {self.name}, Address: {self.address}, Contact: {self.contactDetails}"
-class Supplier:
-    """Represents a supplier providing services for an event."""
-    def __init__(self, supplierID, name, service, contactDetails):
-        self.supplierID = supplierID
-        self.name = name
-        self.service = service
-        self.contactDetails = contactDetails
+    ``publish`` numbers the changes of one commit and passes each ChangeEvent to every
+    subscriber in order. Subscribers run in the committing thread while it holds its
+    locks, so they must be quick. A background thread appends the events to ``path``
+    like PersistenceWorker, ``delay`` seconds after the first so bursts share one write,
+    flushed but not fsynced (the WAL is what makes the data durable). Other processes
+    follow the file with ``follow_changes`` or ``tail -F``; it is rotated to
+    ``path + '.1'`` past ``max_bytes``. If writing a batch fails, its lines are skipped
+    (followers see a gap in ``seq``) and the error is raised by the next ``flush``.
+    """
+    def __init__(self, path='changes.jsonl', max_bytes=64 << 20, delay=0.05):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.delay = delay
+        self.subscribers = []
+        self.sequence, self.transaction = self._last_numbers()
+        self._publish_lock = threading.Lock()
+        self._pending = []
+        self._lock = threading.Condition()
+        self._writing = False
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
 
-    def get_details(self):
-        return f"Name: {self.name}, Service: {self.service}, Contact: {self.contactDetails}"
-class Venue:
-    """Represents a venue where events are held."""
-    def __init__(self, venueID, name, address, contact, minGuests, maxGuests):
-        self.venueID = venueID
-        self.name = name
-        self.address = address
-        self.contact = contact
-        self.minGuests = minGuests
-        self.maxGuests = maxGuests
+    def _last_numbers(self):
+        """Sequence and transaction numbers of the last change in the file, to continue from."""
+        for path in (self.path, self.path + '.1'):
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(max(0, os.fstat(f.fileno()).st_size - 65536))
+                    lines = f.read().splitlines()
+            except FileNotFoundError:
+                continue
+            for line in reversed(lines):
+                try:
+                    change = json.loads(line)
+                    return change['seq'], change['tx']
+                except (ValueError, KeyError, TypeError):
+                    continue  # A line cut short by a crash, or the tail of one
+        return 0, 0
 
-    def get_details(self):
-        return f"Name: {self.name}, Address: {self.address}, Contact: {self.contact}, Capacity: {self.minGuests}-{self.maxGuests} guests"
-class Caterer:
-    """Specific supplier type for catering services at events."""
-    def __init__(self, catererID, name, address, contactDetails, menu, minGuests, maxGuests):
-        self.catererID = catererID
-        self.name = name
-        self.address = address
-        self.contactDetails = contactDetails
-        self.menu = menu
-        self.minGuests = minGuests
-        self.maxGuests = maxGuests
+    def subscribe(self, callback):
+        """Call ``callback(change_event)`` for every change committed from now on."""
+        self.subscribers.append(callback)
+        return callback
 
-    def get_details(self):
-        return (f"Name: {self.name}, Address: {self.address}, Contact: {self.contactDetails}, "
-                f"Menu: {self.menu}, Min Guests: {self.minGuests}, Max Guests: {self.maxGuests}")
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
 
-class EventManagementApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Event Management System")
-        self.load_data()
-        self.create_management_buttons()
+    @timed
+    def publish(self, changes):
+        """Publish one commit's ``[(collection, ID, record before, record after), ...]``."""
+        committed = datetime.now()
+        with self._publish_lock:
+            self.transaction += 1
+            events = []
+            for collection, key, before, after in changes:
+                self.sequence += 1
+                events.append(ChangeEvent(self.sequence, self.transaction, committed, collection, key, before, after))
+            for event in events:
+                for callback in self.subscribers:
+                    callback(event)
+            with self._lock:
+                self._pending.extend(events)
+                self._lock.notify_all()
 
-    def load_data(self):
+    def _run(self):
+        f = None
         try:
-            with open('employees.pkl', 'rb') as f:
-                self.employees = pickle.load(f)
-        except FileNotFoundError:
-            self.employees = {}
+            while True:
+                with self._lock:
+                    while not self._pending and not self._closed:
+                        self._lock.wait()
+                    if not self._pending:
+                        return
+                time.sleep(self.delay)
+                with self._lock:
+                    events, self._pending = self._pending, []
+                    self._writing = True
+                error = None
+                try:
+                    if f is None:
+                        f = open(self.path, 'a', encoding='utf-8')
+                    f.write(''.join(json.dumps(event.to_json()) + '\n' for event in events))
+                    f.flush()
+                    if f.tell() >= self.max_bytes:
+                        f.close()
+                        f = None
+                        os.replace(self.path, self.path + '.1')
+                except Exception as e:
+                    error = e
+                    if f is not None:
+                        try:
+                            f.close()  # Reopened for the next batch
+                        except OSError:
+                            pass
+                        f = None
+                with self._lock:
+                    self._writing = False
+                    if error is not None:
+                        self._error = error
+                    self._lock.notify_all()
+        finally:
+            if f is not None:
+                f.close()
+
+    def flush(self):
+        """Block until every change published so far is in the file; raise the last write error, if any."""
+        with self._lock:
+            while self._pending or self._writing:
+                self._lock.wait()
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Write any remaining changes and stop the thread."""
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._thread.join()
+
 
+def _changes_from(path, position, inode=None):
+    """Yield ``(change, position after it)`` for the complete lines of ``path`` from byte ``position``.
+
+    Yields nothing if the file is missing or, when ``inode`` is given, has been replaced.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        if inode is not None and os.fstat(f.fileno()).st_ino != inode:
+            return
+        f.seek(position)
+        for line in f:
+            if not line.endswith(b'\n'):
+                return  # Still being written
+            position += len(line)
+            yield json.loads(line), position
+
+
+def follow_changes(path='changes.jsonl', after=0, follow=False, interval=0.5):
+    """Yield the changes (as written by ChangeFeed) in ``path`` with a sequence number above ``after``.
+
+    The rotated file is read first. With ``follow`` it keeps polling for new changes like
+    ``tail -F``, finishing the file being rotated before moving on to the new one. Only one
+    rotated file is kept, so a follower more than a whole file behind misses changes; the
+    gap shows in the ``seq`` numbers.
+    """
+    position, inode, first = 0, None, True
+    while True:
         try:
-            with open('events.pkl', 'rb') as f:
-                self.events = pickle.load(f)
+            status = os.stat(path)
         except FileNotFoundError:
-            self.events = {}
+            status = None
+        if first or (inode is not None and (status is None or status.st_ino != inode)):
+            for change, _ in _changes_from(path + '.1', position, inode):
+                if change['seq'] > after:
+                    after = change['seq']
+                    yield change
+            position, inode, first = 0, None, False
+        if status is not None:
+            inode = status.st_ino
+            for change, position in _changes_from(path, position, inode):
+                if change['seq'] > after:
+                    after = change['seq']
+                    yield change
+        if not follow:
+            return
+        time.sleep(interval)
+
+
+class AggregateView:
+    """Count and total per group over one collection, maintained from the change feed.
+
+    ``group`` and ``value`` give a record's group key (None to leave it out) and the
+    amount it adds. Each ChangeEvent subtracts the record before and adds the record
+    after, so reading the view never rescans the collection. Built with one scan on
+    first read.
+    """
+    def __init__(self, collection, group, value):
+        self.collection = collection
+        self.group = group
+        self.value = value
+        self.counts = {}
+        self.totals = {}
+        self.built = False
+
+    def build(self, records):
+        for record in records.values():
+            self._add(record, 1)
+        self.built = True
+
+    def apply(self, change):
+        if change.collection != self.collection or not self.built:
+            return
+        if change.before is not None:
+            self._add(change.before, -1)
+        if change.after is not None:
+            self._add(change.after, 1)
+
+    def _add(self, record, sign):
+        key = self.group(record)
+        if key is None:
+            return
+        count = self.counts.get(key, 0) + sign
+        if count:
+            self.counts[key] = count
+            self.totals[key] = self.totals.get(key, 0) + sign * self.value(record)
+        else:
+            del self.counts[key]
+            del self.totals[key]
+
+    def rows(self):
+        return [{'group': key, 'count': self.counts[key], 'total': round(self.totals[key], 2)}
+                for key in sorted(self.counts, key=str)]
+
+
+# Materialized views kept by every EventService: name -> (collection, group of a record, amount it adds).
+VIEW_DEFINITIONS = {
+    'guests_per_event': ('events', lambda event: event.eventID, lambda event: len(event.guests)),
+    'events_per_venue': ('events', lambda event: MatchingEngine.address_key(event.venueAddress), lambda event: 1),
+    'spend_per_client': ('events', lambda event: event.clientID, lambda event: invoice_total(event.invoice)),
+}
+
+
+class ServiceError(Exception):
+    """A request EventService refused; the message is meant to be shown to the user."""
+
+
+class NotFound(ServiceError):
+    pass
+
+
+class AlreadyExists(ServiceError):
+    pass
+
+
+class BookingConflict(ServiceError):
+    pass
+
+
+class StillReferenced(ServiceError):
+    pass
+
+
+class ReportingCycle(ServiceError):
+    pass
+
+
+def check_new_record(collection, record, schedule, hierarchy):
+    """Raise BookingConflict or ReportingCycle if adding ``record`` breaks a rule spanning records.
+
+    ``schedule`` and ``hierarchy`` index the records already stored; shared by
+    ``EventService.add`` and the bulk importers.
+    """
+    if collection == 'events':
+        conflicts = schedule.conflicts_for(record)
+        if conflicts:
+            raise BookingConflict("Event overlaps existing bookings: " + "; ".join(
+                f"{kind} {resource} is booked for event {other}" for (kind, resource), other in conflicts))
+    elif collection == 'employees':
+        key = record_id(record)
+        if hierarchy.would_cycle(key, record.managerID):
+            raise ReportingCycle(f"Employee {record.managerID} already reports to employee {key}.")
+
+
+class EventService:
+    """UI-free create/read/delete and query operations over the seven collections.
+
+    The Tk app and the HTTP server are both clients of this class. Each collection has
+    its own lock, so writes to different collections run in parallel, while
+    ``index_lock`` serialises use of the shared in-memory indexes. Invalid input raises
+    ValueError (or KeyError for a missing field); refused requests raise ServiceError.
+
+    Every add, delete or allocation, and every ``transaction`` block, is recorded as one
+    change set of before and after records. It is handed to the background writer as a
+    single batch and can be reverted with ``undo`` and reapplied with ``redo``.
 
+    Each committed change set, undo and redo is also published on ``feed`` (a ChangeFeed
+    writing ``changes.jsonl``), which keeps the materialized ``views`` up to date.
+    """
+    UNDO_LIMIT = 100  # Change sets kept for undo
+
+    def __init__(self, collections):
+        self.collections = collections
+        self.locks = {name: threading.RLock() for name in collections}
+        self.index_lock = threading.RLock()
+        self.repository = getattr(collections['events'], 'repository', None)
+        self.writer = PersistenceWorker(collections, WriteAheadLog() if self.repository is None else None)
+        self.matcher = MatchingEngine(collections['venues'], collections['caterers'], collections['events'])
+        self.schedule = ScheduleIndex(collections['events'])
+        self.search_index = SearchIndex(collections)
+        self.references = ReferenceIndex(collections)
+        self.analytics = AnalyticsEngine(collections)
+        self.hierarchy = HierarchyIndex(collections['employees'])
+        self.allocator = SupplierAllocator(collections['suppliers'], self.matcher)
+        self.renders = RenderCache(collections['guests'])
+        self.calendar = CalendarIndex(collections['events'])
+        self.indexes = [self.matcher, self.schedule, self.search_index, self.references, self.analytics,
+                        self.hierarchy, self.allocator, self.renders, self.calendar]
+        self._sorted_ids = {}
+        self.versions = dict.fromkeys(collections, 0)  # Bumped on every change, for views to spot stale data
+        self._local = threading.local()  # ``transaction``: the Transaction open in this thread, if any
+        self._undo = []
+        self._redo = []
+        self.feed = ChangeFeed()
+        self.views = {name: AggregateView(*definition) for name, definition in VIEW_DEFINITIONS.items()}
+        for view in self.views.values():
+            self.feed.subscribe(view.apply)
+
+    @staticmethod
+    def label(collection):
+        return RECORD_CLASSES[collection].__name__
+
+    @timed
+    def add(self, collection, row):
+        """Validate ``row`` (attribute name -> value) with the collection's build_* rules and store it."""
+        record = BUILDERS[collection](row)
+        key = record_id(record)
+        records = self.collections[collection]
+        with self.locks[collection], self._recording():
+            if key in records:
+                raise AlreadyExists(f"{self.label(collection)} with ID already exists.")
+            with self.index_lock:
+                check_new_record(collection, record, self.schedule, self.hierarchy)
+            records[key] = record
+            self.record_changed(collection, key, None, record)
+        return record
+
+    @timed
+    def get(self, collection, key):
         try:
-            with open('clients.pkl', 'rb') as f:
-                self.clients = pickle.load(f)
-        except FileNotFoundError:
-            self.clients = {}
+            return self.collections[collection][key]
+        except KeyError:
+            raise NotFound(f"{self.label(collection)} not found.") from None
+
+    @timed
+    def details(self, collection, key, page=0):
+        """``(text, page count)`` for one page of a record's details, rendered once until the record changes."""
+        with self.index_lock:
+            record = self.get(collection, key)
+            return self.renders.render(collection, record, page), self.renders.page_count(collection, record)
+
+    @timed
+    def delete(self, collection, key, policy=None):
+        """Delete a record and resolve the records referring to it.
+
+        ``policy`` ('restrict', 'nullify' or 'cascade') overrides DELETE_POLICIES for the
+        record's direct referrers. The work is proportional to the number of references,
+        and nothing changes if any part of the delete is refused.
+        """
+        if policy is not None and policy not in POLICIES:
+            raise ValueError(f"unknown delete policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        with ExitStack() as stack:
+            # Referrers live in other collections, so take every lock in a fixed order.
+            for name in COLLECTIONS:
+                stack.enter_context(self.locks[name])
+            stack.enter_context(self._recording())
+            if key not in self.collections[collection]:
+                raise NotFound(f"{self.label(collection)} not found.")
+            deletes, updates = {}, {}
+            with self.index_lock:
+                self._plan_delete(collection, key, policy, deletes, updates)
+            for (name, record_key), record in updates.items():
+                if (name, record_key) not in deletes:
+                    old = self.collections[name][record_key]
+                    self.collections[name][record_key] = record
+                    self.record_changed(name, record_key, old, record)
+            # Referrers go before what they refer to, so a cascaded reporting line is removed
+            # from the bottom up and the hierarchy never relinks a subtree that is going too.
+            for name, record_key in reversed(deletes):
+                removed = self.collections[name].pop(record_key)
+                self.record_changed(name, record_key, removed, None)
+        return deletes[(collection, key)]
+
+    def _plan_delete(self, collection, key, policy, deletes, updates):
+        """Collect the deletes and the updated copies of referring records needed to remove a record.
+
+        Cascades are followed with an explicit stack, so a long chain of referrers (a deep
+        reporting line, say) cannot exhaust the recursion limit.
+        """
+        deletes[(collection, key)] = self.collections[collection][key]
+        pending = [(collection, key, policy)]
+        while pending:
+            collection, key, policy = pending.pop()
+            policy = policy or DELETE_POLICIES.get(collection, 'restrict')
+            for source, source_key, attribute in self.references.referring(collection, key):
+                if (source, source_key) in deletes:
+                    continue
+                if policy == 'restrict':
+                    raise StillReferenced(f"{self.label(collection)} is still referenced by "
+                                          f"{self.label(source).lower()} {source_key}.")
+                if policy == 'cascade':
+                    deletes[(source, source_key)] = self.collections[source][source_key]
+                    pending.append((source, source_key, None))
+                    continue
+                record = updates.get((source, source_key))
+                if record is None:
+                    record = updates[(source, source_key)] = copy.copy(self.collections[source][source_key])
+                value = getattr(record, attribute)
+                if isinstance(value, GuestList):
+                    setattr(record, attribute, value.without(key))
+                else:
+                    setattr(record, attribute, None)
+
+    def record_changed(self, collection, key, old, new):
+        """Update the in-memory indexes for one change and add it to the open transaction."""
+        self._update_indexes(collection, key, old, new)
+        transaction = getattr(self._local, 'transaction', None)
+        if transaction is not None:
+            transaction.record(collection, key, old, new)
+        else:
+            self.writer.mark_dirty(collection, key, new)
+            self.feed.publish([(collection, key, old, new)])
+
+    def _update_indexes(self, collection, key, old, new):
+        with self.index_lock:
+            self._sorted_ids.pop(collection, None)
+            self.versions[collection] += 1
+            for index in self.indexes:
+                index.record_changed(collection, key, old, new)
+
+    def _set_record(self, collection, key, current, target):
+        """Replace ``current`` with ``target`` (either may be None) in memory, without recording the change."""
+        if target is None:
+            self.collections[collection].pop(key, None)
+        else:
+            self.collections[collection][key] = target
+        self._update_indexes(collection, key, current, target)
+
+    @contextmanager
+    def transaction(self):
+        """Group edits into one atomic change that a single ``undo`` reverts::
+
+            with service.transaction():
+                service.add('clients', client_row)
+                service.add('events', event_row)
+
+        Every collection lock is held for the block, so other writers wait. An exception
+        inside it restores every record the block changed. Otherwise the changes reach the
+        background writer as one batch that is flushed before the block returns, which is a
+        single WAL group commit. Nested blocks join the outer one.
+        """
+        with ExitStack() as stack:
+            for name in COLLECTIONS:
+                stack.enter_context(self.locks[name])
+            outermost = getattr(self._local, 'transaction', None) is None
+            yield stack.enter_context(self._recording())
+        if outermost:
+            self.writer.flush()
 
+    @contextmanager
+    def _recording(self):
+        """Collect the block's changes in this thread's open Transaction, or in a new one that is
+        committed when the block ends and reverted if it raises.
+
+        Reverting only has to restore memory: the writer is handed the changes at commit,
+        and log compaction copies only what the logs already hold (LazyRecords.compact).
+        """
+        transaction = getattr(self._local, 'transaction', None)
+        if transaction is not None:
+            yield transaction
+            return
+        transaction = self._local.transaction = Transaction()
         try:
-            with open('guests.pkl', 'rb') as f:
-                self.guests = pickle.load(f)
-        except FileNotFoundError:
-            self.guests = {}
+            yield transaction
+        except BaseException:
+            self._local.transaction = None
+            for (collection, key), (before, after) in transaction.changes.items():
+                self._set_record(collection, key, after, before)
+            raise
+        self._local.transaction = None
+        changes = transaction.changes
+        for item, (before, after) in list(changes.items()):
+            if before is after:
+                changes = changes.remove(item)  # Added and deleted again
+        if changes:
+            self.writer.mark_dirty_many((collection, key, after) for (collection, key), (_, after) in changes.items())
+            # Published while the writer still holds its locks, so views see changes in commit order
+            self.feed.publish([(collection, key, before, after)
+                               for (collection, key), (before, after) in changes.items()])
+            with self.index_lock:
+                self._undo.append(changes)
+                del self._undo[:-self.UNDO_LIMIT]
+                self._redo.clear()
+
+    def rollback_to(self, savepoint):
+        """Revert what the open transaction changed since ``savepoint`` (from ``Transaction.savepoint``)."""
+        transaction = self._local.transaction
+        for item, (before, after) in transaction.changes.items():
+            target = savepoint.get(item, (before, before))[1]
+            if target is not after:
+                self._set_record(*item, after, target)
+        transaction.changes = savepoint
+
+    @timed
+    def undo(self):
+        """Revert the latest add, delete, allocation or transaction; returns False if there is none."""
+        return self._step(self._undo, self._redo, undo=True)
+
+    @timed
+    def redo(self):
+        """Reapply the latest undone change; returns False if there is none."""
+        return self._step(self._redo, self._undo, undo=False)
+
+    def _step(self, source, target, undo):
+        if getattr(self._local, 'transaction', None) is not None:
+            raise ServiceError("Cannot undo or redo inside a transaction.")
+        with ExitStack() as stack:
+            for name in COLLECTIONS:
+                stack.enter_context(self.locks[name])
+            with self.index_lock:
+                if not source:
+                    return False
+                changes = source.pop()
+                target.append(changes)
+            published = []
+            for (collection, key), (before, after) in changes.items():
+                current, wanted = (after, before) if undo else (before, after)
+                self._set_record(collection, key, current, wanted)
+                published.append((collection, key, current, wanted))
+            self.writer.mark_dirty_many((collection, key, wanted) for collection, key, _, wanted in published)
+            self.feed.publish(published)
+        return True
+
+    def _ids_in_order(self, collection):
+        with self.index_lock:
+            ids = self._sorted_ids.get(collection)
+            if ids is None:
+                ids = self._sorted_ids[collection] = sorted(self.collections[collection])
+        return ids
+
+    def list(self, collection, offset=0, limit=100):
+        """Records of one collection in ID order, ``limit`` at a time from ``offset``."""
+        records = self.collections[collection]
+        return [records[key] for key in self._ids_in_order(collection)[offset:offset + limit] if key in records]
+
+    @timed
+    def sorted_ids(self, collection, column=None, descending=False, chunk=1000):
+        """IDs of a collection ordered by ``column`` (default the ID).
+
+        Sorting by another column reads the records ``chunk`` at a time with ``get_many``,
+        which does not keep them in memory, so the collection is never loaded whole.
+        """
+        ids = self._ids_in_order(collection)
+        if column is None:
+            return ids[::-1] if descending else list(ids)
+        records = self.collections[collection]
+        values = []
+        for start in range(0, len(ids), chunk):
+            values.extend((str(getattr(record, column)), key)
+                          for key, record in records.get_many(ids[start:start + chunk]).items())
+        values.sort(reverse=descending)
+        return [key for _, key in values]
+
+    @timed
+    def search(self, text, collections=None, limit=100):
+        with self.index_lock:
+            return self.search_index.search(text, collections, limit)
+
+    @timed
+    def candidates(self, guest_count, day):
+        with self.index_lock:
+            return self.matcher.candidates(guest_count, day)
+
+    @timed
+    def events_between(self, start, end):
+        """Events starting at or after ``start`` and before ``end`` (datetimes), in start order."""
+        with self.index_lock:
+            keys = self.calendar.between(start, end)
+        events = self.collections['events']
+        return [event for event in map(events.get, keys) if event is not None]
+
+    def upcoming(self, after=None, chunk=100):
+        """Yield the events starting from ``after`` (default now) on, in start order.
+
+        The index is read ``chunk`` events at a time, resuming after the last one yielded,
+        so events added or deleted while iterating are picked up or skipped.
+        """
+        moment, last_key = after or datetime.now(), None
+        events = self.collections['events']
+        while True:
+            with self.index_lock:
+                page = self.calendar.after(moment, chunk, last_key)
+            for moment, last_key in page:
+                event = events.get(last_key)
+                if event is not None:
+                    yield event
+            if len(page) < chunk:
+                return
+
+    @timed
+    def conflicts(self):
+        with self.index_lock:
+            return self.schedule.scan_conflicts()
 
+    @timed
+    def report(self):
+        """Budget, revenue, supplier utilization and payroll aggregates (see AnalyticsEngine)."""
+        if not self.analytics.built:
+            self.writer.flush()  # A parallel build reads the shard logs, so pending writes must be in them
+        with self.index_lock:
+            return self.analytics.report()
+
+    @timed
+    def allocate_suppliers(self, start=None, end=None, apply=False):
+        """Plan suppliers for the empty slots of the events dated ``start`` to ``end`` (default: from today on).
+
+        Returns ``(assignments, unfilled)`` as from SupplierAllocator.plan; with ``apply`` the
+        assignments are also stored in the events.
+        """
+        start = start or datetime.now().date()
+        with ExitStack() as stack:
+            for name in ('events', 'suppliers', 'caterers'):  # COLLECTIONS order, as in delete
+                stack.enter_context(self.locks[name])
+            stack.enter_context(self._recording())
+            events = self.collections['events']
+            batch = [event for event in events.values()
+                     if start <= event.date.date() and (end is None or event.date.date() <= end)
+                     and any(getattr(event, slot) is None for slot in SUPPLIER_SLOTS)]
+            with self.index_lock:
+                assigned, unfilled = self.allocator.plan(batch)
+            if apply:
+                for key, slots in assigned.items():
+                    old = events[key]
+                    record = copy.copy(old)
+                    for slot, supplier_id in slots.items():
+                        setattr(record, slot, supplier_id)
+                    events[key] = record
+                    self.record_changed('events', key, old, record)
+        return assigned, unfilled
+
+    @timed
+    def org_chart(self, employee_id):
+        """Depth, chain of command, direct reports, headcount and salary roll-up of one employee."""
+        self.get('employees', employee_id)
+        with self.index_lock:
+            return self.hierarchy.summary(employee_id)
+
+    def team(self, manager_id):
+        self.get('employees', manager_id)
+        with self.index_lock:
+            return self.hierarchy.team(manager_id)
+
+    @timed
+    def view(self, name):
+        """Rows (group, count, total) of the materialized view ``name`` from VIEW_DEFINITIONS."""
+        view = self.views.get(name)
+        if view is None:
+            raise NotFound(f"No view named {name}.")
+        # Changes to the collection are published before its lock is released, so none is half-applied here
+        with self.locks[view.collection]:
+            if not view.built:
+                view.build(self.collections[view.collection])
+            return view.rows()
+
+    def save_data(self):
+        """Write all pending changes, then compact every collection's log down to its live records."""
+        self.writer.flush()
+        for name, records in self.collections.items():
+            with self.locks[name]:
+                records.compact()
+
+    def close(self):
+        self.writer.close()
+        self.feed.close()
+
+
+class ServiceHTTPServer:
+    """Small asyncio HTTP/1.1 server exposing an EventService as JSON.
+
+    Routes::
+
+        GET    /<collection>?offset=0&limit=100
+        POST   /<collection>              body: a JSON row, as accepted by import_records
+        GET    /<collection>/<id>
+        GET    /<collection>/<id>/details?page=0
+        DELETE /<collection>/<id>?policy=restrict|nullify|cascade
+        GET    /search?q=<text>
+        GET    /candidates?guests=<n>&date=<YYYY-MM-DD>
+        GET    /conflicts
+        GET    /calendar?start=<YYYY-MM-DD>&end=<YYYY-MM-DD>    (both days included)
+        GET    /upcoming?limit=20
+        GET    /analytics
+        GET    /hierarchy/<employee id>
+        POST   /batch                     body: [{"op": "add", "collection": ..., "row": {...}} or
+                                          {"op": "delete", "collection": ..., "id": ..., "policy": ...}, ...]
+        POST   /undo, /redo
+        GET    /views/<name>              guests_per_event, events_per_venue or spend_per_client
+        GET    /changes?after=<seq>&limit=100    from the change feed's file
+        GET    /allocations?start=<YYYY-MM-DD>&end=<YYYY-MM-DD>    (POST to store the plan)
+
+    Connections are kept alive, and requests run on a thread pool so slow disk reads
+    never stall the event loop; the service's locks keep concurrent writers consistent.
+    """
+    REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 409: 'Conflict', 500: 'Internal Server Error'}
+
+    def __init__(self, service, host='127.0.0.1', port=8080, workers=16):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(workers)
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not supported on Windows; Ctrl+C still raises KeyboardInterrupt.
+        async with server:
+            await stop.wait()
+        self.executor.shutdown()
+
+    async def handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
         try:
-            with open('suppliers.pkl', 'rb') as f:
-                self.suppliers = pickle.load(f)
-        except FileNotFoundError:
-            self.suppliers = {}
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get('content-length', '0')
+                if not length.isdigit():
+                    # The rest of the stream can't be framed, so answer and close.
+                    await self.respond(writer, 400, {'error': "Invalid Content-Length."}, keep_alive=False)
+                    break
+                body = await reader.readexactly(int(length))
+                try:
+                    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    status, payload = 400, {'error': "Malformed request line."}
+                else:
+                    status, payload = await loop.run_in_executor(self.executor, self.dispatch, method, target, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {self.REASONS[status]}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+        await writer.drain()
 
+    @staticmethod
+    def json_body(body, expected, default):
+        """Decode a request body that must be a JSON value of type ``expected`` (``dict`` or ``list``)."""
+        value = json.loads(body) if body else default
+        if not isinstance(value, expected):
+            raise ValueError(f"expected a JSON {'object' if expected is dict else 'array'}")
+        return value
+
+    def dispatch(self, method, target, body):
+        """Run one request against the service; returns ``(status, JSON payload)``."""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        service = self.service
         try:
-            with open('venues.pkl', 'rb') as f:
-                self.venues = pickle.load(f)
-        except FileNotFoundError:
-            self.venues = {}
+            if method == 'GET' and parts == ['search']:
+                return 200, [{'collection': collection, 'id': key}
+                             for collection, key in service.search(query.get('q', ''), limit=int(query.get('limit', 100)))]
+            if method == 'GET' and parts == ['candidates']:
+                day = datetime.strptime(query['date'], '%Y-%m-%d').date()
+                venues, caterers = service.candidates(int(query['guests']), day)
+                return 200, {'venues': venues, 'caterers': caterers}
+            if method == 'POST' and parts == ['batch']:
+                results = []
+                with service.transaction():  # All or nothing
+                    for operation in self.json_body(body, list, []):
+                        if not isinstance(operation, dict) or not isinstance(operation.get('row', {}), dict):
+                            raise ValueError("each operation must be a JSON object with an object 'row'")
+                        if operation['collection'] not in COLLECTIONS:
+                            raise ValueError(f"unknown collection {operation['collection']!r}")
+                        if operation['op'] == 'add':
+                            results.append(export_row(service.add(operation['collection'], operation['row'])))
+                        elif operation['op'] == 'delete':
+                            service.delete(operation['collection'], int(operation['id']), operation.get('policy'))
+                            results.append({'deleted': int(operation['id'])})
+                        else:
+                            raise ValueError(f"unknown operation {operation['op']!r}")
+                return 200, results
+            if method == 'POST' and parts == ['undo']:
+                return 200, {'undone': service.undo()}
+            if method == 'POST' and parts == ['redo']:
+                return 200, {'redone': service.redo()}
+            if method == 'GET' and len(parts) == 2 and parts[0] == 'views':
+                return 200, service.view(parts[1])
+            if method == 'GET' and parts == ['changes']:
+                service.feed.flush()
+                changes = follow_changes(service.feed.path, int(query.get('after', 0)))
+                return 200, list(itertools.islice(changes, int(query.get('limit', 100))))
+            if method == 'GET' and parts == ['calendar']:
+                start = datetime.strptime(query['start'], '%Y-%m-%d')
+                end = datetime.strptime(query['end'], '%Y-%m-%d') + timedelta(days=1)
+                return 200, [export_row(event) for event in service.events_between(start, end)]
+            if method == 'GET' and parts == ['upcoming']:
+                events = itertools.islice(service.upcoming(), int(query.get('limit', 20)))
+                return 200, [export_row(event) for event in events]
+            if method == 'GET' and parts == ['conflicts']:
+                return 200, [{'resource': list(resource), 'events': [first, second]}
+                             for resource, first, second in service.conflicts()]
+            if method == 'GET' and parts == ['analytics']:
+                return 200, service.report()
+            if method in ('GET', 'POST') and parts == ['allocations']:
+                start, end = (datetime.strptime(query[name], '%Y-%m-%d').date() if name in query else None
+                              for name in ('start', 'end'))
+                assigned, unfilled = service.allocate_suppliers(start, end, apply=method == 'POST')
+                return 200, {'assigned': [dict(slots, eventID=key) for key, slots in assigned.items()],
+                             'unfilled': [{'eventID': key, 'slot': slot} for key, slot in unfilled]}
+            if method == 'GET' and len(parts) == 2 and parts[0] == 'hierarchy':
+                summary = service.org_chart(int(parts[1]))
+                return 200, dict(summary, team=service.team(summary['employeeID']))
+            if method == 'GET' and len(parts) == 3 and parts[0] in COLLECTIONS and parts[2] == 'details':
+                page = int(query.get('page', 0))
+                text, pages = service.details(parts[0], int(parts[1]), page)
+                return 200, {'text': text, 'page': page, 'pages': pages}
+            if not parts or parts[0] not in COLLECTIONS or len(parts) > 2:
+                return 404, {'error': "Unknown route."}
+            collection = parts[0]
+            if len(parts) == 1 and method == 'GET':
+                records = service.list(collection, int(query.get('offset', 0)), int(query.get('limit', 100)))
+                return 200, [export_row(record) for record in records]
+            if len(parts) == 1 and method == 'POST':
+                return 201, export_row(service.add(collection, self.json_body(body, dict, {})))
+            if len(parts) == 2 and method == 'GET':
+                return 200, export_row(service.get(collection, int(parts[1])))
+            if len(parts) == 2 and method == 'DELETE':
+                service.delete(collection, int(parts[1]), query.get('policy'))
+                return 200, {'deleted': int(parts[1])}
+            return 405, {'error': "Method not allowed."}
+        except NotFound as e:
+            return 404, {'error': str(e)}
+        except ServiceError as e:
+            return 409, {'error': str(e)}
+        except KeyError as e:
+            return 400, {'error': f"Missing field: {e}"}
+        except (TypeError, ValueError) as e:
+            return 400, {'error': f"Invalid input: {e}"}
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+
+class RecordListView:
+    """Scrollable, sortable table of one collection that only materialises the visible rows.
+
+    The Treeview holds at most ``VISIBLE_ROWS`` items; the scrollbar and mouse wheel
+    move a window over the collection's ordered IDs and only those records are fetched.
+    The order is rebuilt when the service's version of the collection changes.
+    """
+    VISIBLE_ROWS = 25
+
+    def __init__(self, parent, title, service, collection):
+        self.service = service
+        self.collection = collection
+        self.records = service.collections[collection]
+        self.columns = RECORD_CLASSES[collection].__slots__
+        self.order = None
+        self.version = None
+        self.sort_column = self.columns[0]
+        self.descending = False
+        self.offset = 0
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.tree = ttk.Treeview(self.window, columns=self.columns, show='headings', height=self.VISIBLE_ROWS)
+        for column in self.columns:
+            self.tree.heading(column, text=column, command=lambda column=column: self.sort_by(column))
+            self.tree.column(column, width=110)
+        self.scrollbar = ttk.Scrollbar(self.window, orient='vertical', command=self.on_scroll)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.status = tk.Label(self.window, text="")
+        self.status.grid(row=1, column=0, columnspan=2)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self.on_wheel)
+        self.refresh()
+
+    def keys(self):
+        version = self.service.versions[self.collection]
+        if self.order is None or version != self.version:
+            self.version = version  # Taken first, so a change made while sorting triggers another sort
+            column = None if self.sort_column == self.columns[0] else self.sort_column
+            self.order = self.service.sorted_ids(self.collection, column, self.descending)
+        return self.order
+
+    def sort_by(self, column):
+        self.descending = not self.descending if column == self.sort_column else False
+        self.sort_column = column
+        self.order = None
+        self.offset = 0
+        self.refresh()
+
+    def scroll_to(self, offset):
+        self.offset = max(0, min(int(offset), len(self.keys()) - self.VISIBLE_ROWS))
+        self.refresh()
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(float(amount) * len(self.keys()))
+        elif unit == 'pages':
+            self.scroll_to(self.offset + int(amount) * self.VISIBLE_ROWS)
+        else:
+            self.scroll_to(self.offset + int(amount))
 
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
+        return "break"
+
+    @staticmethod
+    def cell(value):
+        if isinstance(value, datetime):
+            return value.date().isoformat()
+        if isinstance(value, GuestList):
+            return f"{len(value)} guests"
+        return value
+
+    @timed
+    def refresh(self):
+        keys = self.keys()
+        visible = keys[self.offset:self.offset + self.VISIBLE_ROWS]
+        self.tree.delete(*self.tree.get_children())
+        records = self.records.get_many(visible)
+        for key in visible:
+            record = records.get(key)
+            if record is not None:  # Deleted since the order was taken
+                self.tree.insert('', 'end', values=[self.cell(getattr(record, column)) for column in self.columns])
+        total = len(keys)
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(visible)) / total)
+            self.status.config(text=f"Rows {self.offset + 1}-{self.offset + len(visible)} of {total}")
+        else:
+            self.scrollbar.set(0, 1)
+            self.status.config(text="No records")
+
+
+class DetailView:
+    """Window paging through a record's details, for events whose guest lists run to many pages."""
+    def __init__(self, parent, title, service, collection, key):
+        self.service = service
+        self.collection = collection
+        self.key = key
+        self.page = 0
+        self.pages = 1
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.text = tk.Text(self.window, width=100, height=30, wrap='word')
+        self.text.grid(row=0, column=0, columnspan=3)
+        tk.Button(self.window, text="Previous", command=lambda: self.show(self.page - 1)).grid(row=1, column=0)
+        self.status = tk.Label(self.window, text="")
+        self.status.grid(row=1, column=1)
+        tk.Button(self.window, text="Next", command=lambda: self.show(self.page + 1)).grid(row=1, column=2)
+        self.show(0)
+
+    def show(self, page):
+        if not 0 <= page < self.pages:
+            return
         try:
-            with open('caterers.pkl', 'rb') as f:
-                self.caterers = pickle.load(f)
-        except FileNotFoundError:
-            self.caterers = {}
+            text, self.pages = self.service.details(self.collection, self.key, page)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        except ValueError:
+            # The guest list shrank since the last page was shown.
+            page = 0
+            text, self.pages = self.service.details(self.collection, self.key, page)
+        self.page = page
+        self.text.config(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.insert('1.0', text)
+        self.text.config(state='disabled')
+        self.status.config(text=f"Page {page + 1} of {self.pages}")
 
-    def save_data(self):
-        with open('employees.pkl', 'wb') as f:
-            pickle.dump(self.employees, f)
 
-        with open('events.pkl', 'wb') as f:
-            pickle.dump(self.events, f)
+class CalendarView:
+    """Month or week grid of events, read from the calendar index one visible range at a time."""
+    EVENTS_PER_DAY = 4  # Listed in a month cell before "+N more"
+    DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+    def __init__(self, parent, service, display_event):
+        self.service = service
+        self.display_event = display_event
+        self.mode = 'month'
+        self.day = datetime.now().date()
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Calendar")
+        controls = tk.Frame(self.window)
+        controls.pack()
+        tk.Button(controls, text="<", command=lambda: self.move(-1)).pack(side='left')
+        self.heading = tk.Label(controls, text="", width=24)
+        self.heading.pack(side='left')
+        tk.Button(controls, text=">", command=lambda: self.move(1)).pack(side='left')
+        tk.Button(controls, text="Today", command=self.today).pack(side='left')
+        self.mode_button = tk.Button(controls, text="Week View", command=self.toggle_mode)
+        self.mode_button.pack(side='left')
+        self.cells = tk.Frame(self.window)
+        self.cells.pack(fill='both', expand=True)
+        self.refresh()
+
+    def visible_range(self):
+        """The first day shown and the day after the last, whole weeks from Monday."""
+        if self.mode == 'week':
+            start = self.day - timedelta(days=self.day.weekday())
+            return start, start + timedelta(days=7)
+        first = self.day.replace(day=1)
+        following = (first + timedelta(days=31)).replace(day=1)
+        return first - timedelta(days=first.weekday()), following + timedelta(days=-following.weekday() % 7)
+
+    def move(self, step):
+        if self.mode == 'week':
+            self.day += timedelta(weeks=step)
+        elif step > 0:
+            self.day = (self.day.replace(day=1) + timedelta(days=31)).replace(day=1)
+        else:
+            self.day = (self.day.replace(day=1) - timedelta(days=1)).replace(day=1)
+        self.refresh()
+
+    def today(self):
+        self.day = datetime.now().date()
+        self.refresh()
 
-        with open('clients.pkl', 'wb') as f:
-            pickle.dump(self.clients, f)
+    def toggle_mode(self):
+        self.mode = 'week' if self.mode == 'month' else 'month'
+        self.mode_button.config(text="Month View" if self.mode == 'week' else "Week View")
+        self.refresh()
 
-        with open('guests.pkl', 'wb') as f:
-            pickle.dump(self.guests, f)
+    @timed
+    def refresh(self):
+        for widget in self.cells.winfo_children():
+            widget.destroy()
+        start, end = self.visible_range()
+        by_day = {}
+        for event in self.service.events_between(datetime.combine(start, datetime.min.time()),
+                                                 datetime.combine(end, datetime.min.time())):
+            by_day.setdefault(event.date.date(), []).append(event)
+        self.heading.config(text=self.day.strftime('%B %Y') if self.mode == 'month' else f"Week of {start}")
+        for column, name in enumerate(self.DAY_NAMES):
+            tk.Label(self.cells, text=name).grid(row=0, column=column)
+            self.cells.columnconfigure(column, weight=1, minsize=120)
+        day = start
+        while day < end:
+            cell = tk.Frame(self.cells, borderwidth=1, relief='solid')
+            cell.grid(row=1 + (day - start).days // 7, column=day.weekday(), sticky='nsew')
+            outside = self.mode == 'month' and day.month != self.day.month
+            tk.Label(cell, text=str(day.day), fg='grey' if outside else 'black').pack(anchor='w')
+            events = by_day.get(day, [])
+            shown = events if self.mode == 'week' else events[:self.EVENTS_PER_DAY]
+            for event in shown:
+                label = tk.Label(cell, text=f"{event.time} {event.type} ({event.eventID})", fg='blue', cursor='hand2')
+                label.pack(anchor='w')
+                label.bind("<Button-1>", lambda _, key=event.eventID: self.display_event(str(key)))
+            if len(events) > len(shown):
+                tk.Label(cell, text=f"+{len(events) - len(shown)} more").pack(anchor='w')
+            day += timedelta(days=1)
 
-        with open('suppliers.pkl', 'wb') as f:
-            pickle.dump(self.suppliers, f)
 
-        with open('venues.pkl', 'wb') as f:
-            pickle.dump(self.venues, f)
+class EventManagementApp:
+    def __init__(self, root, backend='log', shards=1):
+        self.root = root
+        self.root.title("Event Management System")
+        self.backend = backend
+        self.shards = shards
+        self.load_data()
+        self.create_management_buttons()
+        self.status = tk.Label(self.root, text="")
+        self.status.pack()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_persistence()
+
+    @timed
+    def load_data(self):
+        """Attach a lazily loaded view to each collection; records are read on first use."""
+        self.service = EventService(open_collections(self.backend, self.shards))
+        for name, records in self.service.collections.items():
+            setattr(self, name, records)
+
+    @timed
+    def save_data(self):
+        self.service.save_data()
 
-        with open('caterers.pkl', 'wb') as f:
-            pickle.dump(self.caterers, f)
+    def poll_persistence(self):
+        """Report background write results on the Tk thread."""
+        try:
+            while True:
+                error, count = self.service.writer.results.get_nowait()
+                if error is not None:
+                    self.status.config(text="Saving failed.")
+                    messagebox.showerror("Error", f"Could not save changes: {error}")
+                else:
+                    self.status.config(text=f"Saved {count} change(s).")
+        except Empty:
+            pass
+        self.root.after(100, self.poll_persistence)
 
+    def on_close(self):
+        self.service.close()
+        self.root.destroy()
 
     def create_management_buttons(self):
         tk.Button(self.root, text="Manage Employees", command=self.manage_employees).pack()
@@ -185,6 +4623,143 @@ class EventManagementApp:
         tk.Button(self.root, text="Manage Suppliers", command=self.manage_suppliers).pack()
         tk.Button(self.root, text="Manage Venue", command=self.manage_venues).pack()
         tk.Button(self.root, text="Manage Caterer", command=self.manage_caterers).pack()
+        tk.Button(self.root, text="Find Venues & Caterers", command=self.find_venues_and_caterers).pack()
+        tk.Button(self.root, text="Scan Schedule Conflicts", command=self.show_schedule_conflicts).pack()
+        tk.Button(self.root, text="Show Analytics", command=self.show_analytics).pack()
+        tk.Button(self.root, text="Allocate Suppliers", command=self.allocate_suppliers).pack()
+        tk.Button(self.root, text="Calendar",
+                  command=lambda: CalendarView(self.root, self.service, self.display_event)).pack()
+        tk.Button(self.root, text="Upcoming Events", command=self.show_upcoming).pack()
+        tk.Button(self.root, text="Show Live Views", command=self.show_views).pack()
+        tk.Button(self.root, text="Undo", command=self.undo).pack()
+        tk.Button(self.root, text="Redo", command=self.redo).pack()
+        self.root.bind_all("<Control-z>", lambda event: self.undo())
+        self.root.bind_all("<Control-y>", lambda event: self.redo())
+        search_entry = tk.Entry(self.root)
+        search_entry.pack()
+        search_entry.bind("<Return>", lambda event: self.show_search_results(search_entry.get()))
+        tk.Button(self.root, text="Search", command=lambda: self.show_search_results(search_entry.get())).pack()
+
+    def show_search_results(self, text):
+        results = self.service.search(text)
+        if not results:
+            messagebox.showinfo("Search", "No matching records.")
+            return
+        lines = [f"{collection[:-1].capitalize()} {key}: {getattr(self, collection)[key].get_details()}"
+                 for collection, key in results]
+        messagebox.showinfo("Search", "\n".join(lines))
+
+    def list_records(self, collection, title):
+        RecordListView(self.root, title, self.service, collection)
+
+    def show_schedule_conflicts(self):
+        conflicts = self.service.conflicts()
+        if not conflicts:
+            messagebox.showinfo("Schedule Conflicts", "No overlapping bookings.")
+            return
+        lines = [f"{kind} {resource}: events {first} and {second}" for (kind, resource), first, second in conflicts]
+        messagebox.showwarning("Schedule Conflicts", "\n".join(lines))
+
+    def show_analytics(self):
+        report = self.service.report()
+        lines = ["Spend vs budget:"]
+        lines += [f"  Client {row['clientID']}: ${row['spend']} of ${row['budget']} (${row['remaining']} left)"
+                  for row in report['clients']]
+        lines.append("Revenue by month:")
+        lines += [f"  {row['month']}: ${row['revenue']}" for row in report['revenue']]
+        lines.append("Supplier utilization:")
+        lines += [f"  {RECORD_CLASSES[row['collection']].__name__} {row['id']}: {row['events']} events "
+                  f"({row['utilization']:.0%})" for row in report['suppliers'][:20]]
+        lines.append("Payroll by department:")
+        lines += [f"  {row['department']}: {row['headcount']} staff, ${row['total']}" for row in report['payroll']]
+        messagebox.showinfo("Analytics", "\n".join(lines))
+
+    def show_views(self):
+        lines = ["Guests per event:"]
+        lines += [f"  Event {row['group']}: {row['total']} guests"
+                  for row in self.service.view('guests_per_event')[:20]]
+        lines.append("Events per venue:")
+        lines += [f"  {row['group']}: {row['count']} events" for row in self.service.view('events_per_venue')[:20]]
+        lines.append("Spend per client:")
+        lines += [f"  Client {row['group']}: ${row['total']} over {row['count']} events"
+                  for row in self.service.view('spend_per_client')[:20]]
+        messagebox.showinfo("Live Views", "\n".join(lines))
+
+    def undo(self):
+        if not self.service.undo():
+            messagebox.showinfo("Undo", "Nothing to undo.")
+
+    def redo(self):
+        if not self.service.redo():
+            messagebox.showinfo("Redo", "Nothing to redo.")
+
+    def show_upcoming(self):
+        events = list(itertools.islice(self.service.upcoming(), 20))
+        if not events:
+            messagebox.showinfo("Upcoming Events", "No upcoming events.")
+            return
+        lines = [f"{event.date.date()} {event.time}  Event {event.eventID}: {event.type}, {event.theme}, "
+                 f"{event.venueAddress}" for event in events]
+        messagebox.showinfo("Upcoming Events", "\n".join(lines))
+
+    def allocate_suppliers(self):
+        allocate_window = tk.Toplevel(self.root)
+        allocate_window.title("Allocate Suppliers")
+
+        labels = ["From Date (YYYY-MM-DD)", "To Date (YYYY-MM-DD)"]
+        entries = {}
+        for idx, label in enumerate(labels):
+            tk.Label(allocate_window, text=label + ":").grid(row=idx, column=0)
+            entry = tk.Entry(allocate_window)
+            entry.grid(row=idx, column=1)
+            entries[label] = entry
+
+        tk.Button(allocate_window, text="Preview", command=lambda: self.show_allocation(entries, False)).grid(
+            row=len(labels), column=0)
+        tk.Button(allocate_window, text="Assign", command=lambda: self.show_allocation(entries, True)).grid(
+            row=len(labels), column=1)
+
+    def show_allocation(self, entries, apply):
+        try:
+            start, end = (datetime.strptime(entries[label].get(), '%Y-%m-%d').date() if entries[label].get() else None
+                          for label in ("From Date (YYYY-MM-DD)", "To Date (YYYY-MM-DD)"))
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid input: {e}")
+            return
+        assigned, unfilled = self.service.allocate_suppliers(start, end, apply)
+        lines = [f"{'Assigned' if apply else 'Would assign'} {sum(map(len, assigned.values()))} slots "
+                 f"across {len(assigned)} events; {len(unfilled)} slots have no free supplier."]
+        lines += [f"Event {key}: " + ", ".join(f"{slot} {supplier_id}" for slot, supplier_id in slots.items())
+                  for key, slots in list(assigned.items())[:20]]
+        lines += [f"Event {key}: no {slot} available" for key, slot in unfilled[:20]]
+        messagebox.showinfo("Allocate Suppliers", "\n".join(lines))
+
+    def find_venues_and_caterers(self):
+        match_window = tk.Toplevel(self.root)
+        match_window.title("Find Venues & Caterers")
+
+        labels = ["Number of Guests", "Date (YYYY-MM-DD)"]
+        entries = {}
+        for idx, label in enumerate(labels):
+            tk.Label(match_window, text=label + ":").grid(row=idx, column=0)
+            entry = tk.Entry(match_window)
+            entry.grid(row=idx, column=1)
+            entries[label] = entry
+
+        tk.Button(match_window, text="Find", command=lambda: self.show_candidates(entries)).grid(
+            row=len(labels), column=0, columnspan=2)
+
+    def show_candidates(self, entries):
+        try:
+            guest_count = int(entries["Number of Guests"].get())
+            day = datetime.strptime(entries["Date (YYYY-MM-DD)"].get(), '%Y-%m-%d').date()
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid input: {e}")
+            return
+        venue_ids, caterer_ids = self.service.candidates(guest_count, day)
+        venues = '\n'.join(f"{venue_id}: {self.venues[venue_id].name}" for venue_id in venue_ids) or "None"
+        caterers = '\n'.join(f"{caterer_id}: {self.caterers[caterer_id].name}" for caterer_id in caterer_ids) or "None"
+        messagebox.showinfo("Available Venues & Caterers", f"Venues:\n{venues}\n\nCaterers:\n{caterers}")
 
     def manage_employees(self):
         employee_window = tk.Toplevel(self.root)
@@ -211,47 +4786,55 @@ class EventManagementApp:
         delete_button = tk.Button(employee_window, text="Delete Employee",
                                   command=lambda: self.delete_employee(entries["Employee ID"].get()))
         delete_button.grid(row=len(labels) + 1, column=0, columnspan=2)
+        list_button = tk.Button(employee_window, text="List Employees",
+                                command=lambda: self.list_records('employees', "Employees"))
+        list_button.grid(row=len(labels) + 2, column=0, columnspan=2)
+        hierarchy_button = tk.Button(employee_window, text="Show Hierarchy",
+                                     command=lambda: self.show_hierarchy(entries["Employee ID"].get()))
+        hierarchy_button.grid(row=len(labels) + 3, column=0, columnspan=2)
 
+    @timed
     def add_employee(self, entries):
         try:
-            emp_id = int(entries["Employee ID"].get())
-            name = entries["Name"].get()
-            department = entries["Department"].get()
-            jobTitle = entries["Job Title"].get()
-            basicSalary = float(entries["Basic Salary"].get())
-            managerID = int(entries["Manager ID"].get())
-
-            if emp_id in self.employees:
-                messagebox.showerror("Error", "Employee with ID already exists.")
-            else:
-                new_employee = Employee(emp_id, name, department, jobTitle, basicSalary, managerID)
-                self.employees[emp_id] = new_employee
-                self.save_data()
-                messagebox.showinfo("Success", "Employee added successfully.")
+            self.service.add('employees', form_values('employees', entries))
+            messagebox.showinfo("Success", "Employee added successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {e}")
 
+    @timed
     def display_employee(self, emp_id_str):
         try:
-            emp_id = int(emp_id_str)
-            if emp_id in self.employees:
-                employee = self.employees[emp_id]
-                details = employee.get_details()
-                messagebox.showinfo("Employee Details", details)
-            else:
-                messagebox.showerror("Error", "Employee not found.")
+            text, _ = self.service.details('employees', int(emp_id_str))
+            messagebox.showinfo("Employee Details", text)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
+        except ValueError:
+            messagebox.showerror("Error", "Employee ID must be an integer")
+
+    def show_hierarchy(self, emp_id_str):
+        try:
+            summary = self.service.org_chart(int(emp_id_str))
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
+            return
         except ValueError:
             messagebox.showerror("Error", "Employee ID must be an integer")
+            return
+        chain = " > ".join(map(str, summary['chain'])) or "None"
+        reports = ", ".join(map(str, summary['reports'])) or "None"
+        messagebox.showinfo("Hierarchy", f"Level: {summary['depth']}\nChain of command: {chain}\n"
+                                         f"Direct reports: {reports}\nTeam size: {summary['headcount']}\n"
+                                         f"Salary roll-up: ${summary['salaryRollup']}")
 
+    @timed
     def delete_employee(self, emp_id_str):
         try:
-            emp_id = int(emp_id_str)
-            if emp_id in self.employees:
-                del self.employees[emp_id]
-                self.save_data()
-                messagebox.showinfo("Success", "Employee deleted successfully.")
-            else:
-                messagebox.showerror("Error", "Employee not found.")
+            self.service.delete('employees', int(emp_id_str))
+            messagebox.showinfo("Success", "Employee deleted successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Employee ID must be an integer")
 
@@ -274,62 +4857,37 @@ class EventManagementApp:
         add_event1.grid(row=len(labels), column=0)
         tk.Button(event_window, text="Display Event", command=lambda: self.display_event(entries["Event ID"].get())).grid(row=len(labels), column=1)
         tk.Button(event_window, text="Delete Event", command=lambda: self.delete_event(entries["Event ID"].get())).grid(row=len(labels)+1, column=0, columnspan=2)
+        list_button = tk.Button(event_window, text="List Events",
+                                command=lambda: self.list_records('events', "Events"))
+        list_button.grid(row=len(labels) + 2, column=0, columnspan=2)
 
+    @timed
     def add_event(self, entries):
         try:
-            event_id = int(entries["Event ID"].get())
-            type = entries["Type"].get()
-            theme = entries["Theme"].get()
-            date = entries["Date (YYYY-MM-DD)"].get()
-            time = entries["Time (HH:MM)"].get()
-            duration = float(entries["Duration (hours)"].get())
-            venue_address = entries["Venue Address"].get()
-            client_id = int(entries["Client ID"].get())
-
-            # Convert guest IDs from comma-separated string to list of integers
-            guest_ids = [int(g.strip()) for g in entries["Guest IDs (comma-separated)"].get().split(',') if
-                         g.strip().isdigit()]
-            # Convert supplier IDs from comma-separated string to list of integers
-            supplier_ids = [int(s.strip()) for s in entries["Supplier IDs (comma-separated)"].get().split(',') if
-                            s.strip().isdigit()]
-
-            invoice = entries["Invoice"].get()
-
-            if event_id in self.events:
-                messagebox.showerror("Error", "Event with ID already exists.")
-            else:
-                # Create a new Event instance
-                new_event = Event(event_id, type, theme, date, time, duration, venue_address, client_id, guest_ids,
-                                  supplier_ids, invoice)
-                # Add the new event to the events dictionary
-                self.events[event_id] = new_event
-                # Save data to file
-                self.save_data()
-                messagebox.showinfo("Success", "Event added successfully.")
+            self.service.add('events', form_values('events', entries))
+            messagebox.showinfo("Success", "Event added successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {e}")
 
+    @timed
     def display_event(self, event_id_str):
         try:
-            event_id = int(event_id_str)
-            if event_id in self.events:
-                event = self.events[event_id]
-                details = event.get_details()
-                messagebox.showinfo("Event Details", details)
-            else:
-                messagebox.showerror("Error", "Event not found.")
+            event = self.service.get('events', int(event_id_str))
+            DetailView(self.root, "Event Details", self.service, 'events', event.eventID)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Event ID must be an integer")
 
+    @timed
     def delete_event(self, event_id_str):
         try:
-            event_id = int(event_id_str)
-            if event_id in self.events:
-                del self.events[event_id]
-                self.save_data()
-                messagebox.showinfo("Success", "Event deleted successfully.")
-            else:
-                messagebox.showerror("Error", "Event not found.")
+            self.service.delete('events', int(event_id_str))
+            messagebox.showinfo("Success", "Event deleted successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Event ID must be an integer")
 
@@ -352,46 +4910,37 @@ class EventManagementApp:
         tk.Button(client_window, text="Delete Client",
                   command=lambda: self.delete_client(entries["Client ID"].get())).grid(row=len(labels) + 1, column=0,
                                                                                        columnspan=2)
+        list_button = tk.Button(client_window, text="List Clients",
+                                command=lambda: self.list_records('clients', "Clients"))
+        list_button.grid(row=len(labels) + 2, column=0, columnspan=2)
 
+    @timed
     def add_client(self, entries):
         try:
-            client_id = int(entries["Client ID"].get())
-            name = entries["Name"].get()
-            address = entries["Address"].get()
-            contact_details = entries["Contact Details"].get()
-            budget = float(entries["Budget"].get())
-
-            if client_id in self.clients:
-                messagebox.showerror("Error", "Client with ID already exists.")
-            else:
-                new_client = Client(client_id, name, address, contact_details, budget)
-                self.clients[client_id] = new_client
-                self.save_data()
-                messagebox.showinfo("Success", "Client added successfully.")
+            self.service.add('clients', form_values('clients', entries))
+            messagebox.showinfo("Success", "Client added successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {e}")
 
+    @timed
     def display_client(self, client_id_str):
         try:
-            client_id = int(client_id_str)
-            if client_id in self.clients:
-                client = self.clients[client_id]
-                details = client.get_details()
-                messagebox.showinfo("Client Details", details)
-            else:
-                messagebox.showerror("Error", "Client not found.")
+            text, _ = self.service.details('clients', int(client_id_str))
+            messagebox.showinfo("Client Details", text)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Client ID must be an integer")
 
+    @timed
     def delete_client(self, client_id_str):
         try:
-            client_id = int(client_id_str)
-            if client_id in self.clients:
-                del self.clients[client_id]
-                self.save_data()
-                messagebox.showinfo("Success", "Client deleted successfully.")
-            else:
-                messagebox.showerror("Error", "Client not found.")
+            self.service.delete('clients', int(client_id_str))
+            messagebox.showinfo("Success", "Client deleted successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Client ID must be an integer")
 
@@ -414,45 +4963,37 @@ class EventManagementApp:
         tk.Button(guest_window, text="Delete Guest",
                   command=lambda: self.delete_guest(entries["Guest ID"].get())).grid(row=len(labels) + 1, column=0,
                                                                                      columnspan=2)
+        list_button = tk.Button(guest_window, text="List Guests",
+                                command=lambda: self.list_records('guests', "Guests"))
+        list_button.grid(row=len(labels) + 2, column=0, columnspan=2)
 
+    @timed
     def add_guest(self, entries):
         try:
-            guest_id = int(entries["Guest ID"].get())
-            name = entries["Name"].get()
-            address = entries["Address"].get()
-            contact_details = entries["Contact Details"].get()
-
-            if guest_id in self.guests:
-                messagebox.showerror("Error", "Guest with ID already exists.")
-            else:
-                new_guest = Guest(guest_id, name, address, contact_details)
-                self.guests[guest_id] = new_guest
-                self.save_data()
-                messagebox.showinfo("Success", "Guest added successfully.")
+            self.service.add('guests', form_values('guests', entries))
+            messagebox.showinfo("Success", "Guest added successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {e}")
 
+    @timed
     def display_guest(self, guest_id_str):
         try:
-            guest_id = int(guest_id_str)
-            if guest_id in self.guests:
-                guest = self.guests[guest_id]
-                details = guest.get_details()
-                messagebox.showinfo("Guest Details", details)
-            else:
-                messagebox.showerror("Error", "Guest not found.")
+            text, _ = self.service.details('guests', int(guest_id_str))
+            messagebox.showinfo("Guest Details", text)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Guest ID must be an integer")
 
+    @timed
     def delete_guest(self, guest_id_str):
         try:
-            guest_id = int(guest_id_str)
-            if guest_id in self.guests:
-                del self.guests[guest_id]
-                self.save_data()
-                messagebox.showinfo("Success", "Guest deleted successfully.")
-            else:
-                messagebox.showerror("Error", "Guest not found.")
+            self.service.delete('guests', int(guest_id_str))
+            messagebox.showinfo("Success", "Guest deleted successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Guest ID must be an integer")
 
@@ -475,45 +5016,37 @@ class EventManagementApp:
         tk.Button(supplier_window, text="Delete Supplier",
                   command=lambda: self.delete_supplier(entries["Supplier ID"].get())).grid(row=len(labels) + 1,
                                                                                            column=0, columnspan=2)
+        list_button = tk.Button(supplier_window, text="List Suppliers",
+                                command=lambda: self.list_records('suppliers', "Suppliers"))
+        list_button.grid(row=len(labels) + 2, column=0, columnspan=2)
 
+    @timed
     def add_supplier(self, entries):
         try:
-            supplier_id = int(entries["Supplier ID"].get())
-            name = entries["Name"].get()
-            service = entries["Service"].get()
-            contact_details = entries["Contact Details"].get()
-
-            if supplier_id in self.suppliers:
-                messagebox.showerror("Error", "Supplier with ID already exists.")
-            else:
-                new_supplier = Supplier(supplier_id, name, service, contact_details)
-                self.suppliers[supplier_id] = new_supplier
-                self.save_data()
-                messagebox.showinfo("Success", "Supplier added successfully.")
+            self.service.add('suppliers', form_values('suppliers', entries))
+            messagebox.showinfo("Success", "Supplier added successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {e}")
 
+    @timed
     def display_supplier(self, supplier_id_str):
         try:
-            supplier_id = int(supplier_id_str)
-            if supplier_id in self.suppliers:
-                supplier = self.suppliers[supplier_id]
-                details = supplier.get_details()
-                messagebox.showinfo("Supplier Details", details)
-            else:
-                messagebox.showerror("Error", "Supplier not found.")
+            text, _ = self.service.details('suppliers', int(supplier_id_str))
+            messagebox.showinfo("Supplier Details", text)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Supplier ID must be an integer")
 
+    @timed
     def delete_supplier(self, supplier_id_str):
         try:
-            supplier_id = int(supplier_id_str)
-            if supplier_id in self.suppliers:
-                del self.suppliers[supplier_id]
-                self.save_data()
-                messagebox.showinfo("Success", "Supplier deleted successfully.")
-            else:
-                messagebox.showerror("Error", "Supplier not found.")
+            self.service.delete('suppliers', int(supplier_id_str))
+            messagebox.showinfo("Success", "Supplier deleted successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Supplier ID must be an integer")
 
@@ -536,47 +5069,37 @@ class EventManagementApp:
         tk.Button(venue_window, text="Delete Venue",
                   command=lambda: self.delete_venue(entries["Venue ID"].get())).grid(row=len(labels) + 1, column=0,
                                                                                      columnspan=2)
+        list_button = tk.Button(venue_window, text="List Venues",
+                                command=lambda: self.list_records('venues', "Venues"))
+        list_button.grid(row=len(labels) + 2, column=0, columnspan=2)
 
+    @timed
     def add_venue(self, entries):
         try:
-            venue_id = int(entries["Venue ID"].get())
-            name = entries["Name"].get()
-            address = entries["Address"].get()
-            contact = entries["Contact"].get()
-            min_guests = int(entries["Min Guests"].get())
-            max_guests = int(entries["Max Guests"].get())
-
-            if venue_id in self.venues:
-                messagebox.showerror("Error", "Venue with ID already exists.")
-            else:
-                new_venue = Venue(venue_id, name, address, contact, min_guests, max_guests)
-                self.venues[venue_id] = new_venue
-                self.save_data()
-                messagebox.showinfo("Success", "Venue added successfully.")
+            self.service.add('venues', form_values('venues', entries))
+            messagebox.showinfo("Success", "Venue added successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {e}")
 
+    @timed
     def display_venue(self, venue_id_str):
         try:
-            venue_id = int(venue_id_str)
-            if venue_id in self.venues:
-                venue = self.venues[venue_id]
-                details = venue.get_details()
-                messagebox.showinfo("Venue Details", details)
-            else:
-                messagebox.showerror("Error", "Venue not found.")
+            text, _ = self.service.details('venues', int(venue_id_str))
+            messagebox.showinfo("Venue Details", text)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Venue ID must be an integer")
 
+    @timed
     def delete_venue(self, venue_id_str):
         try:
-            venue_id = int(venue_id_str)
-            if venue_id in self.venues:
-                del self.venues[venue_id]
-                self.save_data()
-                messagebox.showinfo("Success", "Venue deleted successfully.")
-            else:
-                messagebox.showerror("Error", "Venue not found.")
+            self.service.delete('venues', int(venue_id_str))
+            messagebox.showinfo("Success", "Venue deleted successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Venue ID must be an integer")
 
@@ -599,53 +5122,139 @@ class EventManagementApp:
         tk.Button(caterer_window, text="Delete Caterer",
                   command=lambda: self.delete_caterer(entries["Caterer ID"].get())).grid(row=len(labels) + 1, column=0,
                                                                                          columnspan=2)
+        list_button = tk.Button(caterer_window, text="List Caterers",
+                                command=lambda: self.list_records('caterers', "Caterers"))
+        list_button.grid(row=len(labels) + 2, column=0, columnspan=2)
 
+    @timed
     def add_caterer(self, entries):
         try:
-            caterer_id = int(entries["Caterer ID"].get())
-            name = entries["Name"].get()
-            address = entries["Address"].get()
-            contact_details = entries["Contact Details"].get()
-            menu = entries["Menu"].get()
-            min_guests = int(entries["Min Guests"].get())
-            max_guests = int(entries["Max Guests"].get())
-
-            if caterer_id in self.caterers:
-                messagebox.showerror("Error", "Caterer with ID already exists.")
-            else:
-                new_caterer = Caterer(caterer_id, name, address, contact_details, menu, min_guests, max_guests)
-                self.caterers[caterer_id] = new_caterer
-                self.save_data()
-                messagebox.showinfo("Success", "Caterer added successfully.")
+            self.service.add('caterers', form_values('caterers', entries))
+            messagebox.showinfo("Success", "Caterer added successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {e}")
 
+    @timed
     def display_caterer(self, caterer_id_str):
         try:
-            caterer_id = int(caterer_id_str)
-            if caterer_id in self.caterers:
-                caterer = self.caterers[caterer_id]
-                details = caterer.get_details()
-                messagebox.showinfo("Caterer Details", details)
-            else:
-                messagebox.showerror("Error", "Caterer not found.")
+            text, _ = self.service.details('caterers', int(caterer_id_str))
+            messagebox.showinfo("Caterer Details", text)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Caterer ID must be an integer")
 
+    @timed
     def delete_caterer(self, caterer_id_str):
         try:
-            caterer_id = int(caterer_id_str)
-            if caterer_id in self.caterers:
-                del self.caterers[caterer_id]
-                self.save_data()
-                messagebox.showinfo("Success", "Caterer deleted successfully.")
-            else:
-                messagebox.showerror("Error", "Caterer not found.")
+            self.service.delete('caterers', int(caterer_id_str))
+            messagebox.showinfo("Success", "Caterer deleted successfully.")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except ValueError:
             messagebox.showerror("Error", "Caterer ID must be an integer")
 
 
+def date_argument(text):
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a YYYY-MM-DD date, got {text!r}") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Event Management System")
+    parser.add_argument('--sqlite', action='store_true', help="store data in event_management.db")
+    parser.add_argument('--columnar', action='store_true',
+                        help="hold loaded collections in packed columns to save memory (log storage only)")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="split guests and events across this many shard files, processed in parallel")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="record call latencies and bytes written; export to PATH (.json or .prom) every 10 s")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="run under cProfile and tracemalloc; write PATH and PATH.memory.txt on exit")
+    commands = parser.add_subparsers(dest='command')
+    import_parser = commands.add_parser('import', help="bulk load records from a .csv or .jsonl file")
+    import_parser.add_argument('collection', choices=COLLECTIONS)
+    import_parser.add_argument('path')
+    import_parser.add_argument('--chunk-size', type=int, default=10000)
+    export_parser = commands.add_parser('export', help="write all records to a .csv or .jsonl file")
+    export_parser.add_argument('collection', choices=COLLECTIONS)
+    export_parser.add_argument('path')
+    allocate_parser = commands.add_parser('allocate', help="fill empty supplier slots of upcoming events")
+    allocate_parser.add_argument('--start', type=date_argument, help="first event date (YYYY-MM-DD), default today")
+    allocate_parser.add_argument('--end', type=date_argument, help="last event date (YYYY-MM-DD), default none")
+    allocate_parser.add_argument('--apply', action='store_true', help="store the plan instead of only printing it")
+    changes_parser = commands.add_parser('changes', help="print the change feed as JSON lines")
+    changes_parser.add_argument('--after', type=int, default=0, help="skip changes up to this sequence number")
+    changes_parser.add_argument('--follow', action='store_true', help="keep waiting for new changes, like tail -f")
+    serve_parser = commands.add_parser('serve', help="serve the data over a local HTTP/JSON API")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args(argv)
+    backend = 'sqlite' if args.sqlite else 'columnar' if args.columnar else 'log'
+    if args.sqlite and args.columnar:
+        parser.error("--columnar needs the default log storage")
+    if args.shards < 1 or (backend != 'log' and args.shards > 1):
+        parser.error("--shards must be at least 1 and needs the default log storage")
+    if args.metrics:
+        METRICS.start_exporting(args.metrics)
+    try:
+        with profiling(args.profile) if args.profile else nullcontext():
+            run_command(args, backend)
+    except DataDirectoryLocked as e:
+        sys.exit(f"Error: {e}")
+    finally:
+        if args.metrics:
+            METRICS.export(args.metrics)
+
+
+def run_command(args, backend):
+    if args.command == 'import':
+        records = open_collections(backend, args.shards)[args.collection]
+        if isinstance(records, ShardedRecords) and args.path.endswith('.jsonl'):
+            imported, errors = import_records_parallel(records, args.collection, args.path, args.chunk_size)
+        else:
+            imported, errors = import_records(records, args.collection, args.path, args.chunk_size)
+        for line_number, message in errors:
+            print(f"{args.path}:{line_number}: {message}", file=sys.stderr)
+        print(f"Imported {imported} {args.collection}, skipped {len(errors)} rows.")
+    elif args.command == 'export':
+        count = export_records(open_collections(backend, args.shards)[args.collection], args.path)
+        print(f"Exported {count} {args.collection}.")
+    elif args.command == 'allocate':
+        service = EventService(open_collections(backend, args.shards))
+        try:
+            assigned, unfilled = service.allocate_suppliers(args.start, args.end, args.apply)
+        finally:
+            service.close()
+        for key, slots in sorted(assigned.items()):
+            print(f"Event {key}: " + ", ".join(f"{slot}={supplier_id}" for slot, supplier_id in slots.items()))
+        for key, slot in unfilled:
+            print(f"Event {key}: no free {slot}", file=sys.stderr)
+        print(f"{'Assigned' if args.apply else 'Planned'} {sum(map(len, assigned.values()))} slots "
+              f"across {len(assigned)} events, {len(unfilled)} left empty.")
+    elif args.command == 'changes':
+        try:
+            for change in follow_changes(after=args.after, follow=args.follow):
+                print(json.dumps(change), flush=True)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'serve':
+        service = EventService(open_collections(backend, args.shards))
+        try:
+            ServiceHTTPServer(service, args.host, args.port).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+    else:
+        root = tk.Tk()
+        app = EventManagementApp(root, backend=backend, shards=args.shards)
+        root.mainloop()
+
+
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = EventManagementApp(root)
-    root.mainloop()
+    main()
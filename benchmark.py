@@ -0,0 +1,277 @@
+"""Headless benchmarks for the Event Management data layer.
+
+Generates a seeded synthetic data set for all seven collections, bulk loads it,
+then times startup, lookups, single-record mutations and saving through the same
+code paths the app uses. Results are written as JSON so runs from different
+commits can be compared with ``--compare``::
+
+    python benchmark.py --scale 100k --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then left out.
+    resource = None
+
+import Main
+
+SCALES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+
+
+def dataset_sizes(guests):
+    """Collection sizes for a data set with ``guests`` guests, in typical proportions."""
+    events = max(guests // 50, 10)
+    return {'guests': guests, 'events': events, 'clients': max(events // 4, 5),
+            'employees': max(guests // 100, 10), 'suppliers': max(guests // 500, 20),
+            'venues': max(guests // 1000, 10), 'caterers': max(guests // 2000, 10)}
+
+
+def generate_rows(guests, seed):
+    """Yield ``(collection, row)`` for a reproducible synthetic data set.
+
+    Events have a log-normal guest count around 40 with a few large conferences, each
+    client books about four events, and managers have four to six reports each.
+    """
+    rng = random.Random(seed)
+    sizes = dataset_sizes(guests)
+    departments = ['Operations', 'Sales', 'Catering', 'Logistics', 'Finance', 'Marketing']
+    services = ['Cleaning', 'Decorations', 'Entertainment', 'Furniture', 'Lighting']
+    for key in range(1, sizes['employees'] + 1):
+        manager_id = 0 if key == 1 else rng.randint(max(1, (key - 1) // 6), max(1, (key - 1) // 4))
+        yield 'employees', {'employeeID': key, 'name': f"Employee {key}", 'department': rng.choice(departments),
+                            'jobTitle': rng.choice(['Coordinator', 'Manager', 'Assistant', 'Planner']),
+                            'basicSalary': rng.randrange(30000, 150000, 500), 'managerID': manager_id}
+    for key in range(1, sizes['clients'] + 1):
+        yield 'clients', {'clientID': key, 'name': f"Client {key}", 'address': f"{key} Market Street",
+                          'contactDetails': f"client{key}@example.com", 'budget': rng.randrange(5000, 500000, 100)}
+    for key in range(1, guests + 1):
+        yield 'guests', {'guestID': key, 'name': f"Guest {key}", 'address': f"{rng.randrange(1, 999)} Palm Road",
+                         'contactDetails': f"+971 5{rng.randrange(10 ** 7, 10 ** 8)}"}
+    for key in range(1, sizes['suppliers'] + 1):
+        yield 'suppliers', {'supplierID': key, 'name': f"Supplier {key}", 'service': rng.choice(services),
+                            'contactDetails': f"supplier{key}@example.com"}
+    for key in range(1, sizes['venues'] + 1):
+        low = rng.randrange(10, 200)
+        yield 'venues', {'venueID': key, 'name': f"Venue {key}", 'address': f"Venue Hall {key}",
+                         'contact': f"venue{key}@example.com", 'minGuests': low, 'maxGuests': low * rng.randint(2, 50)}
+    for key in range(1, sizes['caterers'] + 1):
+        low = rng.randrange(10, 100)
+        yield 'caterers', {'catererID': key, 'name': f"Caterer {key}", 'address': f"{key} Kitchen Lane",
+                           'contactDetails': f"caterer{key}@example.com", 'menu': rng.choice(['Buffet', 'Set', 'BBQ']),
+                           'minGuests': low, 'maxGuests': low * rng.randint(5, 100)}
+    start = date(2026, 1, 1)
+    for key in range(1, sizes['events'] + 1):
+        if rng.random() < 0.005:
+            count = rng.randint(2000, 20000)
+        else:
+            count = int(rng.lognormvariate(3.7, 0.8)) + 1
+        row = {'eventID': key, 'type': rng.choice(['Wedding', 'Conference', 'Birthday', 'Gala']),
+               'theme': rng.choice(['Classic', 'Modern', 'Garden', 'Gold']),
+               'date': (start + timedelta(days=rng.randrange(3 * 365))).isoformat(),
+               'time': f"{rng.randint(8, 20):02d}:00", 'duration': rng.randint(1, 6),
+               'venueAddress': f"Venue Hall {rng.randint(1, sizes['venues'])}",
+               'clientID': rng.randint(1, sizes['clients']),
+               'guests': rng.sample(range(1, guests + 1), min(count, guests)),
+               'caterer': rng.randint(1, sizes['caterers']),
+               'invoice': f"Venue: {rng.randrange(1000, 20000)}; Catering: {rng.randrange(500, 30000)}"}
+        for slot in Main.SUPPLIER_SLOTS[1:]:
+            row[slot] = rng.randint(1, sizes['suppliers']) if rng.random() < 0.6 else None
+        yield 'events', row
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class Recorder:
+    """Collects one result per benchmark: wall time, throughput, latency percentiles and memory."""
+    def __init__(self, trace_memory=False):
+        self.results = []
+        self.trace_memory = trace_memory
+
+    @contextmanager
+    def measure(self, name, ops=1):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        result = {'name': name, 'seconds': round(elapsed, 6), 'ops': ops,
+                  'ops_per_second': round(ops / elapsed, 1) if elapsed else None, 'peak_rss_kb': peak_rss_kb()}
+        if self.trace_memory:
+            result['traced_peak_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+        self.results.append(result)
+        print(f"{name:40} {elapsed:10.4f} s  {ops:>9} ops", file=sys.stderr)
+
+    def latencies(self, name, calls):
+        """Time each call in ``calls`` separately and record the latency distribution."""
+        samples = []
+        with self.measure(name, len(calls)):
+            for call in calls:
+                started = time.perf_counter()
+                call()
+                samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        self.results[-1].update({
+            'p50_ms': round(statistics.median(samples), 4),
+            'p95_ms': round(samples[int(len(samples) * 0.95) - 1], 4),
+            'p99_ms': round(samples[int(len(samples) * 0.99) - 1], 4),
+            'max_ms': round(samples[-1], 4),
+        })
+
+
+def run(recorder, guests, seed, backend, operations):
+    rng = random.Random(seed + 1)
+    sizes = dataset_sizes(guests)
+
+    with recorder.measure('generate', sum(sizes.values())):
+        files = {name: open(f'{name}.jsonl', 'w', encoding='utf-8') for name in Main.COLLECTIONS}
+        for collection, row in generate_rows(guests, seed):
+            files[collection].write(json.dumps(row) + '\n')
+        for f in files.values():
+            f.close()
+
+    collections = Main.open_collections(backend)
+    for name in Main.COLLECTIONS:
+        with recorder.measure(f'bulk_import.{name}', sizes[name]):
+            imported, errors = Main.import_records(collections[name], name, f'{name}.jsonl')
+        if errors:
+            raise RuntimeError(f"{name}: {len(errors)} rows rejected, first: {errors[0]}")
+    Main.EventService(collections).close()
+
+    with recorder.measure('startup.load_data'):
+        service = Main.EventService(Main.open_collections(backend))
+        for records in service.collections.values():
+            len(records)
+    with recorder.measure('startup.first_scan.events', sizes['events']):
+        for _ in service.collections['events'].values():
+            pass
+
+    for name in ('guests', 'events', 'employees'):
+        keys = [rng.randint(1, sizes[name]) for _ in range(operations)]
+        recorder.latencies(f'lookup.display.{name}',
+                           [lambda key=key, name=name: service.get(name, key).get_details() for key in keys])
+    recorder.latencies('lookup.search', [lambda word=word: service.search(word)
+                                         for word in rng.choices(['guest', 'palm', 'gold', 'venue', 'sup'], k=50)])
+    recorder.latencies('lookup.candidates', [lambda count=count: service.candidates(count, date(2026, 6, 1))
+                                             for count in rng.choices(range(10, 500), k=50)])
+    recorder.latencies('lookup.org_chart', [lambda key=key: service.org_chart(key)
+                                            for key in rng.choices(range(1, sizes['employees'] + 1), k=200)])
+    with recorder.measure('query.conflicts'):
+        service.conflicts()
+    with recorder.measure('query.analytics'):
+        service.report()
+    recorder.latencies('query.analytics.repeat', [service.report for _ in range(20)])
+
+    next_guest = sizes['guests'] + 1
+    guest_rows = [{'guestID': next_guest + i, 'name': f"New guest {i}", 'address': "1 Test Road",
+                   'contactDetails': "n/a"} for i in range(operations)]
+    recorder.latencies('mutate.add.guests', [lambda row=row: service.add('guests', row) for row in guest_rows])
+    event_rows = [{'eventID': sizes['events'] + 1 + i, 'type': "Meeting", 'theme': "Plain", 'date': "2030-01-01",
+                   'time': "09:00", 'duration': 1, 'venueAddress': f"Benchmark Room {i}", 'clientID': 1,
+                   'guests': rng.sample(range(1, guests + 1), min(40, guests)), 'invoice': "Room: 100"}
+                  for i in range(operations)]
+    recorder.latencies('mutate.add.events', [lambda row=row: service.add('events', row) for row in event_rows])
+    recorder.latencies('mutate.delete.events', [lambda row=row: service.delete('events', row['eventID'])
+                                                for row in event_rows])
+    recorder.latencies('mutate.delete.guests', [lambda row=row: service.delete('guests', row['guestID'])
+                                                for row in guest_rows])
+    with recorder.measure('save.save_data'):
+        service.save_data()
+    with recorder.measure('save.close'):
+        service.close()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold, noise=0.001):
+    """Print each benchmark's time relative to a previous run; returns the names that regressed.
+
+    Differences smaller than ``noise`` seconds are never reported as regressions.
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {result['name']: result for result in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        before = baseline.get(result['name'])
+        if before is None or not before['seconds']:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        flag = "  REGRESSION" if ratio > threshold and result['seconds'] - before['seconds'] > noise else ""
+        print(f"{result['name']:40} {before['seconds']:10.4f} -> {result['seconds']:10.4f} s  x{ratio:.2f}{flag}")
+        if flag:
+            regressions.append(result['name'])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Event Management data layer")
+    parser.add_argument('--scale', default='1k', help="guest count: 1k, 100k, 1m or a number")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sqlite', action='store_true', help="benchmark the SQLite backend")
+    parser.add_argument('--operations', type=int, default=500, help="samples per latency benchmark")
+    parser.add_argument('--trace-memory', action='store_true', help="also record tracemalloc peaks (slow)")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2, help="slowdown ratio reported as a regression")
+    parser.add_argument('--keep', action='store_true', help="keep the generated data directory")
+    args = parser.parse_args(argv)
+    guests = SCALES[args.scale.lower()] if args.scale.lower() in SCALES else int(args.scale)
+    backend = 'sqlite' if args.sqlite else 'log'
+
+    recorder = Recorder(args.trace_memory)
+    workdir = tempfile.mkdtemp(prefix='event-bench-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        run(recorder, guests, args.seed, backend, args.operations)
+    finally:
+        tracemalloc.stop()
+        os.chdir(cwd)
+        if args.keep:
+            print(f"Data kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {'meta': {'scale': guests, 'seed': args.seed, 'backend': backend, 'operations': args.operations,
+                       'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                       'numpy': Main.numpy is not None, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')},
+              'results': recorder.results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare and compare(recorder.results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Run each test in an empty data directory; Main keeps its files relative to the working directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def open_service():
+    """Open EventServices on the current directory, closing any still open at the end of the test."""
+    import Main
+    services = []
+
+    def open_service(**options):
+        service = Main.EventService(Main.open_collections(**options))
+        services.append(service)
+        return service
+
+    yield open_service
+    for service in services:
+        if not service.writer._closed:
+            service.close()
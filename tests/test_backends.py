@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+import Main
+
+
+def guest(key, name=None):
+    return {'guestID': key, 'name': name or f'Guest {key}', 'address': '', 'contactDetails': ''}
+
+
+@pytest.fixture
+def paused(monkeypatch):
+    """Hold the PersistenceWorker's writes while the returned event is clear."""
+    release = threading.Event()
+    release.set()
+    write = Main.PersistenceWorker._write
+
+    def held(self, batch):
+        release.wait(5)
+        return write(self, batch)
+
+    monkeypatch.setattr(Main.PersistenceWorker, '_write', held)
+    return release
+
+
+@pytest.mark.parametrize('backend', ['log', 'sqlite'])
+def test_iteration_and_length_while_changes_are_unwritten(open_service, paused, backend):
+    service = open_service(backend=backend)
+    for key in range(1, 6):
+        service.add('guests', guest(key))
+    service.writer.flush()
+    guests = service.collections['guests']
+    if backend == 'sqlite':
+        assert guests._dirty == set() and guests._deleted == set()  # Cleared once written
+
+    paused.clear()
+    service.delete('guests', 2)
+    service.add('guests', guest(7))
+    service.add('guests', guest(6))
+    service.delete('guests', 7)
+    service.delete('guests', 3)  # Not a transaction: that would wait for the write
+    service.add('guests', guest(3, 'Renamed'))
+    expected = [1, 3, 4, 5, 6]  # The log keeps insertion order, SQLite ID order
+    assert sorted(guests) == expected and len(guests) == 5
+    if backend == 'sqlite':
+        assert list(guests) == expected
+    assert 2 not in guests and 7 not in guests and guests[3].name == 'Renamed'
+
+    paused.set()
+    service.writer.flush()
+    assert sorted(guests) == expected and len(guests) == 5
+    if backend == 'sqlite':
+        assert list(guests) == expected
+        assert guests._dirty == set() and guests._deleted == set()
+        assert sorted(guests.repository.ids('guests')) == expected
+    service.close()
+    guests = Main.open_collections(backend=backend)['guests']
+    assert sorted(guests) == expected and len(guests) == 5
+    assert guests[3].name == 'Renamed'
+
+
+def test_changes_made_during_a_write_stay_pending(open_service, paused):
+    service = open_service(backend='sqlite')
+    guests = service.collections['guests']
+    service.add('guests', guest(1))
+    service.writer.flush()
+    paused.clear()
+    service.delete('guests', 1)  # This snapshot is written...
+    while not service.writer._writing:
+        threading.Event().wait(0.01)
+    service.add('guests', guest(1, 'Back again'))  # ...after this change was made
+    assert guests._dirty == {1}
+    paused.set()
+    service.writer.flush()
+    assert list(guests) == [1] and len(guests) == 1
+    assert guests[1].name == 'Back again'
+
+
+def test_a_rolled_back_write_stays_pending(open_service):
+    service = open_service(backend='sqlite')
+    service.writer.close()
+    guests = service.collections['guests']
+    guests[1] = Main.Guest(**guest(1))
+    with pytest.raises(RuntimeError):
+        with guests.repository.transaction():
+            guests.save_changes({1: guests[1]})
+            raise RuntimeError("write failed")
+    assert guests._dirty == {1}
+    assert list(guests) == [1] and len(guests) == 1
+    guests.compact()
+    assert guests._dirty == set()
+    assert guests.repository.ids('guests') == [1]
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+
+import Main
+
+
+def event(key, day, time, duration=1):
+    return {'eventID': key, 'type': 'Gala', 'theme': '', 'date': day, 'time': time, 'duration': duration,
+            'venueAddress': f'Hall {key}', 'clientID': None, 'guests': [], 'invoice': ''}
+
+
+@pytest.fixture
+def service(open_service):
+    service = open_service()
+    for key, day, time in ((1, '2027-03-01', '23:30'), (2, '2027-03-02', '00:00'), (3, '2027-03-02', '10:00'),
+                           (4, '2027-03-02', 'evening'), (5, '2027-03-02', '23:59'), (6, '2027-03-03', '00:00')):
+        service.add('events', event(key, day, time))
+    return service
+
+
+def ids(events):
+    return [event.eventID for event in events]
+
+
+def test_ranges_include_the_start_and_exclude_the_end(service):
+    day = datetime(2027, 3, 2)
+    # An unparsable time counts from midnight, after the event starting at 00:00 with a lower ID
+    assert ids(service.events_between(day, datetime(2027, 3, 3))) == [2, 4, 3, 5]
+    assert ids(service.events_between(datetime(2027, 3, 1, 23, 30), day)) == [1]
+    assert ids(service.events_between(datetime(2027, 3, 1, 23, 31), day)) == []
+    assert ids(service.events_between(datetime(2027, 3, 2, 23, 59), datetime(2027, 3, 3, 0, 0, 1))) == [5, 6]
+    assert ids(service.events_between(datetime(2027, 3, 3), datetime(2027, 3, 2))) == []
+
+
+def test_ranges_follow_adds_and_deletes(service):
+    day, next_day = datetime(2027, 3, 2), datetime(2027, 3, 3)
+    service.delete('events', 2)
+    service.add('events', event(7, '2027-03-02', '00:00'))
+    assert ids(service.events_between(day, next_day)) == [4, 7, 3, 5]
+    with service.transaction():  # Move event 5 past midnight
+        service.delete('events', 5)
+        service.add('events', event(5, '2027-03-03', '00:00'))
+    assert ids(service.events_between(day, next_day)) == [4, 7, 3]
+    assert ids(service.events_between(next_day, datetime(2027, 3, 4))) == [5, 6]
+    service.undo()
+    assert ids(service.events_between(day, next_day)) == [4, 7, 3, 5]
+
+
+@pytest.mark.parametrize('chunk', [1, 2, 100])
+def test_upcoming_pages_through_events_sharing_a_start(service, chunk):
+    for key in (8, 9, 10):
+        service.add('events', event(key, '2027-03-02', '00:00'))
+    assert ids(service.upcoming(datetime(2027, 3, 2), chunk)) == [2, 4, 8, 9, 10, 3, 5, 6]
+    assert ids(service.upcoming(datetime(2027, 3, 2, 0, 0, 1), chunk)) == [3, 5, 6]
+    assert ids(service.upcoming(datetime(2027, 3, 3, 0, 0, 1), chunk)) == []
+
+
+def test_upcoming_sees_changes_made_while_iterating(service):
+    upcoming = service.upcoming(datetime(2027, 3, 2), chunk=1)
+    assert next(upcoming).eventID == 2
+    service.delete('events', 4)  # Not yet reached: skipped
+    service.add('events', event(11, '2027-03-02', '12:00'))  # Ahead of the reader: picked up
+    service.add('events', event(12, '2027-03-01', '23:45'))  # Behind the reader: missed
+    assert ids(upcoming) == [3, 11, 5, 6]
+
+
+def test_index_built_from_stored_events(service):
+    service.close()
+    calendar = Main.CalendarIndex(Main.open_collections()['events'])
+    assert calendar.between(datetime(2027, 3, 2), datetime(2027, 3, 3)) == [2, 4, 3, 5]
+    assert calendar.after(datetime(2027, 3, 2, 23, 59), 5) == [(datetime(2027, 3, 2, 23, 59), 5),
+                                                              (datetime(2027, 3, 3), 6)]
@@ -0,0 +1,93 @@
+import os
+from array import array
+
+import pytest
+
+import Main
+
+ROWS = {
+    'employees': {'employeeID': 1, 'name': 'Ann', 'department': 'Sales', 'jobTitle': 'Lead',
+                  'basicSalary': 1000.5, 'managerID': None},
+    'events': {'eventID': 9, 'type': 'Gala', 'theme': 'Blue', 'date': '2027-02-01', 'time': '10:00',
+               'duration': 2, 'venueAddress': 'Hall 1', 'clientID': None, 'guests': [4, 2, 8],
+               'caterer': 3, 'cleaner': None, 'invoice': 'x: 1'},
+    'clients': {'clientID': 2, 'name': 'Zoë', 'address': 'Straße 5', 'contactDetails': '', 'budget': 50},
+    'guests': {'guestID': 3, 'name': 'Guest', 'address': 'Street', 'contactDetails': 'mail'},
+    'suppliers': {'supplierID': 4, 'name': 'Clean Co', 'service': 'Cleaning', 'contactDetails': 'tel'},
+    'venues': {'venueID': 5, 'name': 'Hall', 'address': 'Hall 1', 'contact': 'tel', 'minGuests': 10,
+               'maxGuests': 200},
+    'caterers': {'catererID': 6, 'name': 'Food', 'address': 'Road', 'contactDetails': 'tel', 'menu': 'Soup',
+                 'minGuests': 0, 'maxGuests': 80},
+}
+
+
+def event(key=9, guests=(4, 2, 8)):
+    return Main.build_event(dict(ROWS['events'], eventID=key, guests=list(guests)))
+
+
+@pytest.fixture
+def store():
+    return Main.GuestListStore('guest_files', spill_threshold=4)
+
+
+@pytest.fixture
+def codec(store):
+    kinds = ''.join(kind for _, kind in Main.CODECS['events'].layout)
+    return Main.RecordCodec(Main.Event, kinds, version=3, compatible=(1, 2), guest_lists=store)
+
+
+@pytest.mark.parametrize('collection', Main.COLLECTIONS)
+def test_round_trip(collection):
+    record = Main.BUILDERS[collection](ROWS[collection])
+    codec = Main.CODECS[collection]
+    decoded = codec.decode(b'pad' + codec.encode(record), offset=3)
+    assert type(decoded) is type(record)
+    assert Main.export_row(decoded) == Main.export_row(record)
+
+
+def test_rejects_unknown_versions():
+    codec = Main.CODECS['clients']
+    payload = bytearray(codec.encode(Main.build_client(ROWS['clients'])))
+    payload[0] = codec.version + 1
+    with pytest.raises(ValueError, match='record version'):
+        codec.decode(bytes(payload))
+
+
+def test_guest_lists_up_to_the_threshold_stay_inline(codec, store):
+    decoded = codec.decode(codec.encode(event(guests=range(1, 5))))
+    assert decoded.guests.tolist() == [1, 2, 3, 4]
+    assert decoded.guests.path is None
+    assert not os.path.exists(store.directory)
+
+
+def test_longer_guest_lists_spill_to_a_new_file_per_write(codec, store):
+    first = codec.encode(event(guests=range(1, 6)))
+    second = codec.encode(event(guests=range(1, 7)))
+    assert len(first) == len(second)  # Only the file reference is stored inline
+    assert codec.guest_files(first) == ['9.1.ids']
+    assert codec.guest_files(second) == ['9.2.ids']
+
+    decoded = codec.decode(first)
+    assert decoded.guests.tolist() == [1, 2, 3, 4, 5]
+    assert decoded.guests.path == store.path(9, 1)
+    assert codec.decode(second).guests.tolist() == [1, 2, 3, 4, 5, 6]
+    # Encoding a list mapped from one of the event's files reuses that file.
+    assert codec.guest_files(codec.encode(decoded)) == ['9.1.ids']
+
+
+def test_reads_version_2_spilled_lists(codec, store):
+    payload = bytearray(codec.encode(event(guests=range(1, 6))))
+    os.rename(store.path(9, 1), store.path(9, 0))
+    payload[0] = 2  # Version 2 stored the count after the marker and used the unversioned file
+    assert codec.guest_files(bytes(payload)) == ['9.ids']
+    assert codec.decode(bytes(payload)).guests.tolist() == [1, 2, 3, 4, 5]
+
+
+def test_sorts_version_1_guest_lists(codec):
+    record = event()
+    record.guests = Main.GuestList(array('I', [8, 2, 8, 4]))  # Unsorted, as version 1 allowed
+    payload = bytearray(codec.encode(record))
+    payload[0] = 1
+    decoded = codec.decode(bytes(payload))
+    assert decoded.guests.tolist() == [2, 4, 8]
+    assert Main.export_row(decoded) == dict(Main.export_row(record), guests=[2, 4, 8])
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+import Main
+
+
+@pytest.fixture
+def service(open_service):
+    service = open_service()
+    service.add('clients', {'clientID': 1, 'name': 'Client', 'address': '', 'contactDetails': '', 'budget': 10})
+    for key in (1, 2, 3):
+        service.add('guests', {'guestID': key, 'name': f'Guest {key}', 'address': '', 'contactDetails': ''})
+    for key, guests, day in ((10, [1, 2], '2027-03-01'), (11, [2, 3], '2027-03-02')):
+        service.add('events', {'eventID': key, 'type': 'Gala', 'theme': '', 'date': day, 'time': '10:00',
+                               'duration': 2, 'venueAddress': 'Hall', 'clientID': 1, 'guests': guests,
+                               'invoice': ''})
+    for key, manager_id in ((1, None), (2, 1), (3, 2)):
+        service.add('employees', {'employeeID': key, 'name': f'Employee {key}', 'department': 'Sales',
+                                  'jobTitle': 'Rep', 'basicSalary': 100, 'managerID': manager_id})
+    return service
+
+
+def ids(service, collection):
+    return sorted(service.collections[collection])
+
+
+@pytest.mark.parametrize('collection, key', [('guests', 2), ('clients', 1), ('employees', 1)])
+def test_restrict_refuses_and_changes_nothing(service, collection, key):
+    with pytest.raises(Main.StillReferenced):
+        service.delete(collection, key, 'restrict')
+    assert key in service.collections[collection]
+    assert [service.get('events', key).guests.tolist() for key in (10, 11)] == [[1, 2], [2, 3]]
+    assert service.get('employees', 2).managerID == 1
+
+
+def test_clients_are_restricted_by_default(service):
+    with pytest.raises(Main.StillReferenced, match='event 10'):
+        service.delete('clients', 1)
+
+
+def test_nullify_guest_removes_it_from_guest_lists(service):
+    service.delete('guests', 2)  # The default policy for guests
+    assert [service.get('events', key).guests.tolist() for key in (10, 11)] == [[1], [3]]
+    assert list(service.references.referring('guests', 2)) == []
+    assert ids(service, 'guests') == [1, 3]
+
+
+def test_nullify_client_clears_the_events_client(service):
+    service.delete('clients', 1, 'nullify')
+    assert [service.get('events', key).clientID for key in (10, 11)] == [None, None]
+    service.delete('events', 10)  # No reference to the deleted client is left behind
+    assert ids(service, 'events') == [11]
+
+
+def test_nullify_manager_leaves_the_rest_of_the_chain(service):
+    service.delete('employees', 1)
+    assert service.get('employees', 2).managerID is None
+    assert service.get('employees', 3).managerID == 2
+    assert service.hierarchy.chain_of_command(3) == [2]
+
+
+@pytest.mark.parametrize('collection, key, expected', [
+    ('guests', 2, {'guests': [1, 3], 'events': [], 'clients': [1], 'employees': [1, 2, 3]}),
+    ('clients', 1, {'guests': [1, 2, 3], 'events': [], 'clients': [], 'employees': [1, 2, 3]}),
+    # The policy only covers direct referrers: employee 3 is nullified by the employees' default.
+    ('employees', 1, {'guests': [1, 2, 3], 'events': [10, 11], 'clients': [1], 'employees': [3]}),
+])
+def test_cascade_deletes_the_direct_referrers(service, collection, key, expected):
+    service.delete(collection, key, 'cascade')
+    assert {name: ids(service, name) for name in expected} == expected
+    assert service.undo()
+    assert ids(service, 'events') == [10, 11] and ids(service, 'employees') == [1, 2, 3]
+
+
+def test_rejects_unknown_policies(service):
+    with pytest.raises(ValueError, match='unknown delete policy'):
+        service.delete('guests', 2, 'purge')
+    assert ids(service, 'guests') == [1, 2, 3]
+    status, payload = Main.ServiceHTTPServer(service).dispatch('DELETE', '/guests/2?policy=purge', b'')
+    assert status == 400 and 'purge' in payload['error']
+
+
+def test_deletes_survive_a_restart(service, open_service):
+    service.delete('guests', 2)
+    service.delete('clients', 1, 'nullify')
+    service.close()
+    reopened = open_service()
+    assert ids(reopened, 'guests') == [1, 3]
+    assert [(event.clientID, event.guests.tolist()) for event in reopened.collections['events'].values()] == \
+        [(None, [1]), (None, [3])]
+
+
+def test_import_accepts_null_references():
+    employees = Main.open_collections()['employees']
+    with open('employees.csv', 'w', newline='') as f:
+        f.write('employeeID,name,department,jobTitle,basicSalary,managerID\n'
+                '1,Ann,Sales,Lead,100,\n'
+                '2,Bob,Sales,Rep,50,1\n')
+    assert Main.import_records(employees, 'employees', 'employees.csv') == (2, [])
+    assert [employees[key].managerID for key in (1, 2)] == [None, 1]
+
+    events = Main.open_collections()['events']
+    row = {'eventID': 5, 'type': 'Gala', 'theme': '', 'date': '2027-03-01', 'time': '10:00', 'duration': 2,
+           'venueAddress': 'Hall', 'clientID': None, 'guests': [], 'invoice': ''}
+    with open('events.jsonl', 'w') as f:
+        f.write(json.dumps(row) + '\n')
+    assert Main.import_records(events, 'events', 'events.jsonl') == (1, [])
+    assert events[5].clientID is None
+
+    # An export of those records validates and builds the same records again.
+    for collection, records in (('employees', employees), ('events', events)):
+        for suffix in ('csv', 'jsonl'):
+            path = f'{collection}.out.{suffix}'
+            Main.export_records(records, path)
+            rows = [row for _, row in Main.read_rows(path)]
+            assert [Main.validate_row(collection, row)[1] for row in rows] == [None] * len(rows)
+            assert [Main.export_row(Main.validate_row(collection, row)[0]) for row in rows] == \
+                [Main.export_row(record) for record in records.values()]
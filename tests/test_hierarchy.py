@@ -0,0 +1,140 @@
+import random
+
+import pytest
+
+import Main
+
+
+def employee(key, manager_id, salary=100):
+    return {'employeeID': key, 'name': f'Employee {key}', 'department': 'Sales', 'jobTitle': 'Rep',
+            'basicSalary': salary, 'managerID': manager_id}
+
+
+def expected(manager_of, salary):
+    """Depth, chain, headcount and roll-up of every employee, worked out the slow way."""
+    chains = {}
+    for key in manager_of:
+        chain, parent = [], manager_of[key]
+        while parent in manager_of and parent != key:
+            chain.append(parent)
+            parent = manager_of[parent]
+        chains[key] = chain
+    headcount = dict.fromkeys(manager_of, 1)
+    rollup = dict(salary)
+    for key, chain in chains.items():
+        for manager_id in chain:
+            headcount[manager_id] += 1
+            rollup[manager_id] += salary[key]
+    return chains, headcount, rollup
+
+
+def check(index, manager_of, salary):
+    chains, headcount, rollup = expected(manager_of, salary)
+    for key, chain in chains.items():
+        assert index.chain_of_command(key) == chain
+        assert index.depth[key] == len(chain)
+        assert index.root_of(key) == (chain[-1] if chain else key)
+        assert index.headcount[key] == headcount[key]
+        assert index.rollup[key] == rollup[key]
+        for manager_id in manager_of:
+            assert index.reports_to(key, manager_id) == (manager_id in chain)
+
+
+def test_adding_a_reporting_loop_is_refused(open_service):
+    service = open_service()
+    for key, manager_id in ((1, 3), (2, 1)):
+        service.add('employees', employee(key, manager_id))
+    with pytest.raises(Main.ReportingCycle):
+        service.add('employees', employee(3, 2))
+    assert sorted(service.collections['employees']) == [1, 2]
+    assert service.hierarchy.cycles == []
+    service.add('employees', employee(3, None))  # Without the loop it is fine
+    assert service.org_chart(2)['chain'] == [1, 3]
+
+
+def test_loops_in_stored_data_are_reported_and_broken():
+    records = {key: Main.Employee(**employee(key, manager_id))
+               for key, manager_id in ((1, 3), (2, 1), (3, 2), (4, 2), (5, 5))}
+    index = Main.HierarchyIndex(records)
+    index.build()
+    assert index.cycles == [[1, 2, 3]]
+    assert index.chain_of_command(4) == [2, 1]
+    assert index.root_of(3) == 1
+    assert index.chain_of_command(5) == []
+
+
+def test_jump_pointers_answer_ancestor_queries_on_a_deep_chain():
+    depth = 1000
+    records = {key: Main.Employee(**employee(key, key - 1 or None)) for key in range(1, depth + 1)}
+    index = Main.HierarchyIndex(records)
+    index.build()
+    assert max(len(jumps) for jumps in index.jumps.values()) == (depth - 1).bit_length()
+    for key in (1, 2, 513, 999, depth):
+        assert index.root_of(key) == 1
+        for levels in {0, 1, 2, 7, 64, key - 1} & set(range(key)):
+            assert index.ancestor(key, levels) == key - levels
+    assert index.reports_to(depth, 1) and index.reports_to(depth, 500)
+    assert not index.reports_to(500, depth) and not index.reports_to(500, 500)
+    assert index.would_cycle(1, depth) and not index.would_cycle(depth, 1)
+    assert index.headcount[1] == depth
+    assert index.rollup[500] == 100 * (depth - 499)
+
+
+def test_rollups_follow_reassignments_and_deletes():
+    rng = random.Random(17)
+    manager_of = {key: rng.choice([None] + list(range(1, key))) for key in range(1, 61)}
+    salary = {key: rng.randrange(50, 500) for key in manager_of}
+    records = {key: Main.Employee(**employee(key, manager_of[key], salary[key])) for key in manager_of}
+    index = Main.HierarchyIndex(records)
+    index.build()
+    check(index, manager_of, salary)
+    for _ in range(150):
+        key = rng.choice(sorted(manager_of))
+        if rng.random() < 0.2:  # Delete; the reports wait for the manager to come back
+            index.record_changed('employees', key, records.pop(key), None)
+            del manager_of[key], salary[key]
+            continue
+        manager_id = rng.choice([None] + sorted(manager_of))
+        if manager_id is not None and (manager_id == key or index.would_cycle(key, manager_id)):
+            continue
+        old, records[key] = records[key], Main.Employee(**employee(key, manager_id, rng.randrange(50, 500)))
+        index.record_changed('employees', key, old, records[key])
+        manager_of[key], salary[key] = manager_id, records[key].basicSalary
+        check(index, manager_of, salary)
+    check(index, manager_of, salary)
+
+
+def test_service_rollups_after_a_manager_is_moved_or_deleted(open_service):
+    service = open_service()
+    for key, manager_id, salary in ((1, None, 500), (2, 1, 300), (3, 1, 250), (4, 2, 100), (5, 4, 80)):
+        service.add('employees', employee(key, manager_id, salary))
+    assert service.org_chart(1)['salaryRollup'] == 1230
+    with service.transaction():  # Move 4 (and 5 with them) from 2 to 3
+        service.delete('employees', 4, 'cascade')
+        service.add('employees', employee(4, 3, 100))
+        service.add('employees', employee(5, 4, 80))
+    assert service.org_chart(2)['headcount'] == 1
+    assert service.org_chart(3) == {'employeeID': 3, 'depth': 1, 'chain': [1], 'reports': [4],
+                                    'headcount': 3, 'salaryRollup': 430}
+    assert service.org_chart(5)['chain'] == [4, 3, 1]
+    service.delete('employees', 3)  # 4 becomes a root, taking 5 along
+    assert service.org_chart(1)['headcount'] == 2
+    assert service.org_chart(1)['salaryRollup'] == 800
+    assert service.org_chart(4) == {'employeeID': 4, 'depth': 0, 'chain': [], 'reports': [5],
+                                    'headcount': 2, 'salaryRollup': 180}
+    service.undo()
+    assert service.org_chart(1)['headcount'] == 5
+    assert service.org_chart(5)['chain'] == [4, 3, 1]
+
+
+def test_cascading_down_a_deep_reporting_line(open_service, monkeypatch):
+    monkeypatch.setitem(Main.DELETE_POLICIES, 'employees', 'cascade')
+    service = open_service()
+    depth = 1500  # Deeper than the default recursion limit
+    for key in range(1, depth + 1):
+        service.add('employees', employee(key, key - 1 or None))
+    service.add('employees', employee(depth + 1, None))
+    service.delete('employees', 1)
+    assert list(service.collections['employees']) == [depth + 1]
+    service.close()
+    assert list(Main.open_collections()['employees']) == [depth + 1]
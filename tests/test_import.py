@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+import Main
+
+
+def write_jsonl(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+    return str(path)
+
+
+def event_row(key, start, hours, venue='Hall 1'):
+    return {'eventID': key, 'type': 'Gala', 'theme': '', 'date': '2027-03-01', 'time': start, 'duration': hours,
+            'venueAddress': venue, 'clientID': None, 'guests': [], 'invoice': ''}
+
+
+def employee_row(key, manager_id):
+    return {'employeeID': key, 'name': f'Employee {key}', 'department': 'Sales', 'jobTitle': 'Rep',
+            'basicSalary': 100, 'managerID': manager_id}
+
+
+@pytest.mark.parametrize('shards', [1, 2])
+def test_import_skips_overlapping_bookings(shards):
+    path = write_jsonl('events.jsonl', [event_row(1, '08:00', 4), event_row(2, '09:00', 0.5),
+                                        event_row(3, '12:00', 1), event_row(4, '09:00', 1, venue='Hall 2')])
+    records = Main.open_collections(shards=shards)['events']
+    if isinstance(records, Main.ShardedRecords):
+        imported, errors = Main.import_records_parallel(records, 'events', path)
+    else:
+        imported, errors = Main.import_records(records, 'events', path)
+    assert imported == 3
+    assert errors == [(2, "Event overlaps existing bookings: Venue hall 1 is booked for event 1")]
+    assert sorted(records) == [1, 3, 4]
+
+    # Rows are also checked against the events already stored.
+    path = write_jsonl('more.jsonl', [event_row(5, '11:30', 1), event_row(6, '20:00', 1)])
+    imported, errors = Main.import_records(records, 'events', path)
+    assert (imported, [line for line, _ in errors]) == (1, [1])
+
+
+def test_import_skips_reporting_cycles():
+    records = Main.open_collections()['employees']
+    path = write_jsonl('employees.jsonl', [employee_row(1, 3), employee_row(2, 1), employee_row(3, 2),
+                                           employee_row(4, 4), employee_row(5, 1)])
+    imported, errors = Main.import_records(records, 'employees', path)
+    assert imported == 4
+    assert errors == [(3, "Employee 2 already reports to employee 3.")]
+    assert sorted(records) == [1, 2, 4, 5]
@@ -0,0 +1,68 @@
+import random
+from datetime import date
+
+import Main
+
+
+def brute_force_size(options, used=frozenset()):
+    """Size of a maximum matching, by trying every choice for the first left vertex."""
+    if not options:
+        return 0
+    first, rest = options[0], options[1:]
+    best = brute_force_size(rest, used)
+    for right in first:
+        if right not in used:
+            best = max(best, 1 + brute_force_size(rest, used | {right}))
+    return best
+
+
+def test_matching_is_maximum_on_small_graphs():
+    rng = random.Random(21)
+    for _ in range(500):
+        rights = range(rng.randint(1, 6))
+        options = [rng.sample(rights, rng.randint(0, len(rights))) for _ in range(rng.randint(0, 7))]
+        match = Main.max_bipartite_matching(options)
+        assert len(match) == len(options)
+        chosen = [right for right in match if right is not None]
+        assert len(chosen) == len(set(chosen))
+        assert all(right is None or right in choices for right, choices in zip(match, options))
+        assert len(chosen) == brute_force_size(options)
+
+
+def test_matching_prefers_earlier_options():
+    assert Main.max_bipartite_matching([['a', 'b'], ['b', 'c']]) == ['a', 'b']
+    assert Main.max_bipartite_matching([['a', 'b'], ['a']]) == ['b', 'a']
+
+
+def test_candidates_match_a_scan_of_the_records(open_service):
+    rng = random.Random(7)
+    service = open_service()
+    service.add('clients', {'clientID': 1, 'name': 'Client', 'address': '', 'contactDetails': '', 'budget': 5})
+    for key in range(1, 13):
+        low = rng.randint(0, 40)
+        service.add('venues', {'venueID': key, 'name': 'Venue', 'address': f'Hall {key}', 'contact': '',
+                               'minGuests': low, 'maxGuests': low + rng.randint(0, 60)})
+        service.add('caterers', {'catererID': key, 'name': 'Caterer', 'address': '', 'contactDetails': '',
+                                 'menu': '', 'minGuests': low, 'maxGuests': low + rng.randint(0, 60)})
+    for key in range(1, 30):
+        row = {'eventID': key, 'type': 'Gala', 'theme': '', 'date': f'2027-02-{key % 5 + 1:02d}',
+               'time': '10:00', 'duration': 2, 'venueAddress': f'hall  {rng.randint(1, 20)}',
+               'clientID': 1, 'guests': [], 'caterer': rng.choice([None, rng.randint(1, 12)]), 'invoice': ''}
+        try:
+            service.add('events', row)
+        except Main.BookingConflict:
+            pass
+        if key % 10 == 0:
+            service.delete('venues', key // 10)
+    collections = service.collections
+    for day in range(1, 7):
+        for guests in (0, 25, 50, 90):
+            events = [event for event in collections['events'].values() if event.date.day == day]
+            addresses = {Main.MatchingEngine.address_key(event.venueAddress) for event in events}
+            venues = sorted(venue.venueID for venue in collections['venues'].values()
+                            if venue.minGuests <= guests <= venue.maxGuests
+                            and Main.MatchingEngine.address_key(venue.address) not in addresses)
+            caterers = sorted(caterer.catererID for caterer in collections['caterers'].values()
+                              if caterer.minGuests <= guests <= caterer.maxGuests
+                              and caterer.catererID not in {event.caterer for event in events})
+            assert service.candidates(guests, date(2027, 2, day)) == (venues, caterers)
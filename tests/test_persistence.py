@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+import Main
+
+
+def client_row(key):
+    return {'clientID': key, 'name': f'Client {key}', 'address': '', 'contactDetails': '', 'budget': 1}
+
+
+@pytest.fixture
+def always_compact(monkeypatch):
+    monkeypatch.setattr(Main.RecordLog, 'needs_compaction', lambda self, live_count: True)
+
+
+def test_compaction_keeps_changes_of_an_open_transaction_out_of_the_log(open_service, always_compact):
+    service = open_service()
+    service.add('clients', client_row(100))  # Written, and the log compacted, while the block below runs
+    with pytest.raises(RuntimeError):
+        with service.transaction():
+            service.add('clients', client_row(1))
+            time.sleep(0.2)
+            raise RuntimeError
+    assert list(service.collections['clients']) == [100]
+    service.close()
+
+    assert list(open_service().collections['clients']) == [100]
+
+
+def test_compaction_keeps_records_deleted_in_an_open_transaction(open_service, always_compact):
+    service = open_service()
+    service.add('clients', client_row(1))
+    service.writer.flush()
+    service.add('clients', client_row(100))
+    with pytest.raises(RuntimeError):
+        with service.transaction():
+            service.delete('clients', 1)
+            time.sleep(0.2)
+            raise RuntimeError
+    service.close()
+
+    assert sorted(open_service().collections['clients']) == [1, 100]
+
+
+def test_compaction_keeps_unwritten_records_readable(open_service, always_compact):
+    service = open_service()
+    for key in range(1, 6):
+        service.add('clients', client_row(key))
+    service.writer.flush()
+    records = service.collections['clients']
+    records[6] = Main.build_client(client_row(6))  # In memory only
+    records.compact()
+    assert records[6].name == 'Client 6'
+    assert [records[key].name for key in range(1, 6)] == [f'Client {key}' for key in range(1, 6)]
@@ -0,0 +1,101 @@
+import pytest
+
+import Main
+
+
+def guest(key, name=None):
+    return {'guestID': key, 'name': name or f'Guest {key}', 'address': '', 'contactDetails': ''}
+
+
+def event(key, guests, theme=''):
+    return {'eventID': key, 'type': 'Gala', 'theme': theme, 'date': '2027-03-01', 'time': '10:00',
+            'duration': 2, 'venueAddress': f'Hall {key}', 'clientID': None, 'guests': guests, 'invoice': ''}
+
+
+@pytest.fixture
+def service(open_service):
+    service = open_service()
+    for key in range(1, 121):
+        service.add('guests', guest(key))
+    service.add('events', event(10, list(range(1, 121))))
+    service.add('events', event(11, [1, 60]))
+    return service
+
+
+def cached(service, collection, key):
+    return sorted(page for name, record_key, page in service.renders.pages
+                  if (name, record_key) == (collection, key))
+
+
+def test_pages_list_guests_by_name(service):
+    text, pages = service.details('events', 10, 2)
+    assert pages == 3
+    assert 'page 3 of 3' in text and '\n  101: Guest 101' in text and 'Guest 100\n' not in text
+    assert service.details('events', 10, 2) == (text, 3)
+    assert cached(service, 'events', 10) == [2]
+    with pytest.raises(ValueError):
+        service.details('events', 10, 3)
+
+
+def test_editing_a_record_drops_its_pages(service):
+    service.details('events', 10, 0)
+    service.details('events', 11, 0)
+    before = service.details('guests', 5)[0]
+    with service.transaction():
+        service.delete('events', 10)
+        service.add('events', event(10, [1, 2], theme='Masquerade'))
+    assert cached(service, 'events', 10) == []
+    assert cached(service, 'events', 11) == [0]
+    text, pages = service.details('events', 10, 0)
+    assert pages == 1 and 'Masquerade' in text and 'Guest 3' not in text
+    assert service.details('guests', 5)[0] == before  # Untouched records stay cached
+    assert cached(service, 'guests', 5) == [0]
+
+
+def test_deleting_a_guest_drops_the_pages_naming_them(service):
+    for page in range(3):
+        service.details('events', 10, page)
+    service.details('events', 11, 0)
+    service.details('guests', 60)
+    service.delete('guests', 60)  # Nullified: taken off both guest lists
+    assert cached(service, 'guests', 60) == []
+    assert cached(service, 'events', 10) == [] and cached(service, 'events', 11) == []
+    assert '60: Guest 60' not in service.details('events', 11, 0)[0]
+    assert service.details('events', 10, 1)[0].count('\n  ') == 50
+    with pytest.raises(Main.NotFound):
+        service.details('guests', 60)
+    service.undo()
+    assert '\n  60: Guest 60' in service.details('events', 11, 0)[0]
+
+
+def test_renaming_a_guest_drops_only_the_events_showing_them(service):
+    service.close()
+    guests = Main.open_collections()['guests']
+    events = {10: Main.build_event(event(10, list(range(1, 121)))), 11: Main.build_event(event(11, [1, 60]))}
+    renders = Main.RenderCache(guests)
+    for page in range(3):
+        renders.render('events', events[10], page)
+    renders.render('events', events[11])
+    old, guests[101] = guests[101], Main.Guest(**guest(101, 'Renamed Guest'))
+    renders.record_changed('guests', 101, old, guests[101])
+    assert sorted(renders.pages) == [('events', 11, 0)]
+    assert '101: Renamed Guest' in renders.render('events', events[10], 2)
+    assert renders.shown_in[101] == {10}
+
+
+def test_least_recently_viewed_pages_go_first(service):
+    service.close()
+    guests = Main.open_collections()['guests']
+    renders = Main.RenderCache(guests, max_chars=1)
+    first, second = guests[1], guests[2]
+    renders.render('guests', first)
+    renders.render('guests', second)
+    assert list(renders.pages) == [('guests', 2, 0)]  # The newest page is always kept
+    renders.max_chars = 10_000
+    renders.render('guests', first)
+    renders.render('guests', second)
+    renders.render('guests', first)
+    renders.max_chars = renders.size + 1  # Room for one more page once the oldest goes
+    renders.render('guests', guests[3])
+    assert list(renders.pages) == [('guests', 1, 0), ('guests', 3, 0)]
+    assert renders.size == sum(len(text) for text, _ in renders.pages.values())
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+import Main
+
+
+def event_row(key, start, hours, venue='Hall 1', day='2027-03-01', **slots):
+    return dict({'eventID': key, 'type': 'Gala', 'theme': '', 'date': day, 'time': start, 'duration': hours,
+                 'venueAddress': venue, 'clientID': None, 'guests': [], 'invoice': ''}, **slots)
+
+
+def stored_without_checks(rows):
+    """Events saved straight to the collection, as legacy pickles, SQLite data or old imports were."""
+    records = Main.open_collections()['events']
+    records.save_many({row['eventID']: Main.build_event(row) for row in rows})
+
+
+def test_finds_an_earlier_long_booking_behind_an_overlapping_one(open_service):
+    stored_without_checks([event_row(1, '08:00', 4), event_row(2, '09:00', 0.5)])
+    service = open_service()
+    assert service.conflicts() == [(('Venue', 'hall 1'), 1, 2)]
+
+    with pytest.raises(Main.BookingConflict, match='booked for event 1'):
+        service.add('events', event_row(3, '10:00', 1))
+    assert service.conflicts() == [(('Venue', 'hall 1'), 1, 2)]
+
+
+def test_reports_every_overlapping_booking_in_start_order(open_service):
+    stored_without_checks([event_row(1, '06:00', 10), event_row(2, '07:00', 1), event_row(3, '11:30', 2),
+                           event_row(4, '13:00', 1)])
+    service = open_service()
+    candidate = Main.build_event(event_row(5, '11:00', 1))
+    assert service.schedule.conflicts_for(candidate) == [(('Venue', 'hall 1'), 1), (('Venue', 'hall 1'), 3)]
+
+
+def test_touching_bookings_do_not_conflict(open_service):
+    service = open_service()
+    service.add('events', event_row(1, '08:00', 2))
+    service.add('events', event_row(2, '10:00', 2))
+    service.add('events', event_row(3, '06:00', 2))
+    assert service.conflicts() == []
+
+
+def test_conflicts_match_brute_force_after_adds_and_deletes(open_service):
+    rng = random.Random(8)
+    stored_without_checks([event_row(key, f'{rng.randint(0, 23):02d}:{rng.choice([0, 30]):02d}',
+                                     rng.choice([0.5, 1, 3, 9, 30]), venue=f'Hall {rng.randint(1, 3)}',
+                                     day=f'2027-03-{rng.randint(1, 4):02d}')
+                           for key in range(1, 60)])
+    service = open_service()
+    schedule = service.schedule
+    events = service.collections['events']
+    for step in range(60, 160):
+        if rng.random() < 0.3 and len(events):
+            service.delete('events', rng.choice(sorted(events)))
+        candidate = Main.build_event(event_row(step, f'{rng.randint(0, 23):02d}:00', rng.choice([1, 4, 12]),
+                                               venue=f'Hall {rng.randint(1, 3)}',
+                                               day=f'2027-03-{rng.randint(1, 4):02d}'))
+        start, end = Main.event_window(candidate)
+        expected = sorted((*Main.event_window(other), key) for key, other in events.items()
+                          if other.venueAddress == candidate.venueAddress
+                          and Main.event_window(other)[0] < end and start < Main.event_window(other)[1])
+        assert schedule.conflicts_for(candidate) == [(('Venue', candidate.venueAddress.lower()), key)
+                                                     for _, _, key in expected]
+        if not expected:
+            service.add('events', Main.export_row(candidate))
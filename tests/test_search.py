@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+import Main
+
+
+def guest(key, name, address='1 Main Street'):
+    return {'guestID': key, 'name': name, 'address': address, 'contactDetails': f'guest{key}@example.com'}
+
+
+def found(service, text, collections=None):
+    return sorted(service.search(text, collections))
+
+
+@pytest.fixture
+def service(open_service):
+    service = open_service()
+    for key, name in ((1, 'Alice Smith'), (2, 'Alan Smithers'), (3, 'Bob Stone')):
+        service.add('guests', guest(key, name))
+    service.add('clients', {'clientID': 1, 'name': 'Alba Catering', 'address': '9 High Street',
+                            'contactDetails': '', 'budget': 10})
+    service.search('warm up')  # Build the index so the changes below go through record_changed
+    return service
+
+
+def test_prefix_and_word_search(service):
+    assert found(service, 'al') == [('clients', 1), ('guests', 1), ('guests', 2)]
+    assert found(service, 'al', ['guests']) == [('guests', 1), ('guests', 2)]
+    assert found(service, 'smith') == [('guests', 1), ('guests', 2)]
+    assert found(service, 'smith al') == [('guests', 1)]  # Only the last word matches as a prefix
+    assert found(service, 'smith ali') == [('guests', 1)]
+    assert found(service, 'smit alice') == []
+    assert found(service, 'MAIN st') == [('guests', 1), ('guests', 2), ('guests', 3)]
+    assert len(set(service.search('al', limit=2)) & {('clients', 1), ('guests', 1), ('guests', 2)}) == 2
+    assert found(service, ' ,. ') == []
+
+
+def test_search_follows_adds_and_deletes(service):
+    service.add('guests', guest(4, 'Albert Stone', '5 Mill Lane'))
+    assert found(service, 'stone al') == [('guests', 4)]
+    assert found(service, 'mill') == [('guests', 4)]
+    service.delete('guests', 3)
+    assert found(service, 'stone') == [('guests', 4)]
+    assert found(service, 'bob') == []
+    service.delete('guests', 4)
+    assert found(service, 'mill') == []
+    assert 'mill' not in service.search_index.vocabulary['guests']
+    service.undo()
+    assert found(service, 'mill') == [('guests', 4)]
+
+
+def test_search_follows_updates(service):
+    with service.transaction():  # Rename guest 1
+        service.delete('guests', 1)
+        service.add('guests', guest(1, 'Alicia Keyes', '2 Side Road'))
+    assert found(service, 'smith') == [('guests', 2)]
+    assert found(service, 'alic') == [('guests', 1)]
+    assert found(service, 'side ro') == [('guests', 1)]
+    assert found(service, 'main') == [('guests', 2), ('guests', 3)]
+    service.undo()
+    assert found(service, 'alic') == [('guests', 1)]
+    assert found(service, 'alicia') == []
+    assert found(service, 'smith') == [('guests', 1), ('guests', 2)]
+
+
+def test_index_matches_a_scan_through_random_changes():
+    rng = random.Random(9)
+    words = ['ann', 'anna', 'annex', 'bo', 'bob', 'cole', 'colette', 'dale']
+    guests = {}
+    index = Main.SearchIndex({'guests': guests})
+    index.build()
+    for _ in range(300):
+        key = rng.randrange(1, 30)
+        old = guests.pop(key, None)
+        new = None
+        if old is None or rng.random() < 0.5:
+            new = guests[key] = Main.Guest(**guest(key, ' '.join(rng.sample(words, 2)), rng.choice(words)))
+        index.record_changed('guests', key, old, new)
+        assert index.vocabulary['guests'] == sorted(index.postings['guests'])
+        for text in ('an', 'ann', 'bo', 'anna c', 'bob dal', 'cole'):
+            *whole, prefix = text.split()
+            expected = sorted(
+                key for key, record in guests.items()
+                if set(whole) <= (tokens := index._record_tokens('guests', record))
+                and any(token.startswith(prefix) for token in tokens))
+            assert sorted(key for _, key in index.search(text, ['guests'], limit=1000)) == expected
@@ -0,0 +1,106 @@
+import random
+import threading
+import time
+
+import pytest
+
+import Main
+
+COLLIDING = 2 ** 61 - 1  # hash(k) == hash(k + COLLIDING) for small non-negative ints
+
+
+def test_persistent_map_matches_dict():
+    rng = random.Random(24)
+    keys = list(range(300)) + [key + COLLIDING for key in range(20)] + [f'key {key}' for key in range(50)]
+    current, expected = Main.PersistentMap(), {}
+    snapshots = []
+    for step in range(5000):
+        key = rng.choice(keys)
+        if rng.random() < 0.6:
+            current = current.set(key, step)
+            expected[key] = step
+        else:
+            current = current.remove(key)
+            expected.pop(key, None)
+        if step % 500 == 0:
+            snapshots.append((current, dict(expected)))
+    snapshots.append((current, expected))
+    for snapshot, contents in snapshots:  # Earlier versions are unaffected by later updates
+        assert len(snapshot) == len(contents)
+        assert dict(snapshot.items()) == contents
+        assert sorted(map(str, snapshot)) == sorted(map(str, contents))
+        for key in keys:
+            assert snapshot.get(key, 'missing') == contents.get(key, 'missing')
+            assert (key in snapshot) == (key in contents)
+
+
+def test_persistent_map_remove_of_missing_key_returns_same_map():
+    empty = Main.PersistentMap()
+    assert empty.remove(1) is empty
+    one = empty.set(1, 'a')
+    assert one.remove(1 + COLLIDING) is one
+    assert len(one.remove(1)) == 0
+
+
+def test_undo_of_a_spilled_guest_list_survives_restart(open_service):
+    threshold = Main.GUEST_LISTS.spill_threshold
+    service = open_service()
+    service.add('clients', {'clientID': 1, 'name': 'Client', 'address': '', 'contactDetails': '', 'budget': 5})
+    with service.transaction():
+        for key in range(threshold + 10):
+            service.add('guests', {'guestID': key, 'name': 'Guest', 'address': '', 'contactDetails': ''})
+    service.add('events', {'eventID': 1, 'type': 'Gala', 'theme': '', 'date': '2027-02-01', 'time': '10:00',
+                           'duration': 2, 'venueAddress': 'Hall', 'clientID': 1,
+                           'guests': list(range(threshold + 10)), 'suppliers': '', 'invoice': ''})
+    service.close()
+
+    service = open_service()
+    assert service.get('events', 1).guests.path is not None  # Mapped from its guest file
+    service.delete('guests', 5, 'nullify')
+    assert 5 not in service.get('events', 1).guests
+    service.writer.flush()  # The shortened list reaches disk before the undo
+    service.undo()
+    service.save_data()
+    service.close()
+
+    service = open_service()
+    guests = service.get('events', 1).guests
+    assert len(guests) == threshold + 10
+    assert 5 in guests and 5 in service.collections['guests']
+
+
+@pytest.mark.parametrize('shards', [1, 2])
+def test_rollback_holds_while_the_writer_compacts(open_service, monkeypatch, shards):
+    monkeypatch.setattr(Main.RecordLog, 'needs_compaction', lambda self, live_count: True)
+    compacted = threading.Event()
+    compact = Main.LazyRecords.compact
+
+    def spy(records):
+        if threading.current_thread().name == 'persistence':
+            compacted.set()
+        compact(records)
+
+    monkeypatch.setattr(Main.LazyRecords, 'compact', spy)
+    service = open_service(shards=shards)
+    for key in range(1, 6):
+        service.add('guests', {'guestID': key, 'name': f'Guest {key}', 'address': '', 'contactDetails': ''})
+    service.writer.flush()
+    compacted.clear()
+
+    # Committed but still queued, so the writer applies and compacts them inside the block below.
+    service.add('guests', {'guestID': 10, 'name': 'Guest 10', 'address': '', 'contactDetails': ''})
+    service.delete('guests', 3)
+    expected = sorted(service.collections['guests'])
+    with pytest.raises(RuntimeError):
+        with service.transaction():
+            service.delete('guests', 1)
+            service.delete('guests', 10)
+            service.add('guests', {'guestID': 20, 'name': 'Guest 20', 'address': '', 'contactDetails': ''})
+            assert compacted.wait(5)
+            raise RuntimeError
+    assert sorted(service.collections['guests']) == expected == [1, 2, 4, 5, 10]
+    service.close()
+
+    guests = open_service(shards=shards).collections['guests']
+    assert sorted(guests) == expected
+    assert guests[1].name == 'Guest 1'
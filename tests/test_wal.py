@@ -0,0 +1,108 @@
+import os
+import threading
+
+import pytest
+
+import Main
+
+
+def client(key, budget=100.0):
+    return Main.build_client({'clientID': key, 'name': f'Client {key}', 'address': 'Street 1',
+                              'contactDetails': 'mail', 'budget': budget})
+
+
+def commit_without_applying(changes, shards=1):
+    """Write ``{collection: {ID: record or None}}`` to the write-ahead log only, as a crash before apply leaves it."""
+    collections = Main.open_collections(shards=shards)
+    wal = Main.WriteAheadLog()
+    wal.commit({shard.log.name: shard.log.encode(part)[0]
+                for collection, collection_changes in changes.items()
+                for shard, part in collections[collection].partition(collection_changes)})
+    wal.close()
+
+
+def test_replays_commit_that_never_reached_the_logs(open_service):
+    commit_without_applying({'clients': {1: client(1), 2: client(2)}})
+    assert os.path.getsize('data.wal') > 0
+
+    service = open_service()
+    assert sorted(service.collections['clients']) == [1, 2]
+    assert service.get('clients', 2).name == 'Client 2'
+    assert os.path.getsize('data.wal') == 0
+
+
+def test_replay_keeps_the_last_committed_state(open_service):
+    service = open_service()
+    service.add('clients', {'clientID': 1, 'name': 'Client 1', 'address': 'Street 1',
+                            'contactDetails': 'mail', 'budget': 1})
+    service.close()
+
+    commit_without_applying({'clients': {1: client(1, budget=5.0), 2: client(2)}})
+    commit_without_applying({'clients': {2: None, 3: client(3)}})
+
+    service = open_service()
+    records = service.collections['clients']
+    assert sorted(records) == [1, 3]
+    assert records[1].budget == 5.0
+
+
+def test_replay_is_all_or_nothing_across_collections(open_service):
+    guest = Main.build_guest({'guestID': 7, 'name': 'Guest', 'address': 'Street 2', 'contactDetails': 'mail'})
+    commit_without_applying({'clients': {1: client(1)}, 'guests': {7: guest}})
+    with open('data.wal', 'ab') as f:  # A torn second commit: header and half a payload
+        f.write(Main.WriteAheadLog.HEADER.pack(100, 0) + b'\0' * 50)
+
+    service = open_service()
+    assert list(service.collections['clients']) == [1]
+    assert list(service.collections['guests']) == [7]
+
+
+def test_ignores_a_commit_with_a_bad_checksum(open_service):
+    commit_without_applying({'clients': {1: client(1)}})
+    with open('data.wal', 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    service = open_service()
+    assert list(service.collections['clients']) == []
+
+
+def test_replays_into_sharded_collections(open_service):
+    guests = {key: Main.build_guest({'guestID': key, 'name': f'Guest {key}', 'address': '', 'contactDetails': ''})
+              for key in range(1, 21)}
+    commit_without_applying({'guests': guests}, shards=3)
+
+    service = open_service(shards=3)
+    assert sorted(service.collections['guests']) == list(range(1, 21))
+    assert service.get('guests', 20).name == 'Guest 20'
+
+
+def test_only_committed_changes_survive_a_crash(open_service, monkeypatch):
+    monkeypatch.setattr(Main.RecordLog, 'needs_compaction', lambda self, live_count: True)
+    applied = threading.Event()
+    apply_block = Main.LazyRecords.apply_block
+
+    def spy(records, block):
+        apply_block(records, block)
+        applied.set()
+
+    monkeypatch.setattr(Main.LazyRecords, 'apply_block', spy)
+    service = open_service()
+    for key in (1, 2):
+        service.add('clients', {'clientID': key, 'name': f'Client {key}', 'address': '', 'contactDetails': '',
+                                'budget': 1})
+    service.writer.flush()
+    applied.clear()
+    service.add('clients', {'clientID': 4, 'name': 'Client 4', 'address': '', 'contactDetails': '', 'budget': 1})
+    with pytest.raises(RuntimeError):
+        with service.transaction():
+            service.add('clients', {'clientID': 3, 'name': 'Client 3', 'address': '', 'contactDetails': '',
+                                    'budget': 1})
+            service.delete('clients', 1)
+            assert applied.wait(5)  # Client 4 written and the log compacted while the block is open
+            commit_without_applying({'clients': {5: client(5)}})
+            # The process dies here; reopening replays the write-ahead log over what the files hold.
+            assert sorted(Main.open_collections()['clients']) == [1, 2, 4, 5]
+            raise RuntimeError